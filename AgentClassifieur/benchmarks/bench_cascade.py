@@ -0,0 +1,119 @@
+"""
+Cascade règles → modèle : taux de sortie par étage et écart de précision.
+
+Les règles sont calibrées sur la partie entraînement de data_personn3.csv
+(même découpage que train_classifier.py), puis évaluées sur :
+- la partie test de data_personn3.csv
+- les autres CSV de data/ (hors distribution)
+
+Pour chaque seuil : part des requêtes résolues par les règles, précision de
+la cascade, précision du modèle complet seul, et latence moyenne mesurée
+(règles seules, modèle complet seul, cascade). Neo4j hors ligne, cache de
+features désactivé.
+
+Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_cascade.py [--thresholds 0.7 0.8 0.9 0.95]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+
+os.environ.setdefault("KG_OFFLINE", "1")
+os.environ.setdefault("FEATURE_CACHE_SIZE", "0")
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+from cascade import CascadeClassifier, KeywordTier
+from router import _early_result, _predict_with_model, _result_from_rule, warmup
+
+warnings.filterwarnings("ignore")
+
+DATA_PATH = "data/data_personn3.csv"
+
+
+def load_dataset(path: str):
+    df = pd.read_csv(path)
+    query_col = "query" if "query" in df.columns else "command"
+    label_col = "complexity" if "complexity" in df.columns else "label"
+    return df[query_col].astype(str).tolist(), df[label_col].astype(str).str.strip().str.upper().tolist()
+
+
+def evaluation_sets():
+    queries, labels = load_dataset(DATA_PATH)
+    train_q, test_q, train_y, test_y = train_test_split(
+        queries, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    sets = {"data_personn3 (test)": (test_q, test_y)}
+    for path in sorted(glob.glob("data/*.csv")):
+        if os.path.basename(path) != os.path.basename(DATA_PATH):
+            sets[os.path.basename(path)] = load_dataset(path)
+    return (train_q, train_y), sets
+
+
+def timed(fn, queries) -> tuple:
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, (time.perf_counter() - start) / max(1, len(queries)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascade règles → modèle")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.9, 0.95])
+    args = parser.parse_args()
+
+    (train_q, train_y), sets = evaluation_sets()
+    tier = KeywordTier()
+    tier.calibrate(train_q, train_y)
+    warmup()
+
+    print("=" * 86)
+    print("CASCADE RÈGLES → MODÈLE".center(86))
+    print("=" * 86)
+
+    for name, (queries, labels) in sets.items():
+        # Le filtre de pertinence passe avant les deux étages, dans les deux cas
+        kept = [(q, y) for q, y in zip(queries, labels) if _early_result(q) is None]
+        rejected = len(queries) - len(kept)
+        queries = [q for q, _ in kept]
+        labels = [y for _, y in kept]
+
+        full, full_ms = timed(lambda q: _predict_with_model([q])[0]["predicted_complexity"], queries)
+        rules, rules_ms = timed(tier.classify, queries)
+        full_acc = sum(p == y for p, y in zip(full, labels)) / (len(labels) + rejected)
+
+        print(f"\n{name} : {len(labels)} requêtes ({rejected} rejetées par le filtre de pertinence)")
+        print(f"Latence moyenne : règles {rules_ms * 1000:.1f} µs | modèle complet {full_ms:.2f} ms")
+        print(f"{'seuil':>7}{'sortie règles':>15}{'sortie modèle':>15}{'précision':>11}{'modèle seul':>13}"
+              f"{'écart':>8}{'ms/req':>9}")
+
+        for threshold in args.thresholds:
+            cascade = CascadeClassifier(
+                tier,
+                lambda qs: [r["predicted_complexity"] for r in _predict_with_model(qs)],
+                threshold,
+                early_result=lambda q, label, confidence, rule: label,
+            )
+            predicted, cascade_ms = timed(cascade.predict, queries)
+            stats = cascade.stats()
+            accuracy = sum(p == y for p, y in zip(predicted, labels)) / (len(labels) + rejected)
+            print(f"{threshold:>7.2f}{stats['exit_rate']['keywords']:>15.1%}{stats['exit_rate']['model']:>15.1%}"
+                  f"{accuracy:>11.3f}{full_acc:>13.3f}{accuracy - full_acc:>+8.3f}{cascade_ms:>9.2f}")
+
+    print("\nPrécision : les requêtes rejetées (IRRELEVANT) comptent comme erreurs dans les deux colonnes.")
+    print("Confiance calibrée par règle (données d'entraînement) :")
+    for rule_name, label, _ in tier.rules:
+        stats = tier.calibration[rule_name]
+        print(f"  {rule_name:<18}{label:<8}{stats['correct']:>3}/{stats['total']:<3} → {tier.confidence(rule_name):.3f}")
+
+
+if __name__ == "__main__":
+    main()
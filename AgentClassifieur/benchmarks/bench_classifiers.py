@@ -0,0 +1,261 @@
+"""
+Comparaison des quatre points d'entrée de classification sur data/*.csv.
+
+- router      : router.predict_complexity (spaCy + KG + forêt compilée)
+- classifier  : classifier.get_complexity (idem + post_rule_adjustment)
+- hybrid      : HybridNmapClassifier.predict (entraîné sur nmap_dataset_hybrid.csv)
+- classify_tool : mcp_server/tools/classify_tool.classify_query (sans spaCy)
+
+Chaque point d'entrée tourne dans un interpréteur neuf, ce qui donne :
+- démarrage à froid : import + chargement + première prédiction
+- précision par classe et globale (toute autre sortie, ex. IRRELEVANT, compte comme erreur)
+- latence p50 / p95 / p99 d'une requête seule
+- débit en lot (API de lot si elle existe, sinon boucle)
+- pic de mémoire résidente (ru_maxrss)
+
+Neo4j n'est jamais contacté (KG_OFFLINE=1 : index JSON s'il existe, sinon
+features KG à 0). Le cache de features est désactivé pour mesurer le coût
+réel d'une requête (--cache pour le garder). Résultats en JSON dans
+benchmarks/results/ pour comparer les exécutions.
+
+Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_classifiers.py [--entry router classifier] [--batch-size 64]
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+ENTRY_POINTS = ["router", "classifier", "hybrid", "classify_tool"]
+# Variantes avec le moteur n-grammes (CLASSIFIER_ENGINE=ngram, cf. ngram_engine.py)
+NGRAM_ENTRY_POINTS = ["router_ngram", "classify_tool_ngram"]
+LABELS = ["EASY", "MEDIUM", "HARD"]
+RESULTS_DIR = "benchmarks/results"
+HYBRID_DATA = "data/nmap_dataset_hybrid.csv"
+MCP_TOOLS = os.path.join(os.path.dirname(ROOT), "mcp_server", "tools")
+
+
+# ================= JEUX DE DONNÉES =================
+def load_dataset(path: str):
+    """(requêtes, labels en majuscules) : colonnes query/command et complexity/label."""
+    import pandas as pd
+    df = pd.read_csv(path)
+    query_col = "query" if "query" in df.columns else "command"
+    label_col = "complexity" if "complexity" in df.columns else "label"
+    return df[query_col].astype(str).tolist(), df[label_col].astype(str).str.strip().str.upper().tolist()
+
+
+# ================= POINTS D'ENTRÉE =================
+def build_entry(name: str):
+    """(predict(q) -> label, predict_batch(qs) -> labels, infos). Imports faits ici."""
+    if name.endswith("_ngram"):
+        single, batch, info = build_entry(name[:-len("_ngram")])
+        return single, batch, {**info, "engine": "ngram"}
+
+    if name == "router":
+        import router
+        single = lambda q: router.predict_complexity(q)["predicted_complexity"]
+        batch = lambda qs: [r["predicted_complexity"] for r in router.predict_complexity_batch(qs)]
+        return single, batch, {"batch_api": "predict_complexity_batch"}
+
+    if name == "classifier":
+        import classifier
+        return classifier.get_complexity, lambda qs: [classifier.get_complexity(q) for q in qs], {"batch_api": None}
+
+    if name == "hybrid":
+        import logging
+        from hybrid_classifier import HybridNmapClassifier
+        logging.disable(logging.INFO)
+        model = HybridNmapClassifier()
+        model.train(HYBRID_DATA)
+        single = lambda q: model.predict(q)["final_prediction"]
+        batch = lambda qs: model.batch_predict(qs)["final_prediction"].tolist()
+        return single, batch, {"batch_api": "batch_predict", "trained_on": os.path.basename(HYBRID_DATA)}
+
+    if name == "classify_tool":
+        import asyncio
+        sys.path.insert(0, MCP_TOOLS)
+        import classify_tool
+        loop = asyncio.new_event_loop()
+        single = lambda q: loop.run_until_complete(classify_tool.classify_query(q))["complexity"]
+
+        async def gather(qs):
+            return [(await classify_tool.classify_query(q))["complexity"] for q in qs]
+
+        batch = lambda qs: loop.run_until_complete(gather(qs))
+        if classify_tool.ngram_engine is not None:
+            mode = "ngram"
+        elif classify_tool.classifier_model is not None:
+            mode = "ml"
+        else:
+            mode = "heuristique (aucun modèle joblib)"
+        return single, batch, {"batch_api": None, "mode": mode}
+
+    raise ValueError(f"Point d'entrée inconnu : {name}")
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_worker(name: str, datasets: list, batch_size: int, min_batch_items: int) -> dict:
+    """Exécuté dans le sous-processus : toutes les mesures d'un point d'entrée."""
+    import resource
+
+    start = time.perf_counter()
+    single, batch, info = build_entry(name)
+    import_s = time.perf_counter() - start
+    single("scan nmap des ports sur 192.168.1.1")
+    cold_start_s = time.perf_counter() - start
+
+    report = {"entry": name, **info, "import_s": import_s, "cold_start_s": cold_start_s, "datasets": {}}
+    all_queries, all_latencies = [], []
+
+    for path in datasets:
+        queries, labels = load_dataset(path)
+        per_class = {label: {"total": 0, "correct": 0} for label in LABELS}
+        other = {}
+        correct = 0
+
+        for query, label in zip(queries, labels):
+            t = time.perf_counter()
+            predicted = single(query)
+            all_latencies.append(time.perf_counter() - t)
+
+            if label in per_class:
+                per_class[label]["total"] += 1
+                per_class[label]["correct"] += predicted == label
+            if predicted == label:
+                correct += 1
+            elif predicted not in LABELS:
+                other[predicted] = other.get(predicted, 0) + 1
+
+        report["datasets"][os.path.basename(path)] = {
+            "n": len(queries),
+            "accuracy": correct / len(queries) if queries else 0.0,
+            "per_class": {
+                label: (c["correct"] / c["total"] if c["total"] else None) for label, c in per_class.items()
+            },
+            "support": {label: c["total"] for label, c in per_class.items()},
+            "other_outputs": other,
+        }
+        all_queries.extend(queries)
+
+    report["latency_ms"] = {
+        f"p{q}": percentile(all_latencies, q) * 1000 for q in (50, 95, 99)
+    }
+
+    # Débit en lot sur au moins min_batch_items requêtes
+    items = (all_queries * (min_batch_items // len(all_queries) + 1))[:max(min_batch_items, len(all_queries))]
+    t = time.perf_counter()
+    for i in range(0, len(items), batch_size):
+        batch(items[i:i + batch_size])
+    elapsed = time.perf_counter() - t
+    report["batch"] = {"size": batch_size, "items": len(items), "queries_per_s": len(items) / elapsed}
+
+    if "extract_features" in sys.modules:
+        report["feature_cache"] = sys.modules["extract_features"].FEATURE_CACHE.stats()
+
+    # ru_maxrss est en kilo-octets sous Linux
+    report["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return report
+
+
+# ================= ORCHESTRATION =================
+def run_isolated(name: str, args) -> dict:
+    env = dict(os.environ, KG_OFFLINE="1", PYTHONWARNINGS="ignore",
+               CLASSIFIER_ENGINE="ngram" if name.endswith("_ngram") else "forest")
+    if not args.cache:
+        env["FEATURE_CACHE_SIZE"] = "0"
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", name,
+           "--batch-size", str(args.batch_size), "--min-batch-items", str(args.min_batch_items),
+           "--data", *args.data]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT, env=env)
+    # Le rapport est la dernière ligne de la sortie standard
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"entry": name, "error": (proc.stderr or proc.stdout).strip().splitlines()[-1:]}
+    return json.loads(lines[-1])
+
+
+def print_report(reports: list, datasets: list):
+    names = [os.path.basename(p) for p in datasets]
+    print("=" * 100)
+    print("BENCHMARK DES CLASSIFIEURS".center(100))
+    print("=" * 100)
+    print(f"{'point d entrée':<15}{'froid s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'lot req/s':>11}{'RSS Mo':>9}")
+    print("-" * 100)
+    for r in reports:
+        if "error" in r:
+            print(f"{r['entry']:<15} ERREUR : {r['error']}")
+            continue
+        lat = r["latency_ms"]
+        print(f"{r['entry']:<15}{r['cold_start_s']:>9.2f}{lat['p50']:>9.2f}{lat['p95']:>9.2f}{lat['p99']:>9.2f}"
+              f"{r['batch']['queries_per_s']:>11.1f}{r['peak_rss_mb']:>9.0f}")
+
+    for name in names:
+        print(f"\n{name} - précision (globale | EASY / MEDIUM / HARD)")
+        for r in reports:
+            if "error" in r:
+                continue
+            d = r["datasets"][name]
+            per_class = " / ".join("-" if d["per_class"][l] is None else f"{d['per_class'][l]:.2f}" for l in LABELS)
+            extra = f"  autres sorties : {d['other_outputs']}" if d["other_outputs"] else ""
+            print(f"  {r['entry']:<15}{d['accuracy']:>6.2f} | {per_class}{extra}")
+
+    for r in reports:
+        if r.get("mode") or r.get("trained_on"):
+            print(f"\nNote {r['entry']} : " + ", ".join(
+                f"{k}={r[k]}" for k in ("mode", "trained_on") if r.get(k)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des quatre classifieurs")
+    parser.add_argument("--entry", nargs="+", choices=ENTRY_POINTS + NGRAM_ENTRY_POINTS, default=ENTRY_POINTS)
+    parser.add_argument("--data", nargs="+", default=sorted(glob.glob("data/*.csv")))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--min-batch-items", type=int, default=256)
+    parser.add_argument("--cache", action="store_true", help="garde le cache de features")
+    parser.add_argument("--output", default=None, help="fichier JSON (défaut : benchmarks/results/<date>.json)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Sortie des modules (chargements, avertissements) séparée du rapport JSON
+        report = run_worker(args.worker, args.data, args.batch_size, args.min_batch_items)
+        print(json.dumps(report, default=float))
+        return
+
+    reports = []
+    for name in args.entry:
+        print(f"→ {name}...", flush=True)
+        reports.append(run_isolated(name, args))
+    print()
+    print_report(reports, args.data)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("classifiers-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "datasets": args.data,
+            "feature_cache": args.cache,
+            "kg": "offline",
+            "results": reports,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats : {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark de démarrage à froid du classifieur.
+
+Chaque mesure tourne dans un interpréteur Python neuf :
+- temps d'import du module (router / classifier / extract_features / enrich_with_kg)
+- latence de la première prédiction (chargement paresseux inclus)
+- latence d'une prédiction à chaud, après la première
+
+Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_cold_start.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+QUERY = "Scan furtif avec decoys et fragmentation sur 10.0.0.1"
+
+# module → appel de la première prédiction
+ENTRY_POINTS = {
+    "router": "router.predict_complexity(QUERY)",
+    "classifier": "classifier.get_complexity(QUERY)",
+    "extract_features": "extract_features.extract_features(QUERY)",
+    "enrich_with_kg": None,  # import seul : ne doit plus ouvrir de connexion Neo4j
+}
+
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {src!r})
+QUERY = {query!r}
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+first = warm = None
+if {call!r}:
+    eval({call!r})
+    t2 = time.perf_counter()
+    eval({call!r})
+    t3 = time.perf_counter()
+    first, warm = t2 - t1, t3 - t2
+print("__BENCH__" + json.dumps({{"import": t1 - t0, "first": first, "warm": warm}}))
+"""
+
+
+def run_once(module: str, call):
+    code = CHILD.format(src=SRC, query=QUERY, module=module, call=call)
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):])
+    raise RuntimeError(f"{module} : échec\n{proc.stderr[-2000:]}")
+
+
+def fmt(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return "-"
+    return f"{statistics.median(values) * 1000:9.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de démarrage à froid")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK DÉMARRAGE À FROID - CLASSIFIEUR".center(70))
+    print("=" * 70)
+    print(f"{'module':<18}{'import':>14}{'1re prédiction':>18}{'à chaud':>14}")
+    print("-" * 70)
+
+    for module, call in ENTRY_POINTS.items():
+        try:
+            results = [run_once(module, call) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module:<18} ❌ {e}")
+            continue
+        print(f"{module:<18}"
+              f"{fmt([r['import'] for r in results]):>14}"
+              f"{fmt([r['first'] for r in results]):>18}"
+              f"{fmt([r['warm'] for r in results]):>14}")
+
+    print("-" * 70)
+    print(f"Médiane sur {args.runs} exécution(s), un interpréteur neuf par exécution.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Extraction des features de HybridNmapClassifier : ligne par ligne vs par colonnes.
+
+Commandes synthétiques tirées de nmap_dataset_hybrid.csv, avec une cible et
+une liste de ports aléatoires (plages comprises, jusqu'à 1-65535) : presque
+toutes les commandes sont distinctes, le dédoublonnage n'aide pas.
+
+1. `pd.DataFrame([extract_features(c) for c in commandes])` vs
+   `extract_features_frame(commandes)` (résultat vérifié identique).
+2. `batch_predict` ligne par ligne (`predict`) vs par colonnes.
+
+Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_hybrid_features.py [--rows 1000000] [--scalar-rows 100000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+from hybrid_classifier import HybridNmapClassifier, NmapFeatureExtractor
+
+DATA_PATH = "data/nmap_dataset_hybrid.csv"
+
+
+def synthetic_commands(n: int, seed: int = 42) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(DATA_PATH)["command"].str.replace(r"-p\s+[\d,\-\*]+", "", regex=True)
+    base = base.str.rsplit(" ", n=1).str[0].to_numpy()
+
+    starts = rng.integers(1, 60000, size=(n, 3))
+    widths = rng.choice([0, 0, 10, 1000, 65535], size=(n, 3))
+    ports = [",".join(f"{s}-{min(s + w, 65535)}" if w else str(s) for s, w in zip(row_s, row_w))
+             for row_s, row_w in zip(starts, widths)]
+    targets = [f"10.{a}.{b}.{c}" for a, b, c in rng.integers(0, 256, size=(n, 3))]
+    return pd.Series([f"{cmd} -p {p} {t}" for cmd, p, t in zip(base[rng.integers(0, len(base), n)], ports, targets)])
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Features hybrides : lignes vs colonnes")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=100_000,
+                        help="lignes mesurées pour la version ligne par ligne (extrapolée à --rows)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    commands = synthetic_commands(args.rows)
+    sample = commands[:args.scalar_rows]
+    print(f"{len(commands)} commandes, {commands.nunique()} distinctes")
+
+    print("=" * 70)
+    print("EXTRACTION DES FEATURES".center(70))
+    print("=" * 70)
+    ref, scalar_s = timed(lambda c: pd.DataFrame([NmapFeatureExtractor.extract_features(x) for x in c]), sample)
+    vec, _ = timed(NmapFeatureExtractor.extract_features_frame, sample)
+    pd.testing.assert_frame_equal(ref, vec)
+    _, vector_s = timed(NmapFeatureExtractor.extract_features_frame, commands)
+
+    scalar_rate = len(sample) / scalar_s
+    vector_rate = len(commands) / vector_s
+    print(f"{'':<16}{'lignes/s':>14}{f'temps pour {len(commands)}':>24}")
+    print(f"{'ligne à ligne':<16}{scalar_rate:>14,.0f}{len(commands) / scalar_rate:>22.2f} s  (extrapolé)")
+    print(f"{'par colonnes':<16}{vector_rate:>14,.0f}{vector_s:>22.2f} s")
+    print(f"Accélération : x{vector_rate / scalar_rate:.1f}")
+
+    print("\n" + "=" * 70)
+    print("PRÉDICTION PAR LOT".center(70))
+    print("=" * 70)
+    classifier = HybridNmapClassifier()
+    classifier.train(DATA_PATH)
+    small = sample[:min(len(sample), 20_000)].tolist()
+    ref, scalar_s = timed(lambda c: pd.DataFrame([classifier.predict(x) for x in c]), small)
+    vec, _ = timed(classifier.batch_predict, small)
+    pd.testing.assert_frame_equal(ref, vec, check_dtype=False)
+    _, vector_s = timed(lambda c: classifier.batch_predict(c, include_features=False), commands)
+    print(f"predict() par ligne        : {len(small) / scalar_s:>12,.0f} commandes/s")
+    print(f"batch_predict (sans dicts) : {len(commands) / vector_s:>12,.0f} commandes/s")
+
+
+if __name__ == "__main__":
+    main()
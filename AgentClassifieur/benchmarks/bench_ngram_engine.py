@@ -0,0 +1,115 @@
+"""
+Moteur n-grammes hachés vs Random Forest (spaCy + KG), côte à côte.
+
+1. Dans ce processus, sur la partie test de data_personn3.csv et les autres
+   CSV : précision, latence d'une requête (extraction comprise, puis modèle
+   seul) et mémoire du modèle (taille sur disque, tableaux en mémoire).
+2. Dans des processus neufs (bench_classifiers.py) : router avec chacun des
+   moteurs, pour le démarrage à froid, le pic de RSS et le débit en lot.
+
+Neo4j hors ligne, cache de features désactivé.
+
+Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_ngram_engine.py [--skip-process]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+
+os.environ.setdefault("KG_OFFLINE", "1")
+os.environ.setdefault("FEATURE_CACHE_SIZE", "0")
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.chdir(ROOT)
+
+from extract_features import get_features, get_features_batch, get_nlp
+from fast_forest import ARRAYS, FOREST_PATH, MODEL_PATH, load_classifier
+from ngram_engine import NGRAM_MODEL_PATH, NgramEngine
+import bench_classifiers
+
+warnings.filterwarnings("ignore")
+
+DATA_PATH = "data/data_personn3.csv"
+LABEL_INDEX = {"EASY": 0, "MEDIUM": 1, "HARD": 2}
+
+
+def evaluation_sets():
+    queries, labels = bench_classifiers.load_dataset(DATA_PATH)
+    _, test_q, _, test_y = train_test_split(queries, labels, test_size=0.2, random_state=42, stratify=labels)
+    sets = {"data_personn3 (test)": (test_q, test_y)}
+    for path in sorted(glob.glob("data/*.csv")):
+        if os.path.basename(path) != os.path.basename(DATA_PATH):
+            sets[os.path.basename(path)] = bench_classifiers.load_dataset(path)
+    return sets
+
+
+def latencies_ms(fn, items) -> dict:
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {f"p{q}": float(np.percentile(timings, q)) for q in (50, 99)}
+
+
+def disk_size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N-grammes hachés vs Random Forest")
+    parser.add_argument("--skip-process", action="store_true", help="sans la comparaison en processus neufs")
+    args = parser.parse_args()
+
+    forest = load_classifier(MODEL_PATH)
+    engine = NgramEngine.load(NGRAM_MODEL_PATH)
+    get_nlp()
+
+    print("=" * 86)
+    print("N-GRAMMES HACHÉS vs RANDOM FOREST".center(86))
+    print("=" * 86)
+
+    forest_bytes = sum(getattr(forest, name).nbytes for name in ARRAYS)
+    forest_disk = disk_size(FOREST_PATH) if os.path.exists(FOREST_PATH) else disk_size(MODEL_PATH)
+    print(f"Mémoire du modèle : forêt {forest_bytes / 1e6:.2f} Mo en tableaux ({forest_disk / 1e6:.2f} Mo sur disque)"
+          f" | n-grammes {engine.weights.nbytes / 1e6:.2f} Mo ({disk_size(NGRAM_MODEL_PATH) / 1e6:.3f} Mo sur disque)")
+    print("(la forêt a aussi besoin de spaCy fr_core_news_sm en mémoire, cf. RSS plus bas)")
+
+    for name, (queries, labels) in evaluation_sets().items():
+        y = np.array([LABEL_INDEX.get(label, -1) for label in labels])
+        features = np.asarray(get_features_batch(queries))
+
+        forest_acc = float((forest.predict(features) == y).mean())
+        ngram_acc = float((engine.predict(queries) == y).mean())
+
+        forest_full = latencies_ms(lambda q: forest.predict_proba([get_features(q)]), queries)
+        ngram_full = latencies_ms(lambda q: engine.predict_proba([q]), queries)
+        forest_model = latencies_ms(lambda row: forest.predict_proba(row.reshape(1, -1)), features)
+
+        print(f"\n{name} ({len(queries)} requêtes)")
+        print(f"{'moteur':<12}{'précision':>11}{'p50 ms':>10}{'p99 ms':>10}   (extraction comprise)")
+        print(f"{'forêt':<12}{forest_acc:>11.3f}{forest_full['p50']:>10.3f}{forest_full['p99']:>10.3f}"
+              f"   modèle seul p50 {forest_model['p50']:.3f} ms")
+        print(f"{'n-grammes':<12}{ngram_acc:>11.3f}{ngram_full['p50']:>10.3f}{ngram_full['p99']:>10.3f}")
+
+    if not args.skip_process:
+        print("\nProcessus neufs (bench_classifiers.py) :")
+        options = argparse.Namespace(data=sorted(glob.glob("data/*.csv")), batch_size=64,
+                                     min_batch_items=256, cache=False)
+        reports = [bench_classifiers.run_isolated(name, options) for name in ("router", "router_ngram")]
+        bench_classifiers.print_report(reports, options.data)
+
+
+if __name__ == "__main__":
+    main()
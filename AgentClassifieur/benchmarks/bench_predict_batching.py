@@ -0,0 +1,97 @@
+"""
+Benchmark du micro-batching de /predict.
+
+1. Débit de `predict_complexity_batch` selon la taille de lot.
+2. Latence / débit du MicroBatcher avec N appelants concurrents,
+   comparé à un appel `predict_complexity` par requête.
+
+Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_predict_batching.py [--requests 256]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import statistics
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+from router import predict_complexity, predict_complexity_batch, warmup
+from batching import MicroBatcher
+
+DATA_PATH = "data/data_personn3.csv"
+
+
+def load_queries(n: int) -> list:
+    queries = pd.read_csv(DATA_PATH)["query"].tolist()
+    return (queries * (n // len(queries) + 1))[:n]
+
+
+def bench_batch_sizes(queries: list):
+    print(f"{'taille lot':>10}{'req/s':>12}{'ms/lot':>12}")
+    for size in [1, 4, 16, 32, 64]:
+        batches = [queries[i:i + size] for i in range(0, len(queries), size)]
+        start = time.perf_counter()
+        for batch in batches:
+            predict_complexity_batch(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>10}{len(queries) / elapsed:>12.1f}{elapsed / len(batches) * 1000:>12.2f}")
+
+
+async def bench_concurrent(queries: list, max_batch: int, max_wait_ms: float):
+    batcher = MicroBatcher(predict_complexity_batch, max_batch, max_wait_ms)
+    latencies = []
+
+    async def one(q):
+        t = time.perf_counter()
+        await batcher.submit(q)
+        latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    elapsed = time.perf_counter() - start
+    await batcher.stop()
+    return elapsed, latencies, batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batching /predict")
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    warmup()
+    queries = load_queries(args.requests)
+
+    print("=" * 60)
+    print("1. DÉBIT SELON LA TAILLE DE LOT".center(60))
+    print("=" * 60)
+    bench_batch_sizes(queries)
+
+    print("\n" + "=" * 60)
+    print("2. APPELANTS CONCURRENTS".center(60))
+    print("=" * 60)
+
+    start = time.perf_counter()
+    for q in queries:
+        predict_complexity(q)
+    sequential = time.perf_counter() - start
+    print(f"Sans batching : {len(queries) / sequential:.1f} req/s")
+
+    for max_batch in [1, 8, 32, 64]:
+        elapsed, latencies, stats = asyncio.run(bench_concurrent(queries, max_batch, args.max_wait_ms))
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"max_batch={max_batch:<3} {len(queries) / elapsed:8.1f} req/s | "
+              f"p50 {p50:7.1f} ms | p99 {p99:7.1f} ms | lot moyen {stats['avg_batch_size']}")
+
+
+if __name__ == "__main__":
+    main()
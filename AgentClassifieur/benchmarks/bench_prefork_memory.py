@@ -0,0 +1,128 @@
+"""
+Mémoire par worker : copie complète du pickle vs forêt mmap chargée avant fork.
+
+Pour chaque scénario, N workers sont forkés ; chacun fait des prédictions
+(toutes les pages du modèle sont touchées) puis on lit /proc/<pid>/smaps_rollup :
+- Private : mémoire propre au worker (ce que chaque worker supplémentaire coûte)
+- Pss     : part proportionnelle, pages partagées divisées entre processus
+
+Scénarios :
+- pickle : chaque worker fait joblib.load(complexity_classifier.pkl) (comportement d'avant)
+- mmap   : le parent charge la forêt compilée (mmap lecture seule) puis forke
+Avec --spacy, fr_core_news_sm est chargé dans chaque worker (pickle) ou dans le parent (mmap).
+
+Linux uniquement. Usage (depuis AgentClassifieur/) :
+    python benchmarks/bench_prefork_memory.py [--workers 4] [--spacy]
+"""
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+from fast_forest import CompiledForest, FOREST_PATH, MODEL_PATH, export_forest
+
+warnings.filterwarnings("ignore")
+
+
+def smaps(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "private": (values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024,
+        "pss": values.get("Pss", 0) / 1024,
+    }
+
+
+def load_spacy():
+    import spacy
+    return spacy.load("fr_core_news_sm")
+
+
+def run_scenario(n_workers: int, load_in_parent, load_in_child, use_spacy: bool):
+    X = np.random.RandomState(0).randint(0, 10, size=(256, 30)).astype(float)
+    model = load_in_parent()
+    nlp = load_spacy() if use_spacy and load_in_child is None else None
+    gc.collect()
+    gc.freeze()
+
+    pids, pipes = [], []
+    for _ in range(n_workers):
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            if load_in_child is not None:
+                model = load_in_child()
+                nlp = load_spacy() if use_spacy else None
+            model.predict_proba(X)
+            if nlp is not None:
+                nlp("scan furtif sur 10.0.0.1")
+            os.write(w, b"1")
+            os.close(w)
+            while True:
+                signal.pause()
+        os.close(w)
+        pids.append(pid)
+        pipes.append(r)
+
+    for r in pipes:
+        os.read(r, 1)
+        os.close(r)
+
+    stats = [smaps(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    gc.unfreeze()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire par worker prefork")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--spacy", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("smaps_rollup indisponible (Linux uniquement)")
+
+    forest_path = FOREST_PATH
+    if not os.path.exists(os.path.join(forest_path, "meta.json")):
+        forest_path = os.path.join(tempfile.mkdtemp(), "forest")
+        export_forest(MODEL_PATH, forest_path)
+
+    import joblib
+
+    scenarios = {
+        "pickle (copie par worker)": (lambda: None, lambda: joblib.load(MODEL_PATH)),
+        "mmap (chargé avant fork)": (lambda: CompiledForest.load(forest_path), None),
+    }
+
+    print("=" * 70)
+    print(f"MÉMOIRE PAR WORKER - {args.workers} workers{' + spaCy' if args.spacy else ''}".center(70))
+    print("=" * 70)
+    print(f"{'scénario':<30}{'Private/worker':>18}{'Pss/worker':>16}")
+    print("-" * 70)
+    for name, (in_parent, in_child) in scenarios.items():
+        stats = run_scenario(args.workers, in_parent, in_child, args.spacy)
+        private = sum(s["private"] for s in stats) / len(stats)
+        pss = sum(s["pss"] for s in stats) / len(stats)
+        print(f"{name:<30}{private:>15.1f} Mo{pss:>13.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,49 @@
-from fastapi import FastAPI, HTTPException
+import os
+import json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from router import predict_complexity
+from router import (CASCADE_ENABLED, FUSED_STAGE, get_cascade, get_classifier, get_swapper,
+                    predict_complexity_batch, reload_model, served_forest_path, set_classifier, warmup)
+from extract_features import FEATURE_CACHE, FEATURE_EXTRACTOR_VERSION, get_features
+from feedback_store import FeedbackStore, label_to_class
+from online_trainer import OnlineTrainer
+from batching import MicroBatcher
+from bulk_io import BulkFormatError, chunked, iter_file, iter_json_array, iter_ndjson, spool
 import uvicorn
 import traceback
 
-app = FastAPI(title="NMAP-AI Complexity Router", version="1.0")
+# Micro-batching de /predict : un lot part après PREDICT_MAX_WAIT_MS ou PREDICT_MAX_BATCH requêtes
+PREDICT_MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "32"))
+PREDICT_MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "5"))
+
+# /predict_batch : taille des lots traités avant d'envoyer les résultats
+PREDICT_BATCH_CHUNK = int(os.getenv("PREDICT_BATCH_CHUNK", "256"))
+
+batcher = MicroBatcher(predict_complexity_batch, PREDICT_MAX_BATCH, PREDICT_MAX_WAIT_MS)
+
+# Corrections des utilisateurs (journal en ajout seul) et mise à jour incrémentale
+feedback_store = FeedbackStore()
+# Mis à jour et réécrit : l'artefact effectivement servi, pas un chemin par défaut
+online_trainer = OnlineTrainer(feedback_store, served_forest_path())
+
+# Les corrections n'ont que EASY / MEDIUM / HARD : pas de feedback sur la forêt fusionnée
+FUSED_FEEDBACK_ERROR = "Feedback et mise à jour incrémentale indisponibles avec FUSED_STAGE=1 (forêt 4 classes)"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Modèle + spaCy chargés au démarrage du serveur, pas à la première requête
+    warmup()
+    # MODEL_WATCH_INTERVAL > 0 : nouvel artefact chargé et échangé sans redémarrage
+    get_swapper().start_watching()
+    await batcher.start()
+    yield
+    await batcher.stop()
+    get_swapper().stop_watching()
+
+app = FastAPI(title="NMAP-AI Complexity Router", version="1.0", lifespan=lifespan)
 
 class QueryRequest(BaseModel):
     query: str
@@ -15,29 +54,134 @@ class QueryResponse(BaseModel):
     all_probabilities: dict
     explanation: str = None
 
+class FeedbackRequest(BaseModel):
+    query: str
+    label: str  # label corrigé : EASY, MEDIUM ou HARD
+
 @app.get("/")
 def home():
     return {"message": "NMAP-AI Router prêt ! POST /predict avec {'query': 'votre phrase'}"}
 
 @app.post("/predict", response_model=QueryResponse)
-def predict(request: QueryRequest):
-    try:
-        if not request.query.strip():
-            raise HTTPException(status_code=400, detail="Requête vide")
-        
-        result = predict_complexity(request.query)
-        
-        if result["predicted_complexity"] in ["IRRELEVANT", "EMPTY"]:
-            raise HTTPException(status_code=400, detail=result.get("explanation", "Requête invalide"))
-        
-        return result
+async def predict(request: QueryRequest):
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Requête vide")
     
+    try:
+        result = await batcher.submit(request.query)
     except Exception as e:
         # On capture TOUTE erreur et on la renvoie clairement
         error_detail = str(e)
         traceback_str = traceback.format_exc()
         print("\nERREUR DANS L'API :\n", traceback_str)  # affiché dans le terminal serveur
         raise HTTPException(status_code=500, detail=f"Erreur interne : {error_detail}")
+    
+    if result["predicted_complexity"] in ["IRRELEVANT", "EMPTY"]:
+        raise HTTPException(status_code=400, detail=result.get("explanation", "Requête invalide"))
+    
+    return result
+
+@app.post("/predict_batch")
+async def predict_batch(request: Request):
+    """
+    Classification en masse. Corps : tableau JSON, ou NDJSON (Content-Type
+    application/x-ndjson) avec une requête par ligne. L'upload est mis en
+    tampon sur disque ; la réponse NDJSON part en flux, une ligne par
+    requête, envoyée à la fin de chaque lot.
+    """
+    upload = await spool(request.stream())
+    
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = iter_ndjson(iter_file(upload))
+    else:
+        items = iter_json_array(iter_file(upload))
+    
+    async def results():
+        index = 0
+        try:
+            async for batch in chunked(items, PREDICT_BATCH_CHUNK):
+                queries = [query for query, error in batch if error is None]
+                predictions = iter(await run_in_threadpool(predict_complexity_batch, queries))
+                
+                lines = []
+                for query, error in batch:
+                    if error is None:
+                        line = {"index": index, "query": query, **next(predictions)}
+                    else:
+                        line = {"index": index, "error": error}
+                    lines.append(json.dumps(line, ensure_ascii=False))
+                    index += 1
+                yield "\n".join(lines) + "\n"
+        except BulkFormatError as e:
+            yield json.dumps({"index": index, "error": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            upload.close()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/feedback")
+def feedback(request: FeedbackRequest):
+    """
+    Enregistre le bon label pour une requête. Le vecteur de features est
+    stocké avec la correction (en général déjà en cache après /predict).
+    """
+    if FUSED_STAGE:
+        raise HTTPException(status_code=409, detail=FUSED_FEEDBACK_ERROR)
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Requête vide")
+    try:
+        label_to_class(request.label)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    record = feedback_store.append(
+        request.query, request.label, get_features(request.query), FEATURE_EXTRACTOR_VERSION
+    )
+    return {"status": "enregistré", "label": record["label"]}
+
+def refresh_model() -> dict:
+    """Entraîne des arbres sur le feedback en attente et échange le modèle servi."""
+    updated, report = online_trainer.update(get_classifier())
+    if updated is not None:
+        set_classifier(updated)
+        get_swapper().sync()  # l'artefact sauvegardé est déjà servi : pas de rechargement
+    return report
+
+@app.post("/admin/refresh")
+async def refresh():
+    if FUSED_STAGE:
+        raise HTTPException(status_code=409, detail=FUSED_FEEDBACK_ERROR)
+    try:
+        return await run_in_threadpool(refresh_model)
+    except TypeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/admin/reload")
+async def reload(force: bool = False):
+    """
+    Charge le nouvel artefact du modèle en arrière-plan, vérifie son schéma,
+    le préchauffe puis l'échange. 409 si le nouveau modèle est refusé
+    (l'ancien reste servi).
+    """
+    report = await run_in_threadpool(reload_model, force)
+    if "error" in report:
+        raise HTTPException(status_code=409, detail=report)
+    return report
+
+@app.get("/stats")
+def stats():
+    model = get_classifier()
+    result = {
+        "batching": batcher.stats(),
+        "feature_cache": FEATURE_CACHE.stats(),
+        "model": {"trees": len(getattr(model, "roots", [])), **getattr(model, "info", {}),
+                  "version": get_swapper().version},
+        "hot_swap": get_swapper().stats(),
+    }
+    if CASCADE_ENABLED:
+        result["cascade"] = get_cascade().stats()
+    return result
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Micro-batching asynchrone pour l'API de classification.
+
+Les requêtes concurrentes sont regroupées pendant au plus `max_wait_ms`
+millisecondes ou jusqu'à `max_batch_size` éléments, traitées en un seul
+appel (un `nlp.pipe` + un `predict_proba`), puis chaque appelant reçoit son
+propre résultat.
+"""
+
+import asyncio
+import time
+
+
+class MicroBatcher:
+    """
+    `process_batch(items) -> results` est une fonction synchrone qui retourne
+    un résultat par élément, dans le même ordre. Elle tourne dans un thread
+    pour ne pas bloquer la boucle asyncio.
+    """
+
+    def __init__(self, process_batch, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = None
+        self._worker = None
+        self._in_flight = []
+        self._stopped = False
+
+        # Métriques
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+
+    async def start(self):
+        self._stopped = False
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Arrête le worker. Le lot en cours et les éléments encore en file
+        échouent avec RuntimeError : aucun appelant ne reste bloqué.
+        """
+        self._stopped = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        error = RuntimeError("MicroBatcher arrêté")
+        pending = [future for _, future in self._in_flight]
+        self._in_flight = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait()[1])
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    async def submit(self, item):
+        """Ajoute un élément au prochain lot et attend son résultat."""
+        if self._stopped:
+            raise RuntimeError("MicroBatcher arrêté")
+        if self._worker is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        # Bloque jusqu'au premier élément, puis attend au plus max_wait.
+        # Chaque élément retiré de la file est aussitôt dans _in_flight :
+        # stop() pendant l'attente le fait échouer au lieu de le perdre.
+        batch = self._in_flight = []
+        batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Tout ce qui est déjà en file part dans le même lot
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.process_batch, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                self._in_flight = []
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self._in_flight = []
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_seen_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
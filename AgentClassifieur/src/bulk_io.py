@@ -0,0 +1,166 @@
+"""
+Lecture incrémentale des uploads de /predict_batch.
+
+Le corps de la requête est recopié par morceaux dans un fichier temporaire
+(en mémoire jusqu'à 1 Mo, puis sur disque) ; on en extrait ensuite les
+requêtes une par une, sans jamais charger tout l'upload, puis on les
+regroupe en lots de taille fixe.
+
+Formats acceptés :
+- tableau JSON : ["requête 1", {"query": "requête 2"}, ...]
+- NDJSON : une requête par ligne, chaîne JSON ou objet {"query": ...}
+"""
+
+import codecs
+import json
+import tempfile
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+SPOOL_MAX_SIZE = 1024 * 1024
+READ_SIZE = 64 * 1024
+
+
+class BulkFormatError(ValueError):
+    """Upload mal formé (tableau JSON invalide)."""
+
+
+def query_from_item(item) -> str:
+    """Requête contenue dans un élément, ou ValueError."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict) and isinstance(item.get("query"), str):
+        return item["query"]
+    raise ValueError("élément attendu : chaîne ou objet {\"query\": ...}")
+
+
+async def spool(chunks):
+    """
+    Recopie un flux d'octets dans un fichier temporaire, rembobiné.
+    Le corps doit être lu avant de commencer la réponse en flux : Starlette
+    écoute aussi `receive()` pour détecter la déconnexion du client.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    async for chunk in chunks:
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
+
+
+async def iter_file(f, size: int = READ_SIZE):
+    """Lit un fichier binaire par morceaux de `size` octets."""
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _decoded(chunks):
+    """Décode les octets en texte UTF-8 sans couper un caractère multi-octets."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_ndjson(chunks):
+    """
+    Produit (requête, erreur) par ligne non vide. Une ligne invalide donne
+    (None, message) et la lecture continue.
+    """
+    buffer = ""
+
+    def parse(line):
+        try:
+            return query_from_item(json.loads(line)), None
+        except ValueError as e:
+            return None, str(e)
+
+    async for text in _decoded(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield parse(line)
+    if buffer.strip():
+        yield parse(buffer)
+
+
+async def iter_json_array(chunks):
+    """
+    Produit (requête, erreur) par élément d'un tableau JSON, en décodant les
+    éléments au fur et à mesure. Lève BulkFormatError si le tableau est invalide.
+    """
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+    expect_value = True
+    after_comma = False
+
+    async for text in _decoded(chunks):
+        buffer = buffer[pos:] + text
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            char = buffer[pos]
+
+            if finished:
+                raise BulkFormatError(f"texte inattendu après le tableau à la position {pos}")
+            if not started:
+                if char != "[":
+                    raise BulkFormatError("tableau JSON attendu")
+                started = True
+                pos += 1
+            elif char == "]":
+                if after_comma:
+                    raise BulkFormatError(f"virgule finale avant ']' à la position {pos}")
+                finished = True
+                pos += 1
+            elif char == ",":
+                if expect_value:
+                    raise BulkFormatError(f"virgule inattendue à la position {pos}")
+                expect_value = True
+                after_comma = True
+                pos += 1
+            else:
+                if not expect_value:
+                    raise BulkFormatError(f"virgule attendue à la position {pos}")
+                try:
+                    item, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # élément incomplet : attendre la suite
+                # Un nombre peut être coupé entre deux morceaux
+                if end == len(buffer) and not isinstance(item, (str, dict, list)):
+                    break
+                pos = end
+                expect_value = False
+                after_comma = False
+                try:
+                    yield query_from_item(item), None
+                except ValueError as e:
+                    yield None, str(e)
+
+    if not finished:
+        raise BulkFormatError("tableau JSON incomplet")
+
+
+async def chunked(items, size: int):
+    """Regroupe un itérateur asynchrone en listes d'au plus `size` éléments."""
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
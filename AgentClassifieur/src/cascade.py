@@ -0,0 +1,180 @@
+"""
+Cascade de classification avec sortie anticipée.
+
+Étage 1 (`KeywordTier`) : expressions régulières compilées une fois, dans
+l'esprit de `fallback_classify` (classify_tool.py) et `post_rule_adjustment`
+(classifier.py). La première règle qui correspond donne un label ; sa
+confiance est la précision de la règle mesurée sur un jeu étiqueté
+(lissage de Laplace : (justes + 1) / (total + 2)), pas un score arbitraire.
+
+Étage 2 : modèle complet (extract_features + Random Forest), appelé
+seulement si aucune règle ne correspond ou si sa confiance calibrée est
+sous le seuil.
+
+Calibration (depuis AgentClassifieur/) :
+    python src/cascade.py      # écrit models/cascade_rules.json
+"""
+
+import json
+import os
+import re
+import threading
+
+# ================= CONFIGURATION =================
+CASCADE_RULES_PATH = "models/cascade_rules.json"
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.9"))
+LABELS = ["EASY", "MEDIUM", "HARD"]
+
+# (nom, label, motif) : l'ordre compte, la première règle qui correspond gagne.
+# Insensible à la casse sauf les options Nmap entre (?-i:...) : -sN ≠ -sn, -f ≠ -F
+RULES = [
+    ("hard_evasion", "HARD",
+     r"\b(fragment\w*|decoys?|spoof\w*|idle|zombie|badsum|mtu|proxy|proxies|bounce|paranoid|parano\w*"
+     r"|sneaky|furtif|furtive|stealth\w*|silent|covert|low-profile|mask\w*|hide|hidden|slow\w*|discr[eè]t\w*"
+     r"|evasion|évasion|évite|evad\w*|ids|firewall|pare-feu)\b"
+     r"|(^|\s)(?-i:-f)(\s|$)|(^|\s)(?-i:-D)\s|-T[01]\b|--spoof-mac|--data-length"),
+    ("hard_scan_type", "HARD", r"(^|\s)(?-i:-s[FNXIMW])\b|\b(null|fin|xmas|maimon)\s+scan"),
+    ("medium_scripts", "MEDIUM", r"--script|\bscripts?\b|\bvuln\w*|\bnse\b|(^|\s)-sC\b"),
+    ("medium_detection", "MEDIUM",
+     r"(^|\s)(?-i:-s[VU]|-[OA])\b|\bversions?\b|\bservices?\b|\bos\b|détection|detection|\budp\b|aggressive|agressif"),
+    ("easy_ping", "EASY", r"(^|\s)(?-i:-sn|-Pn)\b|\bping\b|host discovery|découverte|\blist scan\b|(^|\s)(?-i:-sL)\b"),
+    ("easy_simple", "EASY", r"\b(simple|basique|basic|rapide|quick|default|défaut)\b"),
+]
+
+
+class KeywordTier:
+    """Règles compilées + confiance calibrée par règle."""
+
+    def __init__(self, rules=RULES, calibration: dict = None):
+        self.rules = [(name, label, re.compile(pattern, re.IGNORECASE)) for name, label, pattern in rules]
+        # {règle: {"total": n, "correct": k}} ; sans calibration, confiance nulle
+        self.calibration = calibration or {}
+
+    def match(self, query: str):
+        """(nom de la règle, label) de la première règle qui correspond, ou (None, None)."""
+        for name, label, pattern in self.rules:
+            if pattern.search(query):
+                return name, label
+        return None, None
+
+    def confidence(self, rule: str) -> float:
+        stats = self.calibration.get(rule)
+        if not stats:
+            return 0.0
+        return (stats["correct"] + 1) / (stats["total"] + 2)
+
+    def classify(self, query: str):
+        """(label, confiance, règle) ; label None si aucune règle."""
+        rule, label = self.match(query)
+        if rule is None:
+            return None, 0.0, None
+        return label, self.confidence(rule), rule
+
+    # ================= CALIBRATION =================
+    def calibrate(self, queries, labels) -> dict:
+        """Précision empirique de chaque règle sur des requêtes étiquetées."""
+        calibration = {name: {"total": 0, "correct": 0} for name, _, _ in self.rules}
+        for query, expected in zip(queries, labels):
+            rule, label = self.match(query)
+            if rule is not None:
+                calibration[rule]["total"] += 1
+                calibration[rule]["correct"] += label == str(expected).strip().upper()
+        self.calibration = calibration
+        return calibration
+
+    def save(self, path: str = CASCADE_RULES_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "rules": [[name, label, pattern.pattern] for name, label, pattern in self.rules],
+                "calibration": self.calibration,
+            }, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str = CASCADE_RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([tuple(rule) for rule in data["rules"]], data.get("calibration"))
+
+
+def rule_result(query: str, label: str, confidence: float, rule: str) -> dict:
+    return {"label": label, "confidence": confidence, "tier": "keywords", "rule": rule}
+
+
+class CascadeClassifier:
+    """
+    `full_predict(queries) -> [résultat, ...]` est l'étage 2, appelé en lot
+    pour les seules requêtes non résolues par l'étage 1. `early_result`
+    construit le résultat d'une sortie à l'étage 1 (même forme que ceux de
+    `full_predict`). Compte les sorties par étage.
+    """
+
+    def __init__(self, tier: KeywordTier, full_predict, threshold: float = CASCADE_THRESHOLD,
+                 early_result=rule_result):
+        self.tier = tier
+        self.full_predict = full_predict
+        self.threshold = threshold
+        self.early_result = early_result
+        self._lock = threading.Lock()
+        self.exits = {"keywords": 0, "model": 0}
+
+    def early_exit(self, query: str):
+        """(label, confiance, règle) si l'étage 1 suffit, sinon None."""
+        label, confidence, rule = self.tier.classify(query)
+        if label is not None and confidence >= self.threshold:
+            return label, confidence, rule
+        return None
+
+    def predict_batch(self, queries: list) -> list:
+        results = [None] * len(queries)
+        pending = []
+        for i, query in enumerate(queries):
+            early = self.early_exit(query)
+            if early is None:
+                pending.append(i)
+            else:
+                results[i] = self.early_result(query, *early)
+
+        if pending:
+            for i, result in zip(pending, self.full_predict([queries[i] for i in pending])):
+                results[i] = result
+
+        with self._lock:
+            self.exits["keywords"] += len(queries) - len(pending)
+            self.exits["model"] += len(pending)
+        return results
+
+    def predict(self, query: str) -> dict:
+        return self.predict_batch([query])[0]
+
+    def stats(self) -> dict:
+        total = sum(self.exits.values())
+        return {
+            "threshold": self.threshold,
+            "exits": dict(self.exits),
+            "exit_rate": {tier: round(n / total, 4) if total else 0.0 for tier, n in self.exits.items()},
+        }
+
+
+# ================= CALIBRATION EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    DATA_PATH = "data/data_personn3.csv"
+    df = pd.read_csv(DATA_PATH)
+    labels = df["complexity"].str.strip().str.upper()
+    # Même découpage que train_classifier.py : on calibre sur la partie entraînement
+    train_queries, _, train_labels, _ = train_test_split(
+        df["query"], labels, test_size=0.2, random_state=42, stratify=labels
+    )
+
+    tier = KeywordTier()
+    calibration = tier.calibrate(train_queries, train_labels)
+    tier.save()
+    print(f"{'règle':<20}{'label':<8}{'requêtes':>10}{'confiance':>11}")
+    for name, label, _ in tier.rules:
+        print(f"{name:<20}{label:<8}{calibration[name]['total']:>10}{tier.confidence(name):>11.3f}")
+    print(f"\nCalibration sauvegardée : {CASCADE_RULES_PATH}")
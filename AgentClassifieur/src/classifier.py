@@ -1,12 +1,24 @@
-import joblib
 import re
-from extract_features import extract_features
+from extract_features import get_features, get_nlp
+from fast_forest import load_classifier
+from utils import LazyResource
+from vectorizer import SPACY_SCHEMA, check_feature_schema
 
 # ================================
-# Chargement du modèle ML
+# Chargement du modèle ML (au premier appel)
 # ================================
 MODEL_PATH = "models/complexity_classifier.pkl"
-model = joblib.load(MODEL_PATH)
+def _load_model():
+    # Vecteurs de extract_features.py : le modèle doit déclarer spacy/v1
+    # (le pickle suivi, antérieur aux schémas, a été entraîné sur ces vecteurs)
+    model = load_classifier(MODEL_PATH)
+    check_feature_schema(model, SPACY_SCHEMA, assume=SPACY_SCHEMA.id)
+    return model
+
+_model = LazyResource(_load_model, "classifieur")
+
+def get_model():
+    return _model.get()
 
 LABELS = ["EASY", "MEDIUM", "HARD"]
 
@@ -96,13 +108,19 @@ def get_complexity(query: str) -> str:
     """
     Retourne la complexité finale (EASY / MEDIUM / HARD)
     """
-    features = extract_features(query)
-    pred_idx = model.predict([features])[0]
+    features = get_features(query)
+    pred_idx = get_model().predict([features])[0]
     pred_label = LABELS[pred_idx]
 
     final_label = post_rule_adjustment(pred_label, query)
     return final_label
 
+def warmup():
+    """Charge le modèle et spaCy avant la première requête."""
+    get_model()
+    get_nlp()
+    get_complexity("scan nmap des ports sur 192.168.1.1")
+
 # ================================
 # Mode interactif (debug)
 # ================================
@@ -0,0 +1,274 @@
+"""
+Compression de la forêt servie : variantes plus petites et front de Pareto.
+
+À partir du modèle entraîné (pickle sklearn de train_classifier.py) :
+
+1. Ordre des arbres par contribution marginale : agrégation ordonnée
+   gloutonne, chaque étape ajoute l'arbre qui améliore le plus la précision
+   du sous-ensemble courant, mesurée sur les échantillons hors sac (chaque
+   arbre ne vote que sur les lignes qu'il n'a pas vues). Sans bootstrap (ou
+   pickle d'un sklearn plus ancien, sans les tirages), la partie
+   entraînement sert à la sélection.
+2. Variantes : les N premiers arbres de cet ordre × profondeur limitée
+   (`CompiledForest.truncate`, un noeud coupé garde la distribution de ses
+   échantillons) × précision des tableaux (`quantize` : float64, float32
+   exact, int16 à virgule fixe + valeurs float16).
+3. Chaque variante est évaluée sur la partie test (même découpage que
+   train_classifier.py) : précision, taille de l'export sur disque, temps de
+   chargement, latence p50 / p99 d'une prédiction. Le front de Pareto
+   précision / p99 / taille est marqué.
+4. Variante retenue : la plus rapide (p99, puis taille) dont la précision ne
+   perd pas plus de `--max-accuracy-drop` par rapport à la forêt complète.
+   `--write` la sauvegarde au format chargé par les services (dossier de
+   `.npy`, `FOREST_PATH` par défaut ; le remplacement à chaud la reprend).
+
+Usage (depuis AgentClassifieur/, KG_OFFLINE=1 pour l'index JSON) :
+    python src/compress_forest.py [--max-accuracy-drop 0.0] [--write]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from fast_forest import FOREST_PATH, MODEL_PATH, PRECISIONS, CompiledForest
+from feature_store import FEATURE_STORE_DIR, load_or_extract
+
+# ================= CONFIGURATION =================
+DATA_PATH = "data/data_personn3.csv"
+REPORT_PATH = "models/compression_report.json"
+
+TREE_COUNTS = [None, 100, 50, 25, 10]   # None = tous les arbres
+MAX_DEPTHS = [None, 12, 8, 6]           # None = profondeur d'origine
+
+
+# ================= 1. ORDRE DES ARBRES =================
+def tree_probas(forest: CompiledForest, X) -> np.ndarray:
+    """Probabilités de chaque arbre, forme (n_arbres, n_lignes, n_classes)."""
+    return forest.value[forest.apply(X)].astype(np.float64).transpose(1, 0, 2)
+
+
+def out_of_bag_mask(model, n_samples: int):
+    """(n_arbres, n_lignes) : True si la ligne est hors sac pour l'arbre ; None sans bootstrap."""
+    if not getattr(model, "bootstrap", False):
+        return None
+    try:
+        samples = model.estimators_samples_
+    except AttributeError:  # pickle d'une version antérieure de sklearn
+        return None
+    mask = np.ones((len(samples), n_samples), dtype=bool)
+    for t, rows in enumerate(samples):
+        mask[t, rows] = False
+    return mask
+
+
+def order_trees(probas: np.ndarray, y, classes, mask=None) -> list:
+    """
+    Agrégation ordonnée gloutonne : indices des arbres, du plus utile au
+    moins utile. Score d'un candidat = précision du sous-ensemble augmenté
+    (une ligne sans aucun vote compte comme une erreur), départagé par la
+    probabilité moyenne de la bonne classe.
+    """
+    n_trees, n_samples, _ = probas.shape
+    y = np.searchsorted(np.asarray(classes), np.asarray(y))  # étiquettes → colonnes de probas
+    mask = np.ones((n_trees, n_samples), dtype=bool) if mask is None else mask
+    weighted = probas * mask[:, :, None]
+    votes = np.zeros(probas.shape[1:])
+    counts = np.zeros(n_samples)
+    remaining = list(range(n_trees))
+    order = []
+
+    while remaining:
+        candidates = votes[None] + weighted[remaining]
+        seen = (counts[None] + mask[remaining]) > 0
+        correct = (np.argmax(candidates, axis=2) == y[None]) & seen
+        totals = np.maximum(counts[None] + mask[remaining], 1)
+        margin = candidates[:, np.arange(n_samples), y] / totals
+        score = correct.mean(axis=1) + 1e-3 * margin.mean(axis=1)
+
+        best = remaining[int(np.argmax(score))]
+        order.append(best)
+        votes += weighted[best]
+        counts += mask[best]
+        remaining.remove(best)
+    return order
+
+
+# ================= 2. VARIANTES =================
+def build_variant(forest: CompiledForest, order: list, n_trees, max_depth, precision: str, X_train):
+    variant = forest
+    if n_trees is not None:
+        variant = variant.select_trees(order[:n_trees])
+    if max_depth is not None and max_depth < variant.max_depth:
+        variant = variant.truncate(max_depth)
+    return variant.quantize(precision, X_train)
+
+
+def variant_name(n_trees, max_depth, precision: str) -> str:
+    return f"{n_trees or 'all'}t-d{max_depth or 'max'}-{precision}"
+
+
+# ================= 3. MESURES =================
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def measure_load(path: str, repeats: int = 5) -> float:
+    """Millisecondes pour relire l'export en mémoire (meilleur de `repeats`)."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        CompiledForest.load(path, mmap=False)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure_latency(forest: CompiledForest, X, repeats: int = 1000) -> dict:
+    """Latence d'une prédiction (une ligne), p50 et p99."""
+    rows = [X[i % len(X)].reshape(1, -1) for i in range(repeats)]
+    forest.predict_proba(rows[0])
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        forest.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return {
+        "latency_p50_ms": float(np.percentile(timings, 50) * 1000),
+        "latency_p99_ms": float(np.percentile(timings, 99) * 1000),
+    }
+
+
+def evaluate_variant(variant: CompiledForest, X_test, y_test, workdir: str, latency_repeats: int) -> dict:
+    path = os.path.join(workdir, "variant")
+    variant.save(path)
+    result = {
+        "trees": len(variant.roots),
+        "nodes": len(variant.feature),
+        "depth": variant.max_depth,
+        "test_accuracy": float((variant.predict(X_test) == y_test).mean()),
+        "size_bytes": directory_size(path),
+        "load_ms": measure_load(path),
+    }
+    result.update(measure_latency(variant, X_test, latency_repeats))
+    return result
+
+
+def mark_pareto(candidates: list):
+    """Front de Pareto : aucune autre variante n'est au moins aussi bonne partout et meilleure quelque part."""
+    def key(c):
+        return -c["test_accuracy"], c["latency_p99_ms"], c["size_bytes"]
+
+    for c in candidates:
+        c["pareto"] = not any(
+            all(a <= b for a, b in zip(key(o), key(c))) and key(o) != key(c) for o in candidates
+        )
+
+
+def choose(candidates: list, baseline_accuracy: float, max_drop: float) -> dict:
+    eligible = [c for c in candidates if c["test_accuracy"] >= baseline_accuracy - max_drop - 1e-12]
+    return min(eligible, key=lambda c: (c["latency_p99_ms"], c["size_bytes"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression de la forêt : variantes et front de Pareto")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    parser.add_argument("--model", default=MODEL_PATH, help="forêt sklearn entraînée (pickle)")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0,
+                        help="perte de précision test tolérée pour la variante retenue")
+    parser.add_argument("--latency-repeats", type=int, default=1000)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--write", action="store_true", help="sauvegarde la variante retenue")
+    parser.add_argument("--output", default=FOREST_PATH)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    X, y, meta = load_or_extract(args.data, args.store)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    start = time.perf_counter()
+    model = joblib.load(args.model)
+    pickle_load_ms = (time.perf_counter() - start) * 1000
+    forest = CompiledForest.from_sklearn(model)
+
+    mask = out_of_bag_mask(model, len(X_train))
+    order = order_trees(tree_probas(forest, X_train), y_train, forest.classes_, mask)
+    print(f"{len(order)} arbres ordonnés par contribution marginale "
+          f"({'hors sac' if mask is not None else 'partie entraînement'})")
+
+    combos = [(n, d, p) for n, d, p in itertools.product(TREE_COUNTS, MAX_DEPTHS, PRECISIONS)
+              if n is None or n < len(order)]
+    print(f"Évaluation de {len(combos)} variantes...")
+    candidates = []
+    workdir = tempfile.mkdtemp(prefix="compress-")
+    try:
+        for n_trees, max_depth, precision in combos:
+            variant = build_variant(forest, order, n_trees, max_depth, precision, X_train)
+            result = evaluate_variant(variant, X_test, y_test, workdir, args.latency_repeats)
+            result.update(name=variant_name(n_trees, max_depth, precision), n_trees=n_trees,
+                          max_depth=max_depth, precision=precision)
+            candidates.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = candidates[0]
+    mark_pareto(candidates)
+    chosen = choose(candidates, baseline["test_accuracy"], args.max_accuracy_drop)
+
+    # ================= RAPPORT =================
+    print("=" * 96)
+    print("VARIANTES COMPRESSÉES".center(96))
+    print("=" * 96)
+    print(f"{'':2}{'variante':<22}{'arbres':>7}{'noeuds':>8}{'test':>7}{'taille Ko':>11}"
+          f"{'charg. ms':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    print("-" * 96)
+    for c in sorted(candidates, key=lambda c: (-c["test_accuracy"], c["latency_p99_ms"])):
+        mark = ">" if c is chosen else ("*" if c["pareto"] else " ")
+        print(f"{mark:2}{c['name']:<22}{c['trees']:>7}{c['nodes']:>8}{c['test_accuracy']:>7.3f}"
+              f"{c['size_bytes'] / 1024:>11.1f}{c['load_ms']:>11.2f}{c['latency_p50_ms']:>9.3f}"
+              f"{c['latency_p99_ms']:>9.3f}")
+    print("\n* = front de Pareto précision / p99 / taille, > = variante retenue")
+    print(f"Chargement du pickle sklearn (référence) : {pickle_load_ms:.1f} ms")
+    print(f"Retenue : {chosen['name']} — précision {chosen['test_accuracy']:.3f} "
+          f"(complète : {baseline['test_accuracy']:.3f}), p99 x{baseline['latency_p99_ms'] / chosen['latency_p99_ms']:.1f}, "
+          f"taille /{baseline['size_bytes'] / chosen['size_bytes']:.1f}")
+
+    if args.write:
+        variant = build_variant(forest, order, chosen["n_trees"], chosen["max_depth"], chosen["precision"], X_train)
+        variant.info = dict(variant.info, compression={
+            "variant": chosen["name"],
+            "test_accuracy": round(chosen["test_accuracy"], 4),
+            "baseline_accuracy": round(baseline["test_accuracy"], 4),
+        })
+        variant.save(args.output)
+        print(f"Variante sauvegardée : {args.output}")
+
+    report = {
+        "features": meta,
+        "model": args.model,
+        "pickle_load_ms": pickle_load_ms,
+        "tree_order": order,
+        "out_of_bag": mask is not None,
+        "max_accuracy_drop": args.max_accuracy_drop,
+        "chosen": chosen["name"],
+        "candidates": candidates,
+    }
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
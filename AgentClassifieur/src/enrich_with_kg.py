@@ -1,122 +1,91 @@
-from neo4j import GraphDatabase
-import spacy
+import os
+from extract_features import get_nlp
+from kg_index import KGFeatureIndex, KG_INDEX_PATH, KG_REFRESH_INTERVAL
+from utils import LazyResource
 
-nlp = spacy.load("fr_core_news_sm")
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_AUTH = (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "nmap_ai_2024"))
 
-driver = GraphDatabase.driver(
-    "bolt://localhost:7687",
-    auth=("neo4j", "nmap_ai_2024")
-)
+# Neo4j configuré explicitement (variables d'environnement) : seul cas où
+# l'index JSON est rafraîchi en arrière-plan
+NEO4J_CONFIGURED = any(os.getenv(var) for var in ("NEO4J_URI", "NEO4J_USER", "NEO4J_PASSWORD"))
 
-def enrich_features_with_kg(query: str) -> list:
+# KG_OFFLINE=1 : jamais de connexion Neo4j (index JSON s'il existe, sinon vide)
+KG_OFFLINE = os.getenv("KG_OFFLINE", "0") == "1"
+
+KG_TERM_POS = ["NOUN", "VERB", "ADJ", "PROPN", "NUM"]
+
+def _connect():
+    from neo4j import GraphDatabase
+    return GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH)
+
+# Driver ouvert au premier appel, pas à l'import
+_driver = LazyResource(_connect, "Neo4j")
+
+def get_driver():
+    return _driver.get()
+
+# Vrai quand Neo4j est configuré ou a répondu au chargement initial
+_refresh_enabled = False
+
+def _load_index():
+    """
+    Artefact JSON s'il existe, sinon chargement depuis Neo4j.
+    Sans l'un ni l'autre : index vide (features KG à 0, comme avant).
+    """
+    global _refresh_enabled
+    _refresh_enabled = NEO4J_CONFIGURED and not KG_OFFLINE
+    if os.path.exists(KG_INDEX_PATH):
+        index = KGFeatureIndex.load(KG_INDEX_PATH)
+    elif KG_OFFLINE:
+        return KGFeatureIndex()
+    else:
+        try:
+            index = KGFeatureIndex.from_neo4j(get_driver())
+            _refresh_enabled = True
+        except Exception as e:
+            print(f"⚠️ KG non accessible : {e}")
+            index = KGFeatureIndex()
+
+    # Le rafraîchissement repasse par Neo4j ; en cas d'échec on garde l'index courant
+    if _refresh_enabled:
+        index.start_background_refresh(get_driver, KG_REFRESH_INTERVAL)
+    return index
+
+_kg_index = LazyResource(_load_index, "index KG")
+
+def get_kg_index() -> KGFeatureIndex:
+    return _kg_index.get()
+
+def after_fork():
+    """
+    À appeler dans un worker forké : le thread de rafraîchissement du parent
+    n'existe pas dans l'enfant, on le relance sur l'index hérité.
+    """
+    if _kg_index.loaded and _refresh_enabled:
+        _kg_index.get().start_background_refresh(get_driver, KG_REFRESH_INTERVAL)
+
+def enrich_features_with_kg(query: str, doc=None) -> list:
     """
     Retourne 6 features KG :
     [kg_options, kg_relations, kg_freq,
      kg_scan_score, kg_ports_count, kg_scripts_score]
-    """
 
-    doc = nlp(query.lower())
-    terms = [t.text for t in doc if t.pos_ in ["NOUN", "VERB", "ADJ", "PROPN", "NUM"]]
+    `doc` : parse spaCy de `query.lower()` déjà calculé, pour éviter un second passage.
+    """
 
-    kg_options = 0
-    kg_relations = 0
-    kg_freq = 0.0
-    kg_scan_score = 0
-    kg_ports_count = 0
-    kg_scripts_score = 0
+    if doc is None:
+        doc = get_nlp()(query.lower())
+    terms = [t.text for t in doc if t.pos_ in KG_TERM_POS]
 
     try:
-        with driver.session() as session:
-
-            # =========================
-            # 1. Options + relations
-            # =========================
-            res = session.run("""
-                UNWIND $terms AS term
-                MATCH (o:Option {name: term})
-                OPTIONAL MATCH (o)-[r]->()
-                RETURN count(DISTINCT o) AS options, count(r) AS relations
-            """, terms=terms).single()
-
-            if res:
-                kg_options = res["options"] or 0
-                kg_relations = res["relations"] or 0
-
-            # =========================
-            # 2. Fréquence moyenne
-            # =========================
-            freqs = session.run("""
-                UNWIND $terms AS term
-                MATCH (o:Option {name: term})
-                RETURN coalesce(o.frequency, 0) AS freq
-            """, terms=terms)
-
-            freq_values = [r["freq"] for r in freqs]
-            kg_freq = sum(freq_values) / len(freq_values) if freq_values else 0.0
-
-            # =========================
-            # 3. ScanType → score
-            # =========================
-            scan_types = session.run("""
-                UNWIND $terms AS term
-                MATCH (s:ScanType {name: term})
-                RETURN s.name AS name
-            """, terms=terms)
-
-            for r in scan_types:
-                st = r["name"].lower()
-                if st in ["syn", "tcp"]:
-                    kg_scan_score += 2
-                elif st in ["udp"]:
-                    kg_scan_score += 3
-                elif st in ["fin", "null", "xmas"]:
-                    kg_scan_score += 4
-                elif st in ["idle"]:
-                    kg_scan_score += 5
-
-            # =========================
-            # 4. Ports détectés
-            # =========================
-            ports = session.run("""
-                UNWIND $terms AS term
-                MATCH (p:Port {number: term})
-                RETURN p.number AS port
-            """, terms=terms)
-
-            ports_list = [r["port"] for r in ports]
-            kg_ports_count = len(set(ports_list))
-
-            # =========================
-            # 5. Scripts (dangerosité)
-            # =========================
-            scripts = session.run("""
-                UNWIND $terms AS term
-                MATCH (s:Script {name: term})
-                RETURN s.category AS category
-            """, terms=terms)
-
-            for r in scripts:
-                cat = (r["category"] or "").lower()
-                if cat in ["default", "safe"]:
-                    kg_scripts_score += 1
-                elif cat in ["vuln"]:
-                    kg_scripts_score += 3
-                elif cat in ["exploit", "bruteforce"]:
-                    kg_scripts_score += 5
-
+        return get_kg_index().compute(terms)
     except Exception as e:
         print(f"⚠️ KG non accessible : {e}")
         return [0, 0, 0.0, 0, 0, 0]
 
-    return [
-        kg_options,
-        kg_relations,
-        kg_freq,
-        kg_scan_score,
-        kg_ports_count,
-        kg_scripts_score
-    ]
-
 
 def close_kg_connection():
-    driver.close()
+    driver = _driver.reset()
+    if driver is not None:
+        driver.close()
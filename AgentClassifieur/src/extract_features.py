@@ -1,20 +1,25 @@
-import spacy
-import re
+import os
+from utils import LazyResource, LRUCache
+# Mots-clés, regex et calcul du vecteur : compilés une fois dans vectorizer.py
+from vectorizer import HARD_KEYWORDS, IP_PATTERN, NMAP_KEYWORDS, SPACY_SCHEMA, TIMING_PATTERN, doc_vector
 
-nlp = spacy.load("fr_core_news_sm")
+# Version du vecteur de features (schéma spacy/v1 de vectorizer.py) : à
+# incrémenter dans SPACY_SCHEMA à chaque changement du calcul (invalide le cache).
+FEATURE_EXTRACTOR_VERSION = SPACY_SCHEMA.version
 
 # ==============================
-# Mots-clés
+# Pipeline spaCy (chargé au premier appel)
 # ==============================
-EASY_KEYWORDS = ["simple", "basique", "rapide", "défaut", "ouvert", "ping", "liste", "localhost", "local", "default", "quick"]
-MEDIUM_KEYWORDS = ["version", "service", "os", "détection", "udp", "détecte", "syn", "agressif", "aggressive", "timing", "t2", "t3", "t4", "t5", "script", "vuln", "insane"]
-HARD_KEYWORDS = ["furtif", "stealth", "idle", "zombie", "decoy", "spoof", "fragment", "proxy", "bounce", "badsum", "null", "fin", "xmas", "t0", "t1", "parano", "paranoid", "evasion", "ids", "firewall", "mtu", "évite", "évasion"]
+SPACY_MODEL = "fr_core_news_sm"
 
-def single_port_reduction(query: str) -> int:
-    q = query.lower()
-    if "un port" in q or "seulement un port" in q or "port unique" in q or re.search(r"-p\s*\d+(?!\s*-|\s*/)", q):
-        return -1
-    return 0
+def _load_nlp():
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+_nlp = LazyResource(_load_nlp, "spaCy")
+
+def get_nlp():
+    return _nlp.get()
 
 # ==============================
 # VERSION LISTE POUR LE MODÈLE (comme lors de l'entraînement)
@@ -22,63 +27,89 @@ def single_port_reduction(query: str) -> int:
 def extract_features(query: str) -> list:
     if not query:
         query = ""
-    query_lower = query.lower()
-    doc = nlp(query_lower)
-
-    features = []
-
-    # Statistiques
-    features.append(len(doc))
-    features.append(sum(1 for t in doc if t.pos_ == "VERB"))
-    features.append(sum(1 for t in doc if t.pos_ == "NOUN"))
-    features.append(sum(1 for t in doc if t.pos_ == "ADJ"))
-    features.append(len(query))
-
-    # IP
-    features.append(1 if re.search(r'\d+\.\d+\.\d+\.\d+', query_lower) else 0)
-    features.append(1 if "/" in query_lower or "-" in query_lower else 0)
-    features.append(len(re.findall(r'\d+\.\d+\.\d+\.\d+', query_lower)))
-
-    # Mots-clés
-    nb_easy = sum(1 for t in doc if t.text in EASY_KEYWORDS)
-    nb_medium = sum(1 for t in doc if t.text in MEDIUM_KEYWORDS)
-    nb_hard = sum(1 for t in doc if t.text in HARD_KEYWORDS)
-    features.extend([nb_easy, nb_medium, nb_hard])
-    features.append(nb_hard / (len(doc) + 1))
-
-    # Options
-    features.append(1 if re.search(r't[0-5]|timing', query_lower) else 0)
-    features.append(1 if "script" in query_lower else 0)
-    features.append(1 if "udp" in query_lower else 0)
-    features.append(1 if "os" in query_lower else 0)
-    features.append(1 if "version" in query_lower else 0)
-    features.append(1 if any(k in query_lower for k in HARD_KEYWORDS) else 0)
-    features.append(sum(1 for kw in HARD_KEYWORDS + MEDIUM_KEYWORDS if kw in query_lower))
-
-    # Avancé
-    features.append(len(doc.ents))
-    features.append(1 if "proxy" in query_lower else 0)
-    features.append(1 if "decoy" in query_lower else 0)
-
-    # Scripts
-    nb_scripts = 10 if "script" in query_lower else 0
-    features.append(nb_scripts)
-
-    # Score
-    features.append(nb_hard * 5 + nb_medium * 2 + nb_easy + single_port_reduction(query))
-
+    return features_from_doc(query, get_nlp()(query.lower()))
+
+def extract_features_batch(queries: list, batch_size: int = 64) -> list:
+    """
+    Même résultat que `[extract_features(q) for q in queries]`, mais les
+    requêtes passent par spaCy en lot (`nlp.pipe`).
+    """
+    queries = [q or "" for q in queries]
+    docs = get_nlp().pipe((q.lower() for q in queries), batch_size=batch_size)
+    return [features_from_doc(q, doc) for q, doc in zip(queries, docs)]
+
+def features_from_doc(query: str, doc, kg: bool = True) -> list:
+    """
+    Vecteur de features (schéma spacy/v1) à partir d'un parse spaCy de `query.lower()`.
+    `kg=False` : les 6 features KG restent à 0 sans interroger l'index.
+    """
     # KG (fallback si indisponible)
-    kg = [0, 0, 0.0, 0, 0, 0]
-    try:
-        from enrich_with_kg import enrich_features_with_kg
-        kg_result = enrich_features_with_kg(query)
-        if isinstance(kg_result, list) and len(kg_result) >= 6:
-            kg = kg_result[:6]
-    except:
-        pass
-    features.extend(kg)
+    kg_features = [0, 0, 0.0, 0, 0, 0]
+    if kg:
+        try:
+            from enrich_with_kg import enrich_features_with_kg
+            kg_result = enrich_features_with_kg(query, doc)
+            if isinstance(kg_result, list) and len(kg_result) >= 6:
+                kg_features = kg_result[:6]
+        except:
+            pass
+    return doc_vector(query, doc, kg_features)
 
-    return features
+# ==============================
+# GROUPES DE FEATURES (COÛT D'EXTRACTION)
+# ==============================
+# Colonnes de `features_from_doc` regroupées par ce qu'elles coûtent :
+# - text   : regex / sous-chaînes sur la requête brute
+# - tokens : tokenizer spaCy seul (comptes de mots-clés, score)
+# - pos    : étiquettes morphosyntaxiques (tok2vec + morphologizer)
+# - ner    : entités nommées (ner, qui suit les phrases découpées par le parser)
+# - kg     : index KG, sur les termes filtrés par POS
+FEATURE_GROUPS = {
+    "text": [4, 5, 6, 7, 12, 13, 14, 15, 16, 17, 18, 20, 21, 22],
+    "tokens": [0, 8, 9, 10, 11, 23],
+    "pos": [1, 2, 3],
+    "ner": [19],
+    "kg": [24, 25, 26, 27, 28, 29],
+}
+N_FEATURES = sum(len(columns) for columns in FEATURE_GROUPS.values())
+
+# Composants spaCy nécessaires par groupe (le tokenizer tourne toujours)
+GROUP_PIPES = {
+    "text": [],
+    "tokens": [],
+    "pos": ["tok2vec", "morphologizer", "attribute_ruler"],
+    "ner": ["tok2vec", "parser", "ner"],
+    "kg": ["tok2vec", "morphologizer", "attribute_ruler"],
+}
+
+def group_columns(groups) -> list:
+    """Indices (triés) des colonnes du vecteur complet couvertes par `groups`."""
+    unknown = set(groups) - set(FEATURE_GROUPS)
+    if unknown:
+        raise ValueError(f"Groupes de features inconnus : {sorted(unknown)}")
+    return sorted(c for g in groups for c in FEATURE_GROUPS[g])
+
+def disabled_pipes(groups, pipe_names) -> list:
+    """Composants du pipeline spaCy inutiles pour `groups`."""
+    needed = {p for g in groups for p in GROUP_PIPES[g]}
+    return [p for p in pipe_names if p not in needed]
+
+def extract_feature_groups(queries: list, groups, batch_size: int = 64) -> list:
+    """
+    Colonnes `group_columns(groups)` de `extract_features_batch(queries)`,
+    sans exécuter les composants spaCy ni l'index KG dont elles ne dépendent
+    pas. Pas de cache : le vecteur réduit est déjà bon marché.
+    """
+    columns = group_columns(groups)
+    queries = [q or "" for q in queries]
+    nlp = get_nlp()
+    docs = nlp.pipe((q.lower() for q in queries), batch_size=batch_size,
+                    disable=disabled_pipes(groups, nlp.pipe_names))
+    rows = []
+    for q, doc in zip(queries, docs):
+        features = features_from_doc(q, doc, kg="kg" in groups)
+        rows.append([features[c] for c in columns])
+    return rows
 
 # ==============================
 # VERSION DICT POUR LE ROUTER ET L'EXPLICATION
@@ -86,22 +117,87 @@ def extract_features(query: str) -> list:
 def extract_features_dict(query: str) -> dict:
     if not query:
         query = ""
+    return features_dict_from_doc(query, get_nlp()(query.lower()))
+
+def features_dict_from_doc(query: str, doc) -> dict:
     query_lower = query.lower()
-    doc = nlp(query_lower)
 
     features = {}
     features["num_tokens"] = len(doc)
-    features["has_ip"] = bool(re.search(r'\d+\.\d+\.\d+\.\d+', query_lower))
+    features["has_ip"] = bool(IP_PATTERN.search(query_lower))
     features["has_range"] = "/" in query_lower or "-" in query_lower
     features["nb_hard_keywords"] = sum(1 for t in doc if t.text in HARD_KEYWORDS)
-    features["has_timing"] = bool(re.search(r't[0-5]|timing', query_lower))
+    features["has_timing"] = bool(TIMING_PATTERN.search(query_lower))
     features["has_scripts"] = "script" in query_lower
     features["has_evasion"] = any(k in query_lower for k in HARD_KEYWORDS)
     features["has_decoy"] = "decoy" in query_lower
-    features["nmap_keywords"] = [t.text for t in doc if t.text in EASY_KEYWORDS + MEDIUM_KEYWORDS + HARD_KEYWORDS]
+    features["nmap_keywords"] = [t.text for t in doc if t.text in NMAP_KEYWORDS]
 
     return features
 
+# ==============================
+# CACHE DES FEATURES (requêtes récurrentes)
+# ==============================
+FEATURE_CACHE = LRUCache(
+    max_size=int(os.getenv("FEATURE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("FEATURE_CACHE_TTL", "3600")),  # l'index KG peut changer
+)
+
+def _cache_key(query: str):
+    # Le vecteur ne dépend que de query.lower() (et de len(query), identique
+    # sauf pour de rares caractères Unicode : on garde alors la requête brute)
+    query = query or ""
+    normalized = query.lower()
+    if len(normalized) != len(query):
+        normalized = query
+    return (FEATURE_EXTRACTOR_VERSION, normalized)
+
+def _compute_entry(query: str, doc) -> tuple:
+    return tuple(features_from_doc(query, doc)), features_dict_from_doc(query, doc)
+
+def _copy_dict(features: dict) -> dict:
+    copy = dict(features)
+    copy["nmap_keywords"] = list(features["nmap_keywords"])
+    return copy
+
+def _cached_entry(query: str) -> tuple:
+    query = query or ""
+    key = _cache_key(query)
+    entry = FEATURE_CACHE.get(key)
+    if entry is None:
+        entry = _compute_entry(query, get_nlp()(query.lower()))
+        FEATURE_CACHE.put(key, entry)
+    return entry
+
+def get_features(query: str) -> list:
+    """`extract_features(query)` via le cache (spaCy, regex et KG évités sur un hit)."""
+    return list(_cached_entry(query)[0])
+
+def get_features_dict(query: str) -> dict:
+    """`extract_features_dict(query)` via le cache."""
+    return _copy_dict(_cached_entry(query)[1])
+
+def get_features_batch(queries: list, batch_size: int = 64) -> list:
+    """`extract_features_batch(queries)` via le cache ; seuls les absents passent par spaCy."""
+    queries = [q or "" for q in queries]
+    entries = [FEATURE_CACHE.get(_cache_key(q)) for q in queries]
+
+    missing = {}
+    for i, entry in enumerate(entries):
+        if entry is None:
+            missing.setdefault(_cache_key(queries[i]), []).append(i)
+
+    if missing:
+        first = [positions[0] for positions in missing.values()]
+        docs = get_nlp().pipe((queries[i].lower() for i in first), batch_size=batch_size)
+        for (key, positions), doc in zip(missing.items(), docs):
+            entry = _compute_entry(queries[positions[0]], doc)
+            FEATURE_CACHE.put(key, entry)
+            for i in positions:
+                entries[i] = entry
+
+    return [list(entry[0]) for entry in entries]
+
 # ==============================
 # Test
 # ==============================
@@ -0,0 +1,441 @@
+"""
+Moteur d'inférence compilé pour le Random Forest de complexité.
+
+La forêt sklearn (300 arbres, cf. train_classifier.py) est aplatie en
+tableaux NumPy contigus : feature, seuil, enfants gauche/droit et valeurs
+des feuilles. Tous les arbres sont parcourus en même temps, niveau par
+niveau, ce qui évite le surcoût par appel de `predict_proba` sur une ligne.
+
+Format sur disque : un dossier avec un `.npy` par tableau et `meta.json`.
+Les tableaux sont ouverts en mmap lecture seule, donc partagés entre les
+workers (cf. prefork.py) au lieu d'être copiés dans chaque processus. Un
+fichier `.npz` unique reste possible (chemin terminé par `.npz`).
+
+Variantes compressées (cf. compress_forest.py) : sous-ensemble d'arbres
+(`select_trees`), profondeur limitée (`truncate`) et types réduits
+(`quantize` : seuils float32 ou int16 à virgule fixe, valeurs float32 /
+float16, indices int16 quand la forêt est assez petite).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# ================= CONFIGURATION =================
+MODEL_PATH = "models/complexity_classifier.pkl"
+FOREST_PATH = "models/complexity_classifier_forest"
+
+ARRAYS = ["feature", "threshold", "left", "right", "value", "roots"]
+OPTIONAL_ARRAYS = ["scale"]  # échelle par feature des seuils int16
+
+# Types acceptés tels quels par tableau (le premier est le type par défaut)
+DTYPES = {
+    "feature": (np.int32, np.int16, np.uint8),
+    "threshold": (np.float64, np.float32, np.int16),
+    "left": (np.int32, np.int16),
+    "right": (np.int32, np.int16),
+    "value": (np.float64, np.float32, np.float16),
+    "roots": (np.int32, np.int16),
+}
+PRECISIONS = ["float64", "float32", "int16"]
+
+TREE_LEAF = -1  # valeur sklearn des enfants d'une feuille
+
+
+def _array(values, name: str):
+    """Tableau contigu, dans son type s'il est accepté pour `name`, sinon le type par défaut."""
+    values = np.asarray(values)
+    allowed = DTYPES[name]
+    dtype = values.dtype if any(values.dtype == d for d in allowed) else allowed[0]
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+def _index_dtype(n: int):
+    return np.int16 if n <= np.iinfo(np.int16).max else np.int32
+
+
+def float32_floor(threshold) -> np.ndarray:
+    """
+    Plus grand float32 ≤ seuil : pour une feature float32 x (comme dans
+    `apply`), `x <= seuil` et `x <= float32_floor(seuil)` sont équivalents.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def int16_scales(X) -> np.ndarray:
+    """
+    Échelle par feature pour des seuils int16 : 1 pour une feature à valeurs
+    entières (comparaison exacte), sinon la plus grande puissance de 2 (≤ 2^12)
+    qui garde les valeurs observées dans l'intervalle int16.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    integer = np.all(X == np.round(X), axis=0)
+    bound = np.maximum(np.abs(X).max(axis=0), 1.0)
+    power = np.clip(np.floor(np.log2(32000.0 / bound)), 0, 12)
+    return np.where(integer, 1.0, 2.0 ** power).astype(np.float32)
+
+
+class CompiledForest:
+    """
+    Forêt aplatie : les noeuds de tous les arbres sont concaténés et les
+    indices d'enfants sont globaux. Une feuille pointe sur elle-même, ce qui
+    rend le parcours idempotent une fois la feuille atteinte.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth, n_features,
+                 info=None, scale=None):
+        self.feature = _array(feature, "feature")
+        self.threshold = _array(threshold, "threshold")
+        self.left = _array(left, "left")
+        self.right = _array(right, "right")
+        self.value = _array(value, "value")
+        self.roots = _array(roots, "roots")
+        # Seuils int16 : comparaison de floor(X * scale) à des entiers
+        self.scale = None if scale is None else np.ascontiguousarray(scale, dtype=np.float32)
+        if (self.scale is None) != (self.threshold.dtype != np.int16):
+            raise ValueError("Les seuils int16 nécessitent une échelle par feature (et seulement eux)")
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        # Métadonnées libres sauvegardées dans meta.json (ex. position dans le feedback)
+        self.info = dict(info or {})
+
+    # ================= EXPORT =================
+    @classmethod
+    def from_sklearn(cls, model):
+        """Aplatit un RandomForestClassifier (ou un arbre seul) entraîné."""
+        estimators = getattr(model, "estimators_", [model])
+
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in estimators:
+            tree = est.tree_
+            n = tree.node_count
+            idx = np.arange(n, dtype=np.int64) + offset
+            is_leaf = tree.children_left == TREE_LEAF
+
+            # Feuilles : feature 0 (lecture sans effet) et enfants = soi-même
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            left.append(np.where(is_leaf, idx, tree.children_left + offset))
+            right.append(np.where(is_leaf, idx, tree.children_right + offset))
+
+            # Probabilités normalisées par feuille (comme DecisionTreeClassifier.predict_proba)
+            leaf_value = tree.value[:, 0, :].astype(np.float64)
+            totals = leaf_value.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            value.append(leaf_value / totals)
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            value=np.concatenate(value),
+            roots=np.asarray(roots),
+            classes=model.classes_,
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+            # Schéma de features de l'entraînement (cf. vectorizer.py), s'il est déclaré
+            info={"feature_schema": model.feature_schema_} if hasattr(model, "feature_schema_") else None,
+        )
+
+    # ================= MISE À JOUR =================
+    def append(self, other: "CompiledForest") -> "CompiledForest":
+        """
+        Nouvelle forêt contenant les arbres des deux forêts (vote à parts
+        égales par arbre). Les classes de `other` doivent être incluses dans
+        celles de `self` : une classe absente de ses données d'entraînement
+        reçoit une probabilité nulle dans ses feuilles.
+        """
+        if other.n_features_in_ != self.n_features_in_:
+            raise ValueError(
+                f"Nombre de features différent : {other.n_features_in_} au lieu de {self.n_features_in_}"
+            )
+        classes = self.classes_.tolist()
+        unknown = [c for c in other.classes_.tolist() if c not in classes]
+        if unknown:
+            raise ValueError(f"Classes inconnues de la forêt d'origine : {unknown}")
+
+        value = np.zeros((len(other.value), len(classes)), dtype=self.value.dtype)
+        value[:, [classes.index(c) for c in other.classes_.tolist()]] = other.value
+
+        # Les nouveaux arbres prennent la précision de la forêt d'origine
+        threshold = other.threshold.astype(np.float64) if other.scale is None else None
+        if self.scale is not None:
+            if other.scale is not None:
+                raise ValueError("Impossible d'ajouter une forêt déjà quantifiée en int16")
+            threshold = other._int16_thresholds(self.scale)
+        elif self.threshold.dtype == np.float32:
+            threshold = float32_floor(threshold)
+        elif threshold is None:
+            raise ValueError("Impossible d'ajouter une forêt int16 à une forêt float")
+
+        offset = len(self.feature)
+        index = _index_dtype(offset + len(other.feature))
+        return CompiledForest(
+            feature=np.concatenate([self.feature, other.feature.astype(self.feature.dtype)]),
+            threshold=np.concatenate([self.threshold, threshold.astype(self.threshold.dtype)]),
+            left=np.concatenate([self.left.astype(index), other.left.astype(index) + offset]),
+            right=np.concatenate([self.right.astype(index), other.right.astype(index) + offset]),
+            value=np.concatenate([self.value, value]),
+            roots=np.concatenate([self.roots.astype(index), other.roots.astype(index) + offset]),
+            classes=self.classes_,
+            max_depth=max(self.max_depth, other.max_depth),
+            n_features=self.n_features_in_,
+            info=self.info,
+            scale=self.scale,
+        )
+
+    # ================= COMPRESSION =================
+    def _tree_ids(self) -> np.ndarray:
+        """Numéro d'arbre de chaque noeud (les noeuds d'un arbre sont contigus)."""
+        return np.searchsorted(self.roots, np.arange(len(self.feature)), side="right") - 1
+
+    def _node_depths(self) -> np.ndarray:
+        depth = np.full(len(self.feature), -1, dtype=np.int32)
+        frontier = self.roots.astype(np.int64)
+        level = 0
+        while len(frontier):
+            depth[frontier] = level
+            internal = frontier[self.left[frontier] != frontier]
+            frontier = np.concatenate([self.left[internal], self.right[internal]]).astype(np.int64)
+            level += 1
+        return depth
+
+    def _subforest(self, keep, leaf=None, max_depth=None) -> "CompiledForest":
+        """
+        Forêt réduite aux noeuds `keep` (racines comprises, enfants d'un noeud
+        interne gardé compris) ; les noeuds `leaf` deviennent des feuilles.
+        """
+        nodes = np.arange(len(self.feature))
+        left, right = self.left.astype(np.int64), self.right.astype(np.int64)
+        feature, threshold = self.feature.copy(), self.threshold.copy()
+        if leaf is not None:
+            left[leaf], right[leaf] = nodes[leaf], nodes[leaf]
+            feature[leaf], threshold[leaf] = 0, 0
+
+        new_index = np.cumsum(keep) - 1
+        index = _index_dtype(int(keep.sum()))
+        return CompiledForest(
+            feature=feature[keep],
+            threshold=threshold[keep],
+            left=new_index[left[keep]].astype(index),
+            right=new_index[right[keep]].astype(index),
+            value=self.value[keep],
+            roots=new_index[self.roots[keep[self.roots]]].astype(index),
+            classes=self.classes_,
+            max_depth=self.max_depth if max_depth is None else max_depth,
+            n_features=self.n_features_in_,
+            info=self.info,
+            scale=self.scale,
+        )
+
+    def select_trees(self, trees) -> "CompiledForest":
+        """Forêt restreinte aux arbres d'indices `trees` (vote à parts égales)."""
+        keep = np.isin(self._tree_ids(), np.asarray(trees))
+        return self._subforest(keep)
+
+    def truncate(self, max_depth: int) -> "CompiledForest":
+        """
+        Arbres coupés à `max_depth` : un noeud à cette profondeur devient une
+        feuille avec la distribution de classes (pondérée) de ses échantillons.
+        """
+        depth = self._node_depths()
+        keep = (depth >= 0) & (depth <= max_depth)
+        leaf = depth == max_depth
+        return self._subforest(keep, leaf, min(self.max_depth, max_depth))
+
+    def _int16_thresholds(self, scale) -> np.ndarray:
+        scaled = np.floor(self.threshold.astype(np.float64) * scale[self.feature])
+        return np.clip(scaled, np.iinfo(np.int16).min, np.iinfo(np.int16).max).astype(np.int16)
+
+    def quantize(self, precision: str = "float32", X=None) -> "CompiledForest":
+        """
+        float64 : inchangé (indices réduits seulement).
+        float32 : seuils float32 arrondis vers le bas (mêmes décisions), valeurs float32.
+        int16   : seuils int16 à virgule fixe, échelle par feature calculée sur `X`
+                  (exact pour les features entières), valeurs float16.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Précision inconnue : {precision} ({', '.join(PRECISIONS)})")
+        if self.scale is not None:
+            raise ValueError("Forêt déjà quantifiée en int16")
+
+        index = _index_dtype(len(self.feature))
+        arrays = {
+            "feature": self.feature.astype(np.uint8 if self.n_features_in_ <= 255 else np.int32),
+            "left": self.left.astype(index),
+            "right": self.right.astype(index),
+            "roots": self.roots.astype(index),
+            "threshold": self.threshold,
+            "value": self.value,
+        }
+        scale = None
+        if precision == "float32":
+            arrays.update(threshold=float32_floor(self.threshold), value=self.value.astype(np.float32))
+        elif precision == "int16":
+            if X is None:
+                raise ValueError("La quantification int16 a besoin de données (X) pour l'échelle des features")
+            scale = int16_scales(X)
+            arrays.update(threshold=self._int16_thresholds(scale), value=self.value.astype(np.float16))
+        return CompiledForest(classes=self.classes_, max_depth=self.max_depth, n_features=self.n_features_in_,
+                              info=self.info, scale=scale, **arrays)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [getattr(self, name) for name in ARRAYS] + ([self.scale] if self.scale is not None else [])
+        return sum(a.nbytes for a in arrays)
+
+    def save(self, path: str = FOREST_PATH):
+        """Dossier de `.npy` + meta.json, ou `.npz` si le chemin se termine par .npz."""
+        directory = os.path.dirname(path.rstrip(os.sep))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if path.endswith(".npz"):
+            np.savez(
+                path,
+                classes=self.classes_,
+                max_depth=np.asarray(self.max_depth),
+                n_features=np.asarray(self.n_features_in_),
+                info=np.asarray(json.dumps(self.info)),
+                **{name: getattr(self, name) for name in ARRAYS},
+                **({"scale": self.scale} if self.scale is not None else {}),
+            )
+            return
+
+        # Écriture dans un dossier voisin puis échange : les processus qui
+        # ont l'ancien export en mmap gardent des fichiers intacts
+        tmp = tempfile.mkdtemp(prefix=".forest-", dir=directory or ".")
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        if self.scale is not None:
+            np.save(os.path.join(tmp, "scale.npy"), self.scale)
+        # meta.json écrit en dernier : sa date sert de date d'export
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "classes": self.classes_.tolist(),
+                "max_depth": self.max_depth,
+                "n_features": self.n_features_in_,
+                "info": self.info,
+            }, f)
+
+        old = None
+        if os.path.exists(path):
+            old = tmp + ".old"
+            os.rename(path, old)
+        os.rename(tmp, path)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str = FOREST_PATH, mmap: bool = True):
+        """Charge un export ; les `.npy` d'un dossier sont mappés en lecture seule."""
+        if path.endswith(".npz"):
+            with np.load(path, allow_pickle=False) as data:
+                return cls(
+                    classes=data["classes"],
+                    max_depth=int(data["max_depth"]),
+                    n_features=int(data["n_features"]),
+                    info=json.loads(str(data["info"])) if "info" in data else None,
+                    **{name: data[name] for name in ARRAYS + OPTIONAL_ARRAYS if name in data},
+                )
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        files = {name: os.path.join(path, f"{name}.npy") for name in ARRAYS + OPTIONAL_ARRAYS}
+        return cls(
+            classes=meta["classes"],
+            max_depth=meta["max_depth"],
+            n_features=meta["n_features"],
+            info=meta.get("info"),
+            **{name: np.load(file, mmap_mode=mode) for name, file in files.items() if os.path.exists(file)},
+        )
+
+    # ================= INFÉRENCE =================
+    def apply(self, X) -> np.ndarray:
+        """Indice global de la feuille atteinte, forme (n_samples, n_trees)."""
+        # sklearn compare des features float32 à des seuils float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.scale is not None:
+            # Seuils int16 t = floor(s * scale) : x <= s  ⇔  floor(x * scale) <= t
+            # (exact pour une feature entière à l'échelle 1)
+            limits = np.iinfo(np.int16)
+            X = np.clip(np.floor(X * self.scale), limits.min, limits.max).astype(np.int32)
+
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        return self.value[leaves].sum(axis=1, dtype=np.float64) / len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load_classifier(model_path: str = MODEL_PATH, forest_path: str = FOREST_PATH):
+    """
+    Retourne la forêt compilée : depuis l'export s'il existe et n'est pas plus
+    ancien que le modèle pickle, sinon compilée en mémoire depuis le pickle.
+    Un modèle qui n'est pas une forêt sklearn est retourné tel quel ; tous
+    exposent `predict_proba` et `classes_`.
+    """
+    stamp = forest_path if forest_path.endswith(".npz") else os.path.join(forest_path, "meta.json")
+    if os.path.exists(stamp) and (
+        not os.path.exists(model_path)
+        or os.path.getmtime(stamp) >= os.path.getmtime(model_path)
+    ):
+        return CompiledForest.load(forest_path)
+
+    import joblib
+    return compile_model(joblib.load(model_path))
+
+
+def compile_model(model):
+    """Compile un modèle à base d'arbres, ou le retourne inchangé."""
+    if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+        try:
+            return CompiledForest.from_sklearn(model)
+        except AttributeError:
+            pass
+    return model
+
+
+def export_forest(model_path: str = MODEL_PATH, forest_path: str = FOREST_PATH) -> CompiledForest:
+    """Étape d'export : pickle sklearn → tableaux NumPy."""
+    import joblib
+    model = joblib.load(model_path)
+    forest = CompiledForest.from_sklearn(model)
+    forest.save(forest_path)
+    return forest
+
+
+# ================= EXPORT EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    forest = export_forest()
+    print(f"Forêt compilée : {len(forest.roots)} arbres, {len(forest.feature)} noeuds, "
+          f"profondeur max {forest.max_depth}")
+    print(f"Sauvegardée dans : {FOREST_PATH}")
@@ -0,0 +1,105 @@
+"""
+Matrice de features extraite une fois et gardée sur disque.
+
+L'extraction (spaCy + KG) est l'étape lente de l'entraînement : la matrice
+X et les labels y d'un CSV sont sauvegardés en `.npy` dans un dossier dont
+le nom dépend d'une empreinte :
+- contenu du CSV (sha256) et colonnes utilisées
+- FEATURE_EXTRACTOR_VERSION
+- index KG (sha256 de models/kg_index.json s'il existe)
+
+Si l'une de ces entrées change, l'empreinte change et les features sont
+réextraites ; sinon `load_or_extract` relit les `.npy` directement.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from extract_features import FEATURE_EXTRACTOR_VERSION
+from kg_index import KG_INDEX_PATH
+
+# ================= CONFIGURATION =================
+FEATURE_STORE_DIR = "models/feature_store"
+# "irrelevant" : exemples négatifs du modèle fusionné (fused_classifier.py)
+LABEL_MAPPING = {"easy": 0, "medium": 1, "hard": 2, "irrelevant": 3}
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(data_path: str, query_col: str = "query", label_col: str = "complexity",
+                kg_index_path: str = KG_INDEX_PATH, version: int = FEATURE_EXTRACTOR_VERSION) -> dict:
+    """Entrées dont dépend la matrice de features, et leur hash combiné (`key`)."""
+    meta = {
+        "dataset": os.path.basename(data_path),
+        "dataset_sha256": _sha256(data_path),
+        "query_col": query_col,
+        "label_col": label_col,
+        "extractor_version": version,
+        "kg_index_sha256": _sha256(kg_index_path) if os.path.exists(kg_index_path) else None,
+    }
+    meta["key"] = hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+    return meta
+
+
+def load_labeled_csv(data_path: str, query_col: str = "query", label_col: str = "complexity"):
+    """(requêtes, y) avec la même normalisation des labels que train_classifier.py."""
+    df = pd.read_csv(data_path)
+    labels = df[label_col].astype(str).str.strip().str.lower()
+    y = labels.map(LABEL_MAPPING)
+    if y.isna().any():
+        raise ValueError(f"Valeurs de complexité inconnues : {labels[y.isna()].unique().tolist()}")
+    return df[query_col].tolist(), y.to_numpy(dtype=np.int64)
+
+
+def load_or_extract(data_path: str, store_dir: str = FEATURE_STORE_DIR, query_col: str = "query",
+                    label_col: str = "complexity", extract=None, verbose: bool = True):
+    """
+    Retourne (X, y, meta). `extract(queries) -> liste de vecteurs` n'est
+    appelée que si aucune matrice n'existe pour l'empreinte courante
+    (par défaut : features calculées sur les parses de parse_cache.py).
+    """
+    meta = fingerprint(data_path, query_col, label_col)
+    name = os.path.splitext(meta["dataset"])[0]
+    path = os.path.join(store_dir, f"{name}-{meta['key'][:16]}")
+
+    if os.path.exists(os.path.join(path, "meta.json")):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("key") == meta["key"]:
+            if verbose:
+                print(f"Features relues depuis {path}")
+            return np.load(os.path.join(path, "X.npy")), np.load(os.path.join(path, "y.npy")), stored
+
+    queries, y = load_labeled_csv(data_path, query_col, label_col)
+    if verbose:
+        print(f"Extraction des features de {len(queries)} requêtes...")
+    start = time.perf_counter()
+    if extract is None:
+        # Parses spaCy relus depuis le cache DocBin (parse_cache.py) s'ils existent
+        from parse_cache import extract_dataset
+        X = np.asarray(extract_dataset(data_path, query_col), dtype=np.float64)
+    else:
+        X = np.asarray(extract(queries), dtype=np.float64)
+    meta.update(rows=int(X.shape[0]), n_features=int(X.shape[1]),
+                extraction_seconds=round(time.perf_counter() - start, 3), created_at=time.time())
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "X.npy"), X)
+    np.save(os.path.join(path, "y.npy"), y)
+    # meta.json en dernier : sa présence marque une matrice complète
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    if verbose:
+        print(f"Features sauvegardées dans {path}")
+    return X, y, meta
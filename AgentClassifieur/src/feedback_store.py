@@ -0,0 +1,112 @@
+"""
+Journal des corrections de labels envoyées par les utilisateurs (POST /feedback).
+
+Fichier JSONL en ajout seul : une ligne par correction, avec la requête, le
+label corrigé et le vecteur de features calculé au moment de la correction
+(version de l'extracteur incluse). L'entraînement incrémental relit les
+vecteurs tels quels, sans repasser par spaCy ni Neo4j.
+
+Les positions sont des numéros de ligne : `load(start)` retourne aussi la
+position de fin, à passer au prochain appel pour ne lire que les nouveautés.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# ================= CONFIGURATION =================
+FEEDBACK_PATH = os.getenv("FEEDBACK_PATH", "data/feedback.jsonl")
+LABELS = ["EASY", "MEDIUM", "HARD"]
+
+
+def label_to_class(label) -> int:
+    """'EASY' / 'medium' / 2 → indice de classe, ou ValueError."""
+    if isinstance(label, int) and not isinstance(label, bool) and 0 <= label < len(LABELS):
+        return label
+    if isinstance(label, str) and label.strip().upper() in LABELS:
+        return LABELS.index(label.strip().upper())
+    raise ValueError(f"Label inconnu : {label!r} (attendu : {', '.join(LABELS)})")
+
+
+class FeedbackStore:
+    """
+    Chaque ajout est un seul `write` sur un descripteur ouvert en O_APPEND :
+    plusieurs threads ou workers peuvent écrire dans le même fichier sans
+    entremêler les lignes. Une dernière ligne tronquée (arrêt brutal) est
+    ignorée à la lecture.
+    """
+
+    def __init__(self, path: str = FEEDBACK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, query: str, label, features, version: int) -> dict:
+        record = {
+            "ts": time.time(),
+            "query": query,
+            "label": LABELS[label_to_class(label)],
+            "features": [float(v) for v in features],
+            "version": version,
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        return record
+
+    def _lines(self, start: int = 0):
+        # (position, enregistrement ou None si la ligne est illisible)
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            for position, line in enumerate(f):
+                if position < start:
+                    continue
+                if not line.endswith("\n"):
+                    break  # ligne en cours d'écriture ou tronquée
+                try:
+                    yield position, json.loads(line)
+                except ValueError:
+                    yield position, None
+
+    def records(self, start: int = 0):
+        """Produit (position, enregistrement) à partir de la ligne `start`."""
+        for position, record in self._lines(start):
+            if record is not None:
+                yield position, record
+
+    def load(self, start: int = 0, version: int = None):
+        """
+        (X, y, fin) des corrections à partir de la ligne `start`. Avec
+        `version`, les vecteurs d'une autre version de l'extracteur sont
+        écartés. `fin` est la position à reprendre au prochain appel.
+        """
+        X, y = [], []
+        end = start
+        for position, record in self._lines(start):
+            end = position + 1
+            if record is None:
+                continue
+            if version is not None and record.get("version") != version:
+                continue
+            try:
+                target = label_to_class(record["label"])
+            except (KeyError, ValueError):
+                continue
+            X.append(record["features"])
+            y.append(target)
+        X = np.asarray(X, dtype=np.float64) if X else np.empty((0, 0))
+        return X, np.asarray(y, dtype=np.int64), end
+
+    def __len__(self):
+        return sum(1 for _ in self.records())
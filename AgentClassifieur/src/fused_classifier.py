@@ -0,0 +1,177 @@
+"""
+Modèle fusionné pertinence + complexité : IRRELEVANT / EASY / MEDIUM / HARD.
+
+Le router enchaîne aujourd'hui deux passes : `is_relevant_to_nmap`
+(mots-clés) puis la forêt 3 classes. Ici une seule forêt apprend les 4
+classes sur le même vecteur de features (schéma spacy/v1), avec comme
+exemples négatifs `data/irrelevant_queries.csv` : sujets de
+`NON_NMAP_KEYWORDS` (Agent_comprehension) et requêtes pièges qui
+partagent du vocabulaire avec Nmap (« port de Marseille », « scanner une
+photo »...).
+
+Comparaison, sur la même partie test (découpage habituel 80/20 stratifié,
+graine 42) :
+- fused : la forêt 4 classes
+- two-stage : porte de pertinence puis forêt 3 classes entraînée sur les
+  mêmes requêtes Nmap de la partie entraînement ; deux portes testées,
+  `router.is_relevant_to_nmap` et `ComprehensionAgent.understand`
+
+Usage (depuis AgentClassifieur/, KG_OFFLINE=1 pour l'index JSON) :
+    python src/fused_classifier.py [--write]
+Service : FUSED_STAGE=1 (router.py) charge `FUSED_MODEL_PATH`.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from fast_forest import CompiledForest
+from vectorizer import SPACY_SCHEMA
+
+# ================= CONFIGURATION =================
+DATA_PATH = "data/data_personn3.csv"
+NEGATIVES_PATH = "data/irrelevant_queries.csv"
+FUSED_MODEL_PATH = "models/fused_classifier_forest"
+REPORT_PATH = "models/fused_report.json"
+
+# Importé par router.py : sklearn et pandas ne sont chargés que pour l'entraînement
+FUSED_LABELS = ["EASY", "MEDIUM", "HARD", "IRRELEVANT"]
+IRRELEVANT = FUSED_LABELS.index("IRRELEVANT")  # = feature_store.LABEL_MAPPING["irrelevant"]
+MODEL_PARAMS = {"n_estimators": 300, "random_state": 42, "n_jobs": -1, "class_weight": "balanced"}
+
+
+# ================= 1. DONNÉES =================
+def load_fused_dataset(data_path: str = DATA_PATH, negatives_path: str = NEGATIVES_PATH, store_dir: str = None):
+    """(requêtes, X, y) : requêtes Nmap puis négatifs, features relues du feature store."""
+    from feature_store import FEATURE_STORE_DIR, load_labeled_csv, load_or_extract
+    store_dir = store_dir or FEATURE_STORE_DIR
+    X_pos, y_pos, _ = load_or_extract(data_path, store_dir)
+    X_neg, y_neg, _ = load_or_extract(negatives_path, store_dir)
+    queries = load_labeled_csv(data_path)[0] + load_labeled_csv(negatives_path)[0]
+    return queries, np.vstack([X_pos, X_neg]), np.concatenate([y_pos, y_neg])
+
+
+def train_forest(X, y):
+    from sklearn.ensemble import RandomForestClassifier
+    model = RandomForestClassifier(**MODEL_PARAMS).fit(X, y)
+    model.feature_schema_ = SPACY_SCHEMA.id
+    return model
+
+
+def compile_fused(model) -> CompiledForest:
+    """Forêt compilée avec ses étiquettes, au format chargé par router.py."""
+    forest = CompiledForest.from_sklearn(model)
+    forest.info = dict(forest.info, labels=FUSED_LABELS)
+    return forest
+
+
+# ================= 2. DEUX PASSES (RÉFÉRENCE) =================
+def keyword_gate():
+    """Porte actuelle du router (mots-clés + IP + options)."""
+    from router import is_relevant_to_nmap
+    return lambda query: is_relevant_to_nmap(query)[0]
+
+
+def comprehension_gate():
+    """Porte de l'agent de compréhension (Agent_comprehension/comprehension_agents.py)."""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Agent_comprehension"))
+    from comprehension_agents import ComprehensionAgent
+    agent = ComprehensionAgent()
+    return lambda query: agent.understand(query).is_relevant
+
+
+def two_stage_predict(queries: list, X, gate, model) -> np.ndarray:
+    """IRRELEVANT si la porte refuse, sinon la classe de la forêt 3 classes."""
+    preds = np.full(len(queries), IRRELEVANT, dtype=np.int64)
+    relevant = np.array([gate(q) for q in queries], dtype=bool)
+    if relevant.any():
+        preds[relevant] = model.predict(X[relevant])
+    return preds
+
+
+# ================= 3. ÉVALUATION =================
+def evaluate(y_true, y_pred, seconds: float) -> dict:
+    """Précision globale et par classe, précision / rappel de la pertinence."""
+    y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+    per_class = {
+        label: float((y_pred[y_true == c] == c).mean()) if (y_true == c).any() else None
+        for c, label in enumerate(FUSED_LABELS)
+    }
+    kept, relevant = y_pred != IRRELEVANT, y_true != IRRELEVANT
+    return {
+        "accuracy": float((y_true == y_pred).mean()),
+        "per_class_recall": per_class,
+        "relevance_precision": float((kept & relevant).sum() / max(kept.sum(), 1)),
+        "relevance_recall": float((kept & relevant).sum() / max(relevant.sum(), 1)),
+        "complexity_accuracy_on_nmap": float((y_true[relevant] == y_pred[relevant]).mean()),
+        "ms_per_query": seconds * 1000 / max(len(y_true), 1),
+    }
+
+
+def main():
+    from sklearn.model_selection import train_test_split
+
+    parser = argparse.ArgumentParser(description="Modèle fusionné pertinence + complexité (4 classes)")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--negatives", default=NEGATIVES_PATH)
+    parser.add_argument("--store", default=None, help="dossier du feature store (défaut : models/feature_store)")
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--write", action="store_true", help="sauvegarde la forêt 4 classes (FUSED_MODEL_PATH)")
+    parser.add_argument("--output", default=FUSED_MODEL_PATH)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    queries, X, y = load_fused_dataset(args.data, args.negatives, args.store)
+    idx_train, idx_test = train_test_split(
+        np.arange(len(y)), test_size=0.2, random_state=42, stratify=y
+    )
+    test_queries = [queries[i] for i in idx_test]
+    X_test, y_test = X[idx_test], y[idx_test]
+    print(f"{len(y)} requêtes ({int((y == IRRELEVANT).sum())} hors sujet), {len(idx_test)} en test")
+
+    # ================= ENTRAÎNEMENT =================
+    fused = compile_fused(train_forest(X[idx_train], y[idx_train]))
+    positives = idx_train[y[idx_train] != IRRELEVANT]
+    complexity = CompiledForest.from_sklearn(train_forest(X[positives], y[positives]))
+
+    # ================= COMPARAISON =================
+    results = {}
+    start = time.perf_counter()
+    results["fused"] = evaluate(y_test, fused.predict(X_test), time.perf_counter() - start)
+    for name, gate in [("two-stage keywords (router)", keyword_gate()),
+                       ("two-stage comprehension agent", comprehension_gate())]:
+        start = time.perf_counter()
+        preds = two_stage_predict(test_queries, X_test, gate, complexity)
+        results[name] = evaluate(y_test, preds, time.perf_counter() - start)
+
+    print("=" * 92)
+    print("FUSIONNÉ vs DEUX PASSES (partie test)".center(92))
+    print("=" * 92)
+    print(f"{'approche':<32}{'précision':>10}{'complexité':>12}{'pert. P':>9}{'pert. R':>9}"
+          f"{'EASY':>6}{'MED.':>6}{'HARD':>6}{'IRR.':>6}")
+    print("-" * 92)
+    for name, r in results.items():
+        recalls = "".join(f"{r['per_class_recall'][label]:>6.2f}" for label in FUSED_LABELS)
+        print(f"{name:<32}{r['accuracy']:>10.3f}{r['complexity_accuracy_on_nmap']:>12.3f}"
+              f"{r['relevance_precision']:>9.3f}{r['relevance_recall']:>9.3f}{recalls}")
+    print("\ncomplexité = précision sur les seules requêtes Nmap ; pert. P / R = précision / rappel de la pertinence")
+
+    if args.write:
+        fused.save(args.output)
+        print(f"Forêt 4 classes sauvegardée : {args.output} (FUSED_STAGE=1 pour la servir)")
+
+    report = {"rows": int(len(y)), "test_rows": int(len(idx_test)), "labels": FUSED_LABELS, "results": results}
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Remplacement à chaud du modèle servi, sans redémarrage.
+
+Un nouvel artefact (complexity_classifier.pkl, forêt compilée, modèle
+n-grammes...) est chargé à côté du modèle courant, vérifié puis échangé :
+
+1. version : empreinte sha256 des fichiers de l'artefact ; rien n'est fait
+   si elle n'a pas changé ;
+2. schéma : nombre de features et classes attendus (`validate`) ;
+3. préchauffage sur un échantillon des dernières requêtes servies, avec
+   contrôle des probabilités retournées (`warm`) ;
+4. échange atomique de la référence (`swap`) : les requêtes en cours
+   finissent sur l'ancien modèle, qu'elles ont déjà en main.
+
+En cas d'échec à n'importe quelle étape, l'ancien modèle reste en place.
+La surveillance (`start_watching`) compare la taille et la date des
+fichiers ; un changement doit être stable sur deux passages avant le
+rechargement, pour ne pas lire un artefact en cours d'écriture.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+# ================= CONFIGURATION =================
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))  # secondes, 0 = pas de surveillance
+WARMUP_SAMPLE_SIZE = int(os.getenv("WARMUP_SAMPLE_SIZE", "32"))
+
+
+def _files(paths) -> list:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            try:
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+            except FileNotFoundError:  # dossier remplacé pendant le listing (CompiledForest.save)
+                continue
+        elif os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def artifact_signature(paths) -> tuple:
+    """(chemin, taille, date) des fichiers : change dès qu'un fichier est réécrit."""
+    signature = []
+    for path in _files(paths):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:  # remplacé entre le listing et le stat
+            continue
+        signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def artifact_version(paths) -> str:
+    """Empreinte du contenu (12 caractères hexadécimaux), "absent" sans fichier."""
+    files = _files(paths)
+    if not files:
+        return "absent"
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        except FileNotFoundError:
+            continue
+    return digest.hexdigest()[:12]
+
+
+def check_schema(model, n_features, labels) -> None:
+    """Lève ValueError si le modèle n'a pas le nombre de features ou les classes attendus."""
+    classes = [int(c) for c in getattr(model, "classes_", [])]
+    if classes != list(range(len(labels))):
+        raise ValueError(f"Classes {classes} ≠ {list(range(len(labels)))} ({', '.join(labels)})")
+    found = getattr(model, "n_features_in_", None)
+    if n_features is not None and found is not None and int(found) != n_features:
+        raise ValueError(f"{found} features attendues par le modèle, {n_features} produites par l'extraction")
+
+
+class RecentQueries:
+    """Dernières requêtes servies (bornées), pour préchauffer un nouveau modèle."""
+
+    def __init__(self, max_size: int = 256):
+        self._queries = deque(maxlen=max_size)
+
+    def add(self, query: str):
+        self._queries.append(query)
+
+    def extend(self, queries):
+        self._queries.extend(queries)
+
+    def sample(self, n: int) -> list:
+        """Les `n` plus récentes, sans doublons."""
+        return list(dict.fromkeys(reversed(list(self._queries))))[:n]
+
+
+class HotSwapper:
+    """
+    `reload()` recharge l'artefact s'il a changé et retourne un rapport.
+    Les étapes sont injectées pour rester indépendantes du moteur :
+    load() -> modèle ; validate(modèle) lève ValueError ; warm(modèle, requêtes) ;
+    swap(modèle) remplace le modèle servi.
+    """
+
+    def __init__(self, paths, load, validate, warm, swap, recent: RecentQueries = None,
+                 sample_size: int = WARMUP_SAMPLE_SIZE, default_queries=("scan nmap des ports sur 192.168.1.1",)):
+        self.paths = list(paths)
+        self.load = load
+        self.validate = validate
+        self.warm = warm
+        self.swap = swap
+        self.recent = recent if recent is not None else RecentQueries()
+        self.sample_size = sample_size
+        self.default_queries = list(default_queries)
+        self.history = deque(maxlen=20)
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.sync()
+
+    def sync(self):
+        """Le modèle servi correspond à l'artefact actuel (après un chargement ou une sauvegarde)."""
+        self.signature = artifact_signature(self.paths)
+        self.version = artifact_version(self.paths)
+        self.loaded_at = time.time()
+
+    def reload(self, force: bool = False) -> dict:
+        with self._lock:
+            start = time.perf_counter()
+            signature = artifact_signature(self.paths)
+            version = artifact_version(self.paths)
+            report = {"version": version, "previous_version": self.version, "swapped": False}
+
+            if version == self.version and not force:
+                self.signature = signature
+                report["reason"] = "artefact inchangé"
+                return report
+
+            try:
+                model = self.load()
+                self.validate(model)
+                queries = self.recent.sample(self.sample_size) or self.default_queries
+                warm_start = time.perf_counter()
+                self.warm(model, queries)
+                report.update(warmup_queries=len(queries),
+                              warmup_ms=round((time.perf_counter() - warm_start) * 1000, 2))
+            except Exception as e:
+                # L'ancien modèle reste servi ; l'artefact n'est pas retenté tant qu'il ne change pas
+                self.signature = signature
+                report["error"] = f"{type(e).__name__}: {e}"
+                self.history.append({**report, "at": time.time()})
+                return report
+
+            self.swap(model)
+            self.signature, self.version, self.loaded_at = signature, version, time.time()
+            report.update(swapped=True, seconds=round(time.perf_counter() - start, 3))
+            self.history.append({**report, "at": self.loaded_at})
+            return report
+
+    def check(self):
+        """Un passage de surveillance : recharge si la signature a changé et n'a plus bougé."""
+        current = artifact_signature(self.paths)
+        if current == self.signature:
+            self._pending = None
+            return None
+        if current != self._pending:
+            self._pending = current  # peut-être en cours d'écriture : on attend le passage suivant
+            return None
+        self._pending = None
+        return self.reload()
+
+    def start_watching(self, interval: float = MODEL_WATCH_INTERVAL):
+        """Thread démon qui appelle `check()` toutes les `interval` secondes."""
+        if not interval:
+            return None
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    report = self.check()
+                    if report and report.get("swapped"):
+                        print(f"🔄 Modèle remplacé : {report['previous_version']} → {report['version']}")
+                    elif report and report.get("error"):
+                        print(f"⚠️ Nouveau modèle refusé : {report['error']}")
+                except Exception as e:
+                    print(f"⚠️ Surveillance du modèle : {e}")
+
+        self._stop.clear()
+        thread = threading.Thread(target=loop, name="model-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "artifacts": self.paths,
+            "history": list(self.history),
+        }
@@ -14,11 +14,16 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 import pickle
 import re
+from fast_forest import compile_model
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Feature schema of NmapFeatureExtractor (commands, not natural-language queries;
+# see vectorizer.py for the query schemas). Bump on any feature change.
+COMMAND_FEATURE_SCHEMA = "nmap-command/v1"
+
 
 class Neo4jConnector:
     """Connect and manage Neo4j operations"""
@@ -230,6 +235,112 @@ class NmapFeatureExtractor:
         features['complexity_score'] = complexity_score
         
         return features
+    
+    # ========================================================================
+    # VECTORIZED EXTRACTION (one column at a time over a string array)
+    # ========================================================================
+    
+    PORTS_PATTERN = r'-p\s+([\d,\-\*]+)'
+    TIMING_VALUES = ['T0', 'T1', 'T2', 'T3', 'T4', 'T5']
+    
+    @staticmethod
+    def count_ports_column(commands: pd.Series) -> np.ndarray:
+        """
+        Same result as `count_ports` for every command, without building port sets.
+        Each distinct port spec is split into intervals once; the size of their
+        union comes from sorting the intervals and counting what each one adds
+        past the highest end seen so far.
+        """
+        specs = commands.str.extract(NmapFeatureExtractor.PORTS_PATTERN, expand=False)
+        codes, uniques = pd.factorize(specs)  # NaN (no -p) -> code -1
+        counts = np.zeros(len(uniques), dtype=np.int64)
+        
+        uniques = pd.Series(uniques, dtype=object)
+        everything = uniques.isin(['-', '*']).to_numpy()
+        counts[everything] = 65535
+        
+        parts = uniques[~everything].str.split(',').explode()
+        # Anything else makes int() fail in count_ports ('', '80-', '1-2-3', '8*')
+        invalid = ~parts.str.fullmatch(r'\d+(?:-\d+)?').astype(bool)
+        if invalid.any():
+            bad = uniques[invalid.index[invalid.to_numpy()][0]]
+            raise ValueError(f"Invalid port specification: {bad!r}")
+        
+        bounds = parts.str.split('-', n=1, expand=True).reindex(columns=[0, 1])
+        spec = bounds.index.to_numpy()
+        start = pd.to_numeric(bounds[0]).to_numpy(dtype=np.int64)
+        end = pd.to_numeric(bounds[1].fillna(bounds[0])).to_numpy(dtype=np.int64)
+        keep = end >= start  # reversed ranges add no ports
+        spec, start, end = spec[keep], start[keep], end[keep]
+        
+        order = np.lexsort((start, spec))
+        spec, start, end = spec[order], start[order], end[order]
+        # Highest port already covered by earlier intervals of the same spec
+        covered = pd.Series(end).groupby(spec).cummax().groupby(spec).shift(1)
+        covered = covered.fillna(-1).astype(np.int64).to_numpy()
+        added = np.clip(end - np.maximum(start, covered + 1) + 1, 0, None)
+        np.add.at(counts, spec, added)
+        
+        # Code -1 (no -p) reads a trailing 0
+        return np.append(counts, 0)[codes]
+    
+    @staticmethod
+    def extract_features_frame(commands) -> pd.DataFrame:
+        """
+        Same frame as `pd.DataFrame([extract_features(c) for c in commands])`
+        (columns, order, dtypes), computed column-wise. Repeated commands are
+        only scanned once.
+        """
+        codes, uniques = pd.factorize(pd.Series(commands, dtype=object))
+        if (codes < 0).any():
+            raise TypeError("Commands must be strings")
+        uniques = pd.Series(uniques, dtype=object)
+        has = lambda token: uniques.str.contains(token, regex=False).to_numpy(dtype=bool)
+        
+        sn, sV, O, script = has('-sn'), has('-sV'), has('-O'), has('--script')
+        sS, sT, sU, sA, sM = has('-sS'), has('-sT'), has('-sU'), has('-sA'), has('-sM')
+        traceroute = has('--traceroute')
+        fragment = has('-f') | has('fragment')
+        decoy = has('decoy') | has('spoof')
+        
+        # First timing value in T0..T5 order, -1 when absent
+        timing_value = np.full(len(uniques), -1, dtype=np.int64)
+        for timing in reversed(NmapFeatureExtractor.TIMING_VALUES):
+            timing_value[has(f'-{timing}')] = int(timing[1])
+        
+        columns = {
+            'has_service_detection': sV,
+            'has_os_detection': O,
+            'has_scripts': script,
+            'has_timing': timing_value >= 0,
+            'has_stealth': sS | fragment | decoy,
+            'ports_count': NmapFeatureExtractor.count_ports_column(uniques),
+            'is_ipv6': has('-6'),
+            'scan_type_count': sS.astype(np.int64) + sT + sU + sn + sA + sM,
+            'has_traceroute': traceroute,
+            'has_output_file': has('-oN') | has('-oX'),
+            'has_version_detection': sV,
+            'is_syn_scan': sS,
+            'is_udp_scan': sU,
+            'is_tcp_connect': sT,
+            'is_ping_scan': sn,
+        }
+        score = (sn * 1 + sV * 2 + O * 2 + script * 2 + sS * 3 + sU * 2
+                 + traceroute * 1 + fragment * 3 + decoy * 4)
+        frame = pd.DataFrame({name: np.asarray(values, dtype=np.int64)[codes] for name, values in columns.items()})
+        
+        # 'timing_value' only exists in the dicts that have a timing flag: the
+        # column sits before 'complexity_score' if the first command has one,
+        # after it otherwise, and holds NaN wherever it is missing
+        timing_value = timing_value[codes]
+        has_timing = timing_value >= 0
+        timing = pd.Series(timing_value) if has_timing.all() else pd.Series(timing_value).where(has_timing)
+        if len(codes) and has_timing[0]:
+            frame['timing_value'] = timing
+        frame['complexity_score'] = np.asarray(score, dtype=np.int64)[codes]
+        if has_timing.any() and not has_timing[0]:
+            frame['timing_value'] = timing
+        return frame
 
 
 class HybridNmapClassifier:
@@ -245,6 +356,7 @@ class HybridNmapClassifier:
         self.neo4j = Neo4jConnector(neo4j_uri) if neo4j_uri else None
         self.feature_extractor = NmapFeatureExtractor()
         self.model = None
+        self.compiled_model = None
         self.le_complexity = LabelEncoder()
         self.feature_names = []
         logger.info("🚀 Hybrid Classifier initialized!")
@@ -256,13 +368,8 @@ class HybridNmapClassifier:
         df = pd.read_csv(dataset_path)
         logger.info(f"✅ Loaded {len(df)} samples")
         
-        # Extract features for all commands
-        feature_list = []
-        for cmd in df['command']:
-            features = self.feature_extractor.extract_features(cmd)
-            feature_list.append(features)
-        
-        feature_df = pd.DataFrame(feature_list)
+        # Extract features for all commands (column-wise)
+        feature_df = self.feature_extractor.extract_features_frame(df['command'])
         self.feature_names = feature_df.columns.tolist()
         
         X = feature_df.values
@@ -276,6 +383,7 @@ class HybridNmapClassifier:
             random_state=42
         )
         self.model.fit(X, y)
+        self.compiled_model = compile_model(self.model)
         
         # Calculate accuracy
         train_score = self.model.score(X, y)
@@ -308,9 +416,10 @@ class HybridNmapClassifier:
         feature_values = [features.get(name, 0) for name in self.feature_names]
         
         # ML Prediction
-        ml_pred_idx = self.model.predict([feature_values])[0]
+        probabilities = self.compiled_model.predict_proba([feature_values])[0]
+        ml_pred_idx = self.compiled_model.classes_[probabilities.argmax()]
         ml_complexity = self.le_complexity.classes_[ml_pred_idx]
-        ml_confidence = self.model.predict_proba([feature_values])[0][ml_pred_idx]
+        ml_confidence = probabilities[ml_pred_idx]
         
         # Rule-based prediction
         rule_complexity = self._rule_based_predict(command, features)
@@ -358,15 +467,53 @@ class HybridNmapClassifier:
         # Otherwise, trust rule-based
         return rule_pred
     
-    def batch_predict(self, commands: List[str]) -> pd.DataFrame:
-        """Predict multiple commands"""
-        results = []
-        for cmd in commands:
-            pred = self.predict(cmd)
-            if pred:
-                results.append(pred)
-        
-        return pd.DataFrame(results)
+    def batch_predict(self, commands: List[str], include_features: bool = True) -> pd.DataFrame:
+        """
+        Predict multiple commands: same rows as `predict()` on each command,
+        with features, model and rules evaluated over whole columns.
+        `include_features=False` skips the per-row 'features' dicts.
+        """
+        if not self.model:
+            logger.error("❌ Model not trained!")
+            return pd.DataFrame()
+        
+        commands = pd.Series(commands, dtype=object).reset_index(drop=True)
+        feature_df = self.feature_extractor.extract_features_frame(commands)
+        # Missing features count as 0, like features.get(name, 0) in predict()
+        X = feature_df.reindex(columns=self.feature_names, fill_value=0).fillna(0).to_numpy()
+        
+        # ML Prediction
+        probabilities = self.compiled_model.predict_proba(X)
+        ml_pred_idx = self.compiled_model.classes_[probabilities.argmax(axis=1)]
+        ml_complexity = self.le_complexity.classes_[ml_pred_idx]
+        ml_confidence = probabilities[np.arange(len(X)), ml_pred_idx]
+        
+        # Rule-based prediction (same thresholds as _rule_based_predict)
+        score = feature_df['complexity_score'].to_numpy()
+        ping_only = ((feature_df['is_ping_scan'] == 1) & (feature_df['has_version_detection'] == 0)
+                     & (feature_df['has_os_detection'] == 0)).to_numpy()
+        rule_complexity = np.where(ping_only, 'EASY',
+                                   np.where(score >= 8, 'HARD', np.where(score >= 4, 'MEDIUM', 'EASY')))
+        
+        # Ensemble prediction (same logic as _ensemble_predict)
+        final_complexity = np.where((ml_complexity == rule_complexity) | (ml_confidence > 0.85),
+                                    ml_complexity, rule_complexity)
+        
+        results = pd.DataFrame({
+            'command': commands,
+            'ml_prediction': ml_complexity,
+            'ml_confidence': ml_confidence,
+            'rule_prediction': rule_complexity,
+            'final_prediction': final_complexity,
+        })
+        if include_features:
+            records = feature_df.to_dict('records')
+            if 'timing_value' in feature_df:
+                for i in np.flatnonzero(feature_df['timing_value'].isna().to_numpy()):
+                    del records[i]['timing_value']
+            results['features'] = records
+        results['complexity_score'] = score
+        return results
     
     def save_model(self, path: str):
         """Save trained model"""
@@ -374,7 +521,8 @@ class HybridNmapClassifier:
             pickle.dump({
                 'model': self.model,
                 'le_complexity': self.le_complexity,
-                'feature_names': self.feature_names
+                'feature_names': self.feature_names,
+                'feature_schema': COMMAND_FEATURE_SCHEMA
             }, f)
         logger.info(f"💾 Model saved to {path}")
     
@@ -382,9 +530,13 @@ class HybridNmapClassifier:
         """Load trained model"""
         with open(path, 'rb') as f:
             data = pickle.load(f)
+            schema = data.get('feature_schema', COMMAND_FEATURE_SCHEMA)
+            if schema != COMMAND_FEATURE_SCHEMA:
+                raise ValueError(f"Model trained on feature schema {schema}, extractor computes {COMMAND_FEATURE_SCHEMA}")
             self.model = data['model']
             self.le_complexity = data['le_complexity']
             self.feature_names = data['feature_names']
+        self.compiled_model = compile_model(self.model)
         logger.info(f"✅ Model loaded from {path}")
 
 
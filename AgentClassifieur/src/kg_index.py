@@ -0,0 +1,201 @@
+"""
+Index mémoire du Knowledge Graph pour les 6 features KG.
+
+Les noeuds Option / ScanType / Port / Script sont peu nombreux et quasi
+statiques : on les charge une fois dans des dicts (noms, fréquences,
+nombre de relations, catégories) au lieu de lancer cinq requêtes Cypher
+`UNWIND $terms` par requête utilisateur. L'index se sérialise en JSON
+(`models/kg_index.json`) pour être utilisé sans Neo4j, et peut se
+rafraîchir en arrière-plan depuis Neo4j.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# ================= CONFIGURATION =================
+KG_INDEX_PATH = "models/kg_index.json"
+KG_INDEX_VERSION = 1
+KG_REFRESH_INTERVAL = 300  # secondes, 0 = pas de rafraîchissement
+
+# Mêmes barèmes que l'ancienne version Cypher de enrich_with_kg.py
+SCAN_TYPE_SCORES = {"syn": 2, "tcp": 2, "udp": 3, "fin": 4, "null": 4, "xmas": 4, "idle": 5}
+SCRIPT_CATEGORY_SCORES = {"default": 1, "safe": 1, "vuln": 3, "exploit": 5, "bruteforce": 5}
+
+# ================= REQUÊTES DE CHARGEMENT =================
+OPTIONS_QUERY = """
+    MATCH (o:Option)
+    OPTIONAL MATCH (o)-[r]->()
+    WITH o, count(r) AS relations
+    RETURN o.name AS name, coalesce(o.frequency, 0) AS freq, relations
+"""
+SCAN_TYPES_QUERY = "MATCH (s:ScanType) RETURN s.name AS name"
+PORTS_QUERY = "MATCH (p:Port) RETURN p.number AS number"
+SCRIPTS_QUERY = "MATCH (s:Script) RETURN s.name AS name, s.category AS category"
+
+
+class KGFeatureIndex:
+    """
+    Snapshot immuable du KG, remplacé d'un bloc lors d'un rafraîchissement :
+    un calcul en cours lit toujours un snapshot cohérent.
+
+    Chaque entrée garde une valeur par noeud, pour reproduire exactement les
+    comptages de `UNWIND $terms ... MATCH` (plusieurs noeuds de même nom,
+    termes répétés dans la requête).
+    """
+
+    def __init__(self, options=None, scan_types=None, ports=None, scripts=None, built_at=None):
+        self._snapshot = self._build_snapshot(options or [], scan_types or [], ports or [], scripts or [])
+        self.built_at = built_at
+
+    @staticmethod
+    def _build_snapshot(options, scan_types, ports, scripts):
+        # options : [(name, freq, relations)] ; scan_types : [name]
+        # ports : [number] ; scripts : [(name, category)]
+        opt = {}
+        for name, freq, relations in options:
+            opt.setdefault(name, []).append((freq, relations))
+        st = {}
+        for name in scan_types:
+            if name is not None:
+                st.setdefault(name, []).append(SCAN_TYPE_SCORES.get(name.lower(), 0))
+        sc = {}
+        for name, category in scripts:
+            sc.setdefault(name, []).append(SCRIPT_CATEGORY_SCORES.get((category or "").lower(), 0))
+        return {
+            "options": opt,
+            "scan_types": st,
+            "ports": frozenset(p for p in ports if p is not None),
+            "scripts": sc,
+            "raw": {
+                "options": [list(o) for o in options],
+                "scan_types": list(scan_types),
+                "ports": list(ports),
+                "scripts": [list(s) for s in scripts],
+            },
+        }
+
+    # ================= CALCUL DES FEATURES =================
+    def compute(self, terms) -> list:
+        """
+        Retourne les 6 features KG pour une liste de termes :
+        [kg_options, kg_relations, kg_freq,
+         kg_scan_score, kg_ports_count, kg_scripts_score]
+        """
+        snap = self._snapshot
+        options, scan_types, scripts = snap["options"], snap["scan_types"], snap["scripts"]
+
+        kg_relations = 0
+        freq_values = []
+        kg_scan_score = 0
+        kg_scripts_score = 0
+        matched_options = set()
+        matched_ports = set()
+
+        for term in terms:
+            nodes = options.get(term)
+            if nodes:
+                matched_options.add(term)
+                for freq, relations in nodes:
+                    freq_values.append(freq)
+                    kg_relations += relations
+            scores = scan_types.get(term)
+            if scores:
+                kg_scan_score += sum(scores)
+            if term in snap["ports"]:
+                matched_ports.add(term)
+            scores = scripts.get(term)
+            if scores:
+                kg_scripts_score += sum(scores)
+
+        kg_options = sum(len(options[name]) for name in matched_options)
+        kg_freq = sum(freq_values) / len(freq_values) if freq_values else 0.0
+
+        return [
+            kg_options,
+            kg_relations,
+            kg_freq,
+            kg_scan_score,
+            len(matched_ports),
+            kg_scripts_score
+        ]
+
+    def __len__(self):
+        snap = self._snapshot
+        return len(snap["options"]) + len(snap["scan_types"]) + len(snap["ports"]) + len(snap["scripts"])
+
+    # ================= CHARGEMENT DEPUIS NEO4J =================
+    @classmethod
+    def from_neo4j(cls, driver):
+        index = cls()
+        index.refresh(driver)
+        return index
+
+    def refresh(self, driver):
+        """Recharge les noeuds depuis Neo4j puis remplace le snapshot."""
+        with driver.session() as session:
+            options = [(r["name"], r["freq"], r["relations"]) for r in session.run(OPTIONS_QUERY)]
+            scan_types = [r["name"] for r in session.run(SCAN_TYPES_QUERY)]
+            ports = [r["number"] for r in session.run(PORTS_QUERY)]
+            scripts = [(r["name"], r["category"]) for r in session.run(SCRIPTS_QUERY)]
+        self._snapshot = self._build_snapshot(options, scan_types, ports, scripts)
+        self.built_at = time.time()
+
+    def start_background_refresh(self, driver_factory, interval: float = KG_REFRESH_INTERVAL, stop_event=None):
+        """
+        Lance un thread démon qui rafraîchit l'index toutes les `interval`
+        secondes, jusqu'à `stop_event.set()` s'il est fourni. En cas d'erreur
+        Neo4j, le snapshot courant est conservé et l'erreur journalisée.
+        """
+        if not interval:
+            return None
+        stop_event = stop_event or threading.Event()
+
+        def loop():
+            while not stop_event.wait(interval):
+                try:
+                    self.refresh(driver_factory())
+                except Exception as e:
+                    logger.warning("Rafraîchissement de l'index KG échoué, snapshot conservé : %s", e)
+
+        thread = threading.Thread(target=loop, name="kg-index-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    # ================= ARTEFACT SÉRIALISÉ =================
+    def save(self, path: str = KG_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"version": KG_INDEX_VERSION, "built_at": self.built_at}
+        data.update(self._snapshot["raw"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str = KG_INDEX_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != KG_INDEX_VERSION:
+            raise ValueError(f"Version d'index KG non supportée : {data.get('version')}")
+        return cls(
+            options=[tuple(o) for o in data["options"]],
+            scan_types=data["scan_types"],
+            ports=data["ports"],
+            scripts=[tuple(s) for s in data["scripts"]],
+            built_at=data.get("built_at"),
+        )
+
+
+# ================= EXPORT EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    from enrich_with_kg import get_driver, close_kg_connection
+
+    index = KGFeatureIndex.from_neo4j(get_driver())
+    index.save()
+    close_kg_connection()
+    print(f"Index KG : {len(index)} entrées sauvegardées dans {KG_INDEX_PATH}")
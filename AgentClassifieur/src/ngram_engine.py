@@ -0,0 +1,155 @@
+"""
+Moteur de classification léger : n-grammes hachés + modèle linéaire.
+
+Ni spaCy ni Neo4j : la requête (en minuscules) est découpée en n-grammes
+de caractères (2 à 4, bornés aux mots) et de mots (1 à 2), chacun haché
+(crc32) dans un espace de taille fixe `n_features`. Le vecteur creux est
+normalisé L2 puis passé à une régression logistique multinomiale.
+
+À l'inférence, pas de matrice creuse : on additionne directement les
+lignes de poids des n-grammes présents (`weights[indices]`), puis softmax.
+Environ 0,1 ms par requête, sans dépendance au-delà de NumPy.
+
+Entraînement (depuis AgentClassifieur/), même CSV et même découpage que
+train_classifier.py :
+    python src/ngram_engine.py      # écrit models/ngram_classifier.npz
+"""
+
+import json
+import os
+import re
+import zlib
+import numpy as np
+
+# ================= CONFIGURATION =================
+NGRAM_MODEL_PATH = "models/ngram_classifier.npz"
+N_FEATURES = 2 ** 16
+CHAR_NGRAMS = (2, 4)
+WORD_NGRAMS = (1, 2)
+LABELS = ["EASY", "MEDIUM", "HARD"]
+
+_WORD = re.compile(r"[^\s,;]+")
+_crc32 = zlib.crc32
+
+
+class NgramEngine:
+    """Même interface que la forêt compilée : `predict_proba`, `predict`, `classes_`."""
+
+    def __init__(self, n_features: int = N_FEATURES, char_ngrams=CHAR_NGRAMS, word_ngrams=WORD_NGRAMS,
+                 weights=None, bias=None, classes=(0, 1, 2)):
+        self.n_features = int(n_features)
+        self.char_ngrams = tuple(char_ngrams)
+        self.word_ngrams = tuple(word_ngrams)
+        # weights : (n_features, n_classes), une ligne par seau de hachage
+        self.weights = weights
+        self.bias = bias
+        self.classes_ = np.asarray(classes)
+
+    # ================= HACHAGE =================
+    def ngrams(self, query: str) -> list:
+        words = _WORD.findall(query.lower())
+        grams = []
+        lo, hi = self.word_ngrams
+        for n in range(lo, hi + 1):
+            grams.extend("w:" + " ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        lo, hi = self.char_ngrams
+        for word in words:
+            padded = f" {word} "
+            for n in range(lo, hi + 1):
+                grams.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+        return grams
+
+    def hashed(self, query: str):
+        """(indices, valeurs) du vecteur creux normalisé L2."""
+        grams = self.ngrams(query)
+        if not grams:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        buckets = np.fromiter((_crc32(g.encode("utf-8")) for g in grams), dtype=np.uint32, count=len(grams))
+        indices, counts = np.unique(buckets % self.n_features, return_counts=True)
+        values = counts.astype(np.float64)
+        return indices.astype(np.int64), values / np.sqrt((values ** 2).sum())
+
+    def transform(self, queries):
+        """Matrice creuse (n_requêtes, n_features) pour l'entraînement."""
+        from scipy.sparse import csr_matrix
+        rows, cols, data = [], [], []
+        for row, query in enumerate(queries):
+            indices, values = self.hashed(query)
+            rows.extend([row] * len(indices))
+            cols.extend(indices.tolist())
+            data.extend(values.tolist())
+        return csr_matrix((data, (rows, cols)), shape=(len(queries), self.n_features))
+
+    # ================= ENTRAÎNEMENT =================
+    def fit(self, queries, y, C: float = 10.0):
+        from sklearn.linear_model import LogisticRegression
+        model = LogisticRegression(C=C, max_iter=2000, class_weight="balanced")
+        model.fit(self.transform(queries), y)
+        coef, intercept = model.coef_, model.intercept_
+        if coef.shape[0] == 1:  # deux classes : sklearn ne garde qu'une ligne
+            coef, intercept = np.vstack([-coef, coef]) / 2, np.array([-intercept[0], intercept[0]]) / 2
+        self.weights = np.ascontiguousarray(coef.T, dtype=np.float32)
+        self.bias = intercept.astype(np.float32)
+        self.classes_ = model.classes_
+        return self
+
+    # ================= INFÉRENCE =================
+    def decision_function(self, queries) -> np.ndarray:
+        if isinstance(queries, str):
+            queries = [queries]
+        scores = np.empty((len(queries), len(self.bias)))
+        for row, query in enumerate(queries):
+            indices, values = self.hashed(query)
+            scores[row] = values @ self.weights[indices] + self.bias
+        return scores
+
+    def predict_proba(self, queries) -> np.ndarray:
+        scores = self.decision_function(queries)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, queries) -> np.ndarray:
+        return self.classes_[np.argmax(self.decision_function(queries), axis=1)]
+
+    # ================= SAUVEGARDE =================
+    def save(self, path: str = NGRAM_MODEL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path, weights=self.weights, bias=self.bias, classes=self.classes_,
+            config=np.asarray(json.dumps({
+                "n_features": self.n_features,
+                "char_ngrams": self.char_ngrams,
+                "word_ngrams": self.word_ngrams,
+            })),
+        )
+
+    @classmethod
+    def load(cls, path: str = NGRAM_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            return cls(weights=data["weights"], bias=data["bias"], classes=data["classes"], **config)
+
+
+# ================= ENTRAÎNEMENT EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    import pandas as pd
+    from sklearn.metrics import accuracy_score, classification_report
+    from sklearn.model_selection import train_test_split
+
+    DATA_PATH = "data/data_personn3.csv"
+    df = pd.read_csv(DATA_PATH)
+    y = df["complexity"].str.strip().str.lower().map({"easy": 0, "medium": 1, "hard": 2})
+    X_train, X_test, y_train, y_test = train_test_split(
+        df["query"].tolist(), y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    engine = NgramEngine().fit(X_train, y_train)
+    preds = engine.predict(X_test)
+    print(f"Précision sur le jeu de test : {accuracy_score(y_test, preds) * 100:.2f} %\n")
+    print(classification_report(y_test, preds, target_names=LABELS))
+
+    engine.save()
+    print(f"Modèle n-grammes sauvegardé : {NGRAM_MODEL_PATH}")
@@ -0,0 +1,117 @@
+"""
+Mise à jour incrémentale du classifieur à partir du feedback (feedback_store.py).
+
+Au lieu de relancer train_classifier.py (extraction complète + 300 arbres),
+on entraîne quelques arbres supplémentaires sur les seules nouvelles
+corrections, avec les vecteurs déjà stockés, et on les ajoute à la forêt
+compilée. La forêt retient dans `info["feedback_offset"]` la position du
+journal déjà intégrée : une correction n'est apprise qu'une fois, même
+après redémarrage.
+
+Le poids du feedback dépend du nombre d'arbres ajoutés par mise à jour
+(vote à parts égales entre tous les arbres) : ONLINE_TREES=20 face aux 300
+arbres d'origine pèse environ 6 %.
+
+Usage (depuis AgentClassifieur/) :
+    python src/online_trainer.py      # intègre le feedback en attente à l'export
+"""
+
+import os
+import threading
+import time
+
+from sklearn.ensemble import RandomForestClassifier
+
+from extract_features import FEATURE_EXTRACTOR_VERSION, group_columns
+from fast_forest import CompiledForest, FOREST_PATH, MODEL_PATH, load_classifier
+from feedback_store import FeedbackStore
+from vectorizer import SPACY_SCHEMA, check_feature_schema
+
+# ================= CONFIGURATION =================
+ONLINE_TREES = int(os.getenv("ONLINE_TREES", "20"))
+ONLINE_MIN_SAMPLES = int(os.getenv("ONLINE_MIN_SAMPLES", "5"))
+
+
+def train_trees(X, y, n_trees: int = ONLINE_TREES, random_state: int = 42) -> CompiledForest:
+    """Petite forêt entraînée uniquement sur (X, y), déjà compilée."""
+    model = RandomForestClassifier(
+        n_estimators=n_trees,
+        random_state=random_state,
+        class_weight="balanced",
+    )
+    model.fit(X, y)
+    return CompiledForest.from_sklearn(model)
+
+
+class OnlineTrainer:
+    """
+    `update(forest)` retourne (nouvelle forêt ou None, rapport). La forêt
+    passée n'est pas modifiée : l'appelant échange la référence (cf.
+    router.set_classifier), les prédictions en cours finissent sur l'ancienne.
+    """
+
+    def __init__(self, store: FeedbackStore = None, forest_path: str = FOREST_PATH,
+                 n_trees: int = ONLINE_TREES, min_samples: int = ONLINE_MIN_SAMPLES,
+                 version: int = FEATURE_EXTRACTOR_VERSION):
+        self.store = store if store is not None else FeedbackStore()
+        self.forest_path = forest_path
+        self.n_trees = n_trees
+        self.min_samples = min_samples
+        self.version = version
+        self._lock = threading.Lock()
+
+    def pending(self, forest: CompiledForest) -> int:
+        """Nombre de corrections pas encore intégrées à `forest`."""
+        _, y, _ = self.store.load(forest.info.get("feedback_offset", 0), self.version)
+        return len(y)
+
+    def update(self, forest: CompiledForest):
+        if not isinstance(forest, CompiledForest):
+            raise TypeError("La mise à jour incrémentale nécessite une forêt compilée (fast_forest.py)")
+        # Les corrections sont vectorisées par extract_features.py (spacy/v1),
+        # comme les forêts antérieures aux schémas servies par router.py
+        check_feature_schema(forest, SPACY_SCHEMA, assume=SPACY_SCHEMA.id)
+
+        with self._lock:
+            start = time.perf_counter()
+            offset = forest.info.get("feedback_offset", 0)
+            X, y, end = self.store.load(offset, self.version)
+            report = {
+                "new_samples": len(y),
+                "feedback_offset": end,
+                "trees_before": len(forest.roots),
+            }
+
+            if len(y) < self.min_samples:
+                report.update(updated=False, trees_after=len(forest.roots),
+                              reason=f"moins de {self.min_samples} nouvelles corrections")
+                return None, report
+
+            groups = forest.info.get("feature_groups")
+            if groups:  # forêt réduite (select_features.py) : mêmes colonnes que ses arbres
+                X = X[:, group_columns(groups)]
+            new_trees = train_trees(X, y, self.n_trees, random_state=end)
+            updated = forest.append(new_trees)
+            updated.info.update(
+                feedback_offset=end,
+                online_updates=forest.info.get("online_updates", 0) + 1,
+                base_trees=forest.info.get("base_trees", len(forest.roots)),
+            )
+            if self.forest_path:
+                updated.save(self.forest_path)
+
+            report.update(
+                updated=True,
+                trees_after=len(updated.roots),
+                seconds=round(time.perf_counter() - start, 3),
+            )
+            return updated, report
+
+
+# ================= MISE À JOUR EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    forest = load_classifier(MODEL_PATH, FOREST_PATH)
+    updated, report = OnlineTrainer().update(forest)
+    print(report)
+    if updated is not None:
+        print(f"Forêt mise à jour : {report['trees_after']} arbres, sauvegardée dans {FOREST_PATH}")
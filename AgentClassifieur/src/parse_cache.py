@@ -0,0 +1,116 @@
+"""
+Parses spaCy d'un jeu de données gardés sur disque (`DocBin`).
+
+Réentraîner après un changement des features (liste de mots-clés, nouvelle
+colonne...) ne change pas le parse : tokens, POS et entités de chaque
+requête sont sérialisés une fois par jeu de données dans
+`models/parse_cache/<dataset>-<clé>/docs.spacy`, la clé étant le hash de :
+- contenu du CSV (sha256) et colonne des requêtes
+- nom et version du modèle spaCy, version de spaCy
+
+Sur un hit, les docs sont relus avec un `Vocab` vide (les chaînes sont
+dans le DocBin) : ni chargement de fr_core_news_sm ni `nlp.pipe`. Les
+features se recalculent ensuite en quelques millisecondes
+(`extract_features.features_from_doc`).
+
+Usage (depuis AgentClassifieur/) :
+    python src/parse_cache.py [data/data_personn3.csv]   # remplit le cache
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from extract_features import SPACY_MODEL, features_from_doc, get_nlp
+from feature_store import _sha256
+
+# ================= CONFIGURATION =================
+PARSE_CACHE_DIR = "models/parse_cache"
+
+
+def model_fingerprint(nlp=None) -> dict:
+    """Modèle spaCy qui produit les parses : celui passé, sinon SPACY_MODEL (sans le charger)."""
+    import spacy
+    if nlp is not None:
+        name = f"{nlp.meta.get('lang')}_{nlp.meta.get('name')}"
+        version = nlp.meta.get("version")
+    else:
+        name, version = SPACY_MODEL, spacy.util.get_package_version(SPACY_MODEL)
+    return {"spacy_model": name, "spacy_model_version": version, "spacy_version": spacy.__version__}
+
+
+def parse_key(data_path: str, query_col: str = "query", nlp=None) -> dict:
+    """Entrées dont dépendent les parses, et leur hash combiné (`key`)."""
+    meta = {
+        "dataset": os.path.basename(data_path),
+        "dataset_sha256": _sha256(data_path),
+        "query_col": query_col,
+        **model_fingerprint(nlp),
+    }
+    meta["key"] = hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+    return meta
+
+
+def load_or_parse(data_path: str, query_col: str = "query", cache_dir: str = PARSE_CACHE_DIR,
+                  nlp=None, batch_size: int = 64, verbose: bool = True):
+    """
+    Retourne (requêtes, docs, meta) : un doc par ligne du CSV, parse de
+    `requête.lower()` comme dans extract_features.py. `nlp` : pipeline à
+    utiliser (par défaut celui de extract_features, chargé seulement si le
+    cache est absent).
+    """
+    from spacy.tokens import DocBin
+    from spacy.vocab import Vocab
+
+    queries = [q if isinstance(q, str) else "" for q in pd.read_csv(data_path)[query_col].tolist()]
+    meta = parse_key(data_path, query_col, nlp)
+    name = os.path.splitext(meta["dataset"])[0]
+    path = os.path.join(cache_dir, f"{name}-{meta['key'][:16]}")
+
+    if os.path.exists(os.path.join(path, "meta.json")):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("key") == meta["key"]:
+            docs = list(DocBin().from_disk(os.path.join(path, "docs.spacy")).get_docs(Vocab()))
+            if len(docs) == len(queries):
+                if verbose:
+                    print(f"Parses spaCy relus depuis {path}")
+                return queries, docs, stored
+
+    nlp = nlp if nlp is not None else get_nlp()
+    if verbose:
+        print(f"Parse spaCy de {len(queries)} requêtes...")
+    start = time.perf_counter()
+    docs = list(nlp.pipe((q.lower() for q in queries), batch_size=batch_size))
+    meta.update(rows=len(docs), parse_seconds=round(time.perf_counter() - start, 3), created_at=time.time())
+
+    os.makedirs(path, exist_ok=True)
+    DocBin(docs=docs).to_disk(os.path.join(path, "docs.spacy"))
+    # meta.json en dernier : sa présence marque un cache complet
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    if verbose:
+        print(f"Parses sauvegardés dans {path}")
+    return queries, docs, meta
+
+
+def features_from_docs(queries: list, docs: list, kg: bool = True) -> list:
+    """`extract_features_batch(queries)` à partir de parses déjà calculés."""
+    return [features_from_doc(q, doc, kg) for q, doc in zip(queries, docs)]
+
+
+def extract_dataset(data_path: str, query_col: str = "query", cache_dir: str = PARSE_CACHE_DIR) -> list:
+    """Vecteurs de features de toutes les lignes du CSV, depuis le cache de parses."""
+    queries, docs, _ = load_or_parse(data_path, query_col, cache_dir)
+    return features_from_docs(queries, docs)
+
+
+# ================= REMPLISSAGE EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    import sys
+    data_path = sys.argv[1] if len(sys.argv) > 1 else "data/data_personn3.csv"
+    _, docs, meta = load_or_parse(data_path)
+    print(f"{len(docs)} docs, clé {meta['key'][:16]} ({meta['spacy_model']} {meta['spacy_model_version']})")
@@ -0,0 +1,118 @@
+"""
+Lanceur prefork pour api.py.
+
+Le parent charge une seule fois le modèle (forêt compilée mappée en
+mémoire), spaCy et l'index KG, puis forke les workers uvicorn qui
+partagent la même socket d'écoute. Les pages déjà chargées restent
+partagées en copy-on-write : chaque worker ne paie que sa mémoire propre.
+
+Usage (depuis AgentClassifieur/) :
+    python src/prefork.py --workers 4 --port 8001
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+
+import uvicorn
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Charge toutes les ressources lourdes dans le parent, avant le fork."""
+    import api  # noqa: F401  (modules importés une fois pour tous les workers)
+    from router import warmup
+    from enrich_with_kg import close_kg_connection
+
+    warmup()
+    # Chaque worker ouvre sa propre connexion Neo4j (sockets non partageables)
+    close_kg_connection()
+
+    # Objets du parent exclus du GC : le GC ne réécrit pas leurs pages dans les workers
+    gc.collect()
+    gc.freeze()
+
+
+def run_worker(sock: socket.socket, log_level: str):
+    import api
+    from enrich_with_kg import after_fork
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    after_fork()
+
+    server = uvicorn.Server(uvicorn.Config(api.app, log_level=log_level))
+    server.run(sockets=[sock])
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lanceur prefork de l'API de classification")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("prefork.py nécessite os.fork (Linux/macOS). Sous Windows : python src/api.py")
+
+    sock = bind_socket(args.host, args.port)
+    print(f"Préchargement du modèle dans le parent (pid {os.getpid()})...")
+    preload()
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, args.log_level)
+        children.add(pid)
+        print(f"Worker démarré (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        spawn()
+    print(f"API prête sur http://{args.host}:{args.port} ({args.workers} workers)")
+
+    # Surveille les workers et remplace ceux qui meurent
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} arrêté (statut {status}), redémarrage...")
+            spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,144 @@
-import joblib
 import os
-from extract_features import extract_features  # ← Retourne une LISTE
+import numpy as np
+from extract_features import (N_FEATURES, extract_feature_groups, get_features, get_features_batch,  # ← Retourne une LISTE (cache LRU)
+                              get_nlp, group_columns)
+from fast_forest import FOREST_PATH, CompiledForest, load_classifier
+from fused_classifier import FUSED_LABELS, FUSED_MODEL_PATH
+from cascade import CASCADE_RULES_PATH, CASCADE_THRESHOLD, CascadeClassifier, KeywordTier
+from hot_swap import HotSwapper, RecentQueries, check_schema
+from ngram_engine import NGRAM_MODEL_PATH, NgramEngine
+from utils import LazyResource
+from vectorizer import SPACY_SCHEMA, check_feature_schema
 
 # ================= CONFIGURATION =================
 MODEL_PATH = "models/complexity_classifier.pkl"
-LABELS = ["EASY", "MEDIUM", "HARD"]
+# Forêt compilée servie ; ex. un modèle réduit de select_features.py (models/reduced/<groupes>)
+FOREST_MODEL_PATH = os.getenv("FOREST_MODEL_PATH", FOREST_PATH)
 
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"Modèle non trouvé : {MODEL_PATH}. Lance d'abord train_classifier.py")
+# Étape fusionnée : une forêt 4 classes (IRRELEVANT compris) remplace la
+# vérification de pertinence + la forêt 3 classes (cf. fused_classifier.py)
+FUSED_STAGE = os.getenv("FUSED_STAGE", "0") == "1"
+LABELS = FUSED_LABELS if FUSED_STAGE else ["EASY", "MEDIUM", "HARD"]
 
-print("Chargement du modèle de classification de complexité...")
-classifier = joblib.load(MODEL_PATH)
-print("Modèle chargé avec succès !\n")
+# Moteur : "forest" (spaCy + KG + Random Forest) ou "ngram" (n-grammes hachés, cf. ngram_engine.py)
+CLASSIFIER_ENGINE = os.getenv("CLASSIFIER_ENGINE", "forest")
+
+# Cascade : règles mots-clés calibrées avant le modèle complet (cf. cascade.py)
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+
+# Artefacts antérieurs au vectoriseur (models/complexity_classifier.pkl et ses
+# forêts compilées) : construits avec extract_features.py
+LEGACY_FEATURE_SCHEMA = SPACY_SCHEMA.id
+
+def _check_model(model):
+    """
+    Refuse un modèle dont les classes ne sont pas `LABELS` (forêt fusionnée
+    4 classes servie sans FUSED_STAGE, ou l'inverse), ou une forêt entraînée
+    sur un autre schéma de features que celui de extract_features.py
+    (cf. vectorizer.py) ; sans schéma : LEGACY_FEATURE_SCHEMA.
+    """
+    check_schema(model, _expected_features(model), LABELS)
+    if CLASSIFIER_ENGINE != "ngram":
+        check_feature_schema(model, SPACY_SCHEMA, assume=LEGACY_FEATURE_SCHEMA)
+    return model
+
+def _load_model():
+    if CLASSIFIER_ENGINE == "ngram":
+        if not os.path.exists(NGRAM_MODEL_PATH):
+            raise FileNotFoundError(f"Modèle non trouvé : {NGRAM_MODEL_PATH}. Lance d'abord ngram_engine.py")
+        print("Chargement du moteur n-grammes...")
+        return _check_model(NgramEngine.load(NGRAM_MODEL_PATH))
+    
+    if FUSED_STAGE:
+        if not os.path.exists(FUSED_MODEL_PATH):
+            raise FileNotFoundError(f"Modèle non trouvé : {FUSED_MODEL_PATH}. Lance d'abord fused_classifier.py --write")
+        print(f"Chargement de la forêt fusionnée {FUSED_MODEL_PATH}...")
+        return _check_model(CompiledForest.load(FUSED_MODEL_PATH))
+    
+    if FOREST_MODEL_PATH != FOREST_PATH:
+        print(f"Chargement de la forêt {FOREST_MODEL_PATH}...")
+        return _check_model(CompiledForest.load(FOREST_MODEL_PATH))
+    
+    if not os.path.exists(MODEL_PATH):
+        raise FileNotFoundError(f"Modèle non trouvé : {MODEL_PATH}. Lance d'abord train_classifier.py")
+
+    print("Chargement du modèle de classification de complexité...")
+    model = _check_model(load_classifier(MODEL_PATH))
+    print("Modèle chargé avec succès !\n")
+    return model
+
+# Chargé au premier appel (ou via warmup()), pas à l'import
+_classifier = LazyResource(_load_model, "classifieur")
+
+def get_classifier():
+    return _classifier.get()
+
+def set_classifier(model):
+    """
+    Remplace le modèle à chaud (ex. forêt mise à jour par online_trainer.py).
+    Les prédictions déjà lancées finissent avec l'ancien modèle.
+    """
+    return _classifier.set(model)
+
+def warmup():
+    """
+    Charge le modèle et spaCy puis fait une prédiction à blanc,
+    pour que la première vraie requête ne paie pas le démarrage à froid.
+    """
+    get_classifier()
+    get_swapper()  # version de l'artefact chargé
+    if CLASSIFIER_ENGINE != "ngram":
+        get_nlp()
+    predict_complexity("scan nmap des ports sur 192.168.1.1")
+
+# ================= REMPLACEMENT À CHAUD (cf. hot_swap.py) =================
+# Requêtes récentes arrivées jusqu'au modèle : échantillon de préchauffage
+RECENT_QUERIES = RecentQueries()
+
+def _artifact_paths() -> list:
+    """Fichiers dont dépend le modèle chargé par `_load_model`."""
+    if CLASSIFIER_ENGINE == "ngram":
+        return [NGRAM_MODEL_PATH]
+    if FUSED_STAGE:
+        return [FUSED_MODEL_PATH]
+    if FOREST_MODEL_PATH != FOREST_PATH:
+        return [FOREST_MODEL_PATH]
+    return [MODEL_PATH, FOREST_PATH]
+
+def served_forest_path() -> str:
+    """Forêt compilée servie, celle que online_trainer.py met à jour et réécrit."""
+    return _artifact_paths()[-1]
+
+def _expected_features(model):
+    if CLASSIFIER_ENGINE == "ngram":
+        return None  # texte brut
+    groups = getattr(model, "info", {}).get("feature_groups")
+    return len(group_columns(groups)) if groups else N_FEATURES
+
+def _warm_model(model, queries: list):
+    """Prédiction à blanc (spaCy, KG et arbres chauds) + contrôle des probabilités."""
+    probabilities = np.asarray(_predict_proba(queries, model))
+    if probabilities.shape != (len(queries), len(LABELS)):
+        raise ValueError(f"Probabilités de forme {probabilities.shape}, attendu {(len(queries), len(LABELS))}")
+    if not np.all(np.isfinite(probabilities)) or not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("Probabilités invalides (non finies ou somme ≠ 1)")
+
+_swapper = LazyResource(
+    lambda: HotSwapper(_artifact_paths(), _load_model, _check_model, _warm_model, set_classifier, RECENT_QUERIES),
+    "remplacement à chaud",
+)
+
+def get_swapper() -> HotSwapper:
+    return _swapper.get()
+
+def reload_model(force: bool = False) -> dict:
+    """
+    Recharge l'artefact s'il a changé : chargement, schéma, préchauffage
+    sur les requêtes récentes, puis échange. Les requêtes en cours finissent
+    sur l'ancien modèle ; en cas d'échec il reste servi.
+    """
+    get_classifier()
+    return get_swapper().reload(force)
 
 # ================= 1. VÉRIFICATEUR DE PERTINENCE =================
 def is_relevant_to_nmap(query: str, threshold: float = 0.3) -> tuple[bool, str]:
@@ -19,8 +146,6 @@ def is_relevant_to_nmap(query: str, threshold: float = 0.3) -> tuple[bool, str]:
     Vérifie si la requête concerne Nmap.
     """
     query_lower = query.lower()
-    features_list = extract_features(query)  # liste, on utilise ce qu'on peut
-    
     relevance_score = 0.0
     
     # Mots-clés forts
@@ -67,36 +192,42 @@ def explain_prediction(query: str, predicted: str) -> str:
     return "\n".join(parts)
 
 # ================= 3. ROUTER PRINCIPAL =================
-def predict_complexity(query: str):
+def _early_result(query: str):
+    """Résultat sans passer par le modèle (requête vide ou hors sujet), sinon None."""
     if not query or not query.strip():
         return {
             "predicted_complexity": "EMPTY",
             "confidence": 0.0,
-            "all_probabilities": {"EASY": 0.0, "MEDIUM": 0.0, "HARD": 0.0},
+            "all_probabilities": {label: 0.0 for label in LABELS},
             "explanation": "Requête vide"
         }
     
+    if FUSED_STAGE:
+        return None  # pertinence décidée par la forêt fusionnée
+    
     # Vérification pertinence
     relevant, reason = is_relevant_to_nmap(query)
     if not relevant:
         return {
             "predicted_complexity": "IRRELEVANT",
             "confidence": 0.0,
-            "all_probabilities": {"EASY": 0.0, "MEDIUM": 0.0, "HARD": 0.0},
+            "all_probabilities": {label: 0.0 for label in LABELS},
             "explanation": reason
         }
+    return None
+
+def _result_from_proba(query: str, probabilities, model) -> dict:
+    prediction = model.classes_[probabilities.argmax()]
     
-    # Prédiction avec le modèle
-    features = extract_features(query)  # ← liste
-    prediction = classifier.predict([features])[0]
-    probabilities = classifier.predict_proba([features])[0]
-    
-    max_proba = max(probabilities)
+    max_proba = float(max(probabilities))
     predicted_label = LABELS[prediction]
     
-    proba_dict = {label: round(prob, 3) for label, prob in zip(LABELS, probabilities)}
+    proba_dict = {label: round(float(prob), 3) for label, prob in zip(LABELS, probabilities)}
     
-    explanation = explain_prediction(query, predicted_label)
+    if predicted_label == "IRRELEVANT":
+        explanation = "Ne semble pas concerner Nmap (modèle fusionné)"
+    else:
+        explanation = explain_prediction(query, predicted_label)
     
     return {
         "predicted_complexity": predicted_label,
@@ -105,6 +236,74 @@ def predict_complexity(query: str):
         "explanation": explanation
     }
 
+def _result_from_rule(query: str, label: str, confidence: float, rule: str) -> dict:
+    """Résultat d'une sortie anticipée de la cascade (modèle non appelé)."""
+    others = round((1.0 - confidence) / (len(LABELS) - 1), 3)
+    proba_dict = {l: (round(confidence, 3) if l == label else others) for l in LABELS}
+    
+    return {
+        "predicted_complexity": label,
+        "confidence": round(confidence, 3),
+        "all_probabilities": proba_dict,
+        "explanation": explain_prediction(query, label) + f"\n• Décidé par la règle « {rule} » (modèle non appelé)"
+    }
+
+def _predict_proba(queries: list, model):
+    """Probabilités du moteur configuré pour des requêtes déjà jugées pertinentes."""
+    if CLASSIFIER_ENGINE == "ngram":
+        return model.predict_proba(queries)  # texte brut : ni spaCy ni KG
+    groups = getattr(model, "info", {}).get("feature_groups")
+    if groups:
+        return model.predict_proba(extract_feature_groups(queries, groups))  # modèle réduit : groupes utiles seulement
+    if len(queries) == 1:
+        return model.predict_proba([get_features(queries[0])])  # un seul passage dans la forêt
+    return model.predict_proba(get_features_batch(queries))  # un `nlp.pipe` pour tout le lot
+
+def _predict_with_model(queries: list) -> list:
+    # Une seule lecture de la référence : un remplacement à chaud pendant le
+    # calcul n'affecte pas ce lot
+    model = get_classifier()
+    RECENT_QUERIES.extend(queries)
+    return [_result_from_proba(q, proba, model) for q, proba in zip(queries, _predict_proba(queries, model))]
+
+def _load_cascade():
+    tier = KeywordTier.load(CASCADE_RULES_PATH) if os.path.exists(CASCADE_RULES_PATH) else None
+    if tier is None:
+        print(f"⚠️ {CASCADE_RULES_PATH} absent (python src/cascade.py) : aucune sortie anticipée")
+        tier = KeywordTier(calibration={})
+    return CascadeClassifier(tier, _predict_with_model, CASCADE_THRESHOLD, _result_from_rule)
+
+_cascade = LazyResource(_load_cascade, "cascade")
+
+def get_cascade() -> CascadeClassifier:
+    return _cascade.get()
+
+def predict_complexity(query: str):
+    early = _early_result(query)
+    if early is not None:
+        return early
+    
+    if CASCADE_ENABLED:
+        return get_cascade().predict(query)
+    
+    # Prédiction avec le modèle
+    return _predict_with_model([query])[0]
+
+def predict_complexity_batch(queries: list) -> list:
+    """
+    Même résultat que `[predict_complexity(q) for q in queries]` avec un seul
+    passage spaCy (`nlp.pipe`) et un seul `predict_proba` pour tout le lot.
+    """
+    results = [_early_result(q) for q in queries]
+    pending = [i for i, r in enumerate(results) if r is None]
+    
+    if pending:
+        predict = get_cascade().predict_batch if CASCADE_ENABLED else _predict_with_model
+        for i, result in zip(pending, predict([queries[i] for i in pending])):
+            results[i] = result
+    
+    return results
+
 # ================= MODE INTERACTIF =================
 if __name__ == "__main__":
     print("=== NMAP-AI COMPLEXITY ROUTER - Personne 3 ===\n")
@@ -0,0 +1,228 @@
+"""
+Sélection de features selon leur coût d'extraction.
+
+Les 30 features de extract_features.py n'ont pas le même prix : les comptes
+POS et `doc.ents` exigent le pipeline spaCy, les 6 features KG l'index
+Neo4j, alors que les mots-clés ne coûtent presque rien. Cet outil :
+
+1. mesure le coût d'extraction de chaque groupe (extract_features.FEATURE_GROUPS)
+   avec `extract_feature_groups`, qui n'exécute que les composants nécessaires ;
+2. mesure l'importance de chaque groupe par permutation (colonnes du groupe
+   permutées ensemble) sur la partie test, pour la forêt complète ;
+3. évalue toutes les combinaisons de groupes (précision CV stratifiée sur la
+   partie entraînement, précision test, coût mesuré), marque le front de
+   Pareto précision / coût et entraîne un modèle réduit pour chaque point du
+   front, sauvegardé en forêt compilée dans models/reduced/<groupes>/.
+
+Un modèle réduit se déploie avec `FOREST_MODEL_PATH=models/reduced/<groupes>`
+(router.py lit les groupes dans ses métadonnées et n'extrait que ceux-là).
+
+Usage (depuis AgentClassifieur/, KG_OFFLINE=1 pour mesurer l'index JSON) :
+    python src/select_features.py [--repeats 30] [--no-save]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+
+from extract_features import FEATURE_GROUPS, GROUP_PIPES, extract_feature_groups, group_columns
+from fast_forest import CompiledForest
+from feature_store import FEATURE_STORE_DIR, load_labeled_csv, load_or_extract
+from vectorizer import SPACY_SCHEMA
+
+# ================= CONFIGURATION =================
+DATA_PATH = "data/data_personn3.csv"
+REPORT_PATH = "models/feature_selection_report.json"
+REDUCED_DIR = "models/reduced"
+
+# Mêmes hyperparamètres que train_classifier.py
+MODEL_PARAMS = {"n_estimators": 300, "random_state": 42, "class_weight": "balanced"}
+
+
+def subsets(groups=tuple(FEATURE_GROUPS)) -> list:
+    """Toutes les combinaisons non vides de groupes, dans l'ordre de FEATURE_GROUPS."""
+    return [combo for r in range(1, len(groups) + 1) for combo in itertools.combinations(groups, r)]
+
+
+def subset_name(groups) -> str:
+    return "+".join(groups)
+
+
+def cost_key(groups) -> tuple:
+    """Deux combinaisons de même clé exécutent le même travail d'extraction."""
+    pipes = sorted({p for g in groups for p in GROUP_PIPES[g]})
+    return tuple(pipes), "kg" in groups
+
+
+# ================= 1. COÛT =================
+def measure_cost(queries: list, groups, repeats: int = 3) -> float:
+    """Millisecondes par requête (meilleur de `repeats` passages, traitement en lot)."""
+    extract_feature_groups(queries[:8], groups)  # chargement spaCy / index hors mesure
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        extract_feature_groups(queries, groups)
+        best = min(best, time.perf_counter() - start)
+    return best / len(queries) * 1000
+
+
+def measure_costs(queries: list, combos: list, repeats: int = 3) -> dict:
+    """Coût de chaque combinaison ; une seule mesure par clé de coût."""
+    by_key = {}
+    costs = {}
+    for combo in combos:
+        key = cost_key(combo)
+        if key not in by_key:
+            by_key[key] = measure_cost(queries, combo, repeats)
+        costs[combo] = by_key[key]
+    return costs
+
+
+# ================= 2. IMPORTANCE =================
+def group_importance(model, X, y, groups=FEATURE_GROUPS, n_repeats: int = 30, seed: int = 42) -> dict:
+    """
+    Baisse de précision quand les colonnes d'un groupe sont permutées
+    ensemble (mêmes lignes pour tout le groupe) : {groupe: (moyenne, écart-type)}.
+    """
+    rng = np.random.default_rng(seed)
+    baseline = float((model.predict(X) == y).mean())
+    importance = {}
+    for name, columns in groups.items():
+        drops = []
+        for _ in range(n_repeats):
+            X_perm = X.copy()
+            X_perm[:, columns] = X[rng.permutation(len(X))][:, columns]
+            drops.append(baseline - float((model.predict(X_perm) == y).mean()))
+        importance[name] = (float(np.mean(drops)), float(np.std(drops)))
+    return importance
+
+
+# ================= 3. COMBINAISONS ET FRONT DE PARETO =================
+def evaluate_subset(groups, X_train, y_train, X_test, y_test, cv: int = 5, seed: int = 42) -> dict:
+    columns = group_columns(groups)
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=seed)
+    scores = cross_val_score(RandomForestClassifier(**MODEL_PARAMS), X_train[:, columns], y_train, cv=folds)
+    model = RandomForestClassifier(**MODEL_PARAMS).fit(X_train[:, columns], y_train)
+    return {
+        "groups": list(groups),
+        "n_features": len(columns),
+        "cv_accuracy": float(scores.mean()),
+        "cv_std": float(scores.std()),
+        "test_accuracy": float((model.predict(X_test[:, columns]) == y_test).mean()),
+        "model": model,
+    }
+
+
+def mark_pareto(candidates: list):
+    """Front de Pareto : aucune autre combinaison n'est à la fois plus précise et moins chère."""
+    for c in candidates:
+        c["pareto"] = not any(
+            o["cv_accuracy"] >= c["cv_accuracy"] and o["extraction_ms"] <= c["extraction_ms"]
+            and (o["cv_accuracy"] > c["cv_accuracy"] or o["extraction_ms"] < c["extraction_ms"])
+            for o in candidates
+        )
+
+
+def save_reduced(candidate: dict, directory: str = REDUCED_DIR) -> str:
+    forest = CompiledForest.from_sklearn(candidate["model"])
+    forest.info.update(
+        feature_schema=SPACY_SCHEMA.id,
+        feature_groups=candidate["groups"],
+        cv_accuracy=round(candidate["cv_accuracy"], 4),
+        extraction_ms=round(candidate["extraction_ms"], 4),
+    )
+    path = os.path.join(directory, subset_name(candidate["groups"]))
+    forest.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sélection de features selon leur coût d'extraction")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=30, help="permutations par groupe")
+    parser.add_argument("--timing-repeats", type=int, default=3)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--no-save", action="store_true", help="ne sauvegarde pas les modèles réduits")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    # Vecteurs complets en cache : les colonnes d'un groupe y sont identiques
+    # à celles que produit extract_feature_groups
+    X, y, meta = load_or_extract(args.data, args.store)
+    queries, _ = load_labeled_csv(args.data)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    combos = subsets()
+    print(f"Mesure du coût d'extraction ({len(queries)} requêtes)...")
+    costs = measure_costs(queries, combos, args.timing_repeats)
+
+    full = RandomForestClassifier(**MODEL_PARAMS).fit(X_train, y_train)
+    importance = group_importance(full, X_test, y_test, n_repeats=args.repeats)
+
+    print(f"Évaluation de {len(combos)} combinaisons de groupes...")
+    candidates = Parallel(n_jobs=args.n_jobs)(
+        delayed(evaluate_subset)(combo, X_train, y_train, X_test, y_test, args.cv) for combo in combos
+    )
+    for c in candidates:
+        c["extraction_ms"] = costs[tuple(c["groups"])]
+    mark_pareto(candidates)
+    candidates.sort(key=lambda c: (c["extraction_ms"], -c["cv_accuracy"]))
+
+    # ================= RAPPORT =================
+    print("=" * 90)
+    print("COÛT ET IMPORTANCE PAR GROUPE".center(90))
+    print("=" * 90)
+    print(f"{'groupe':<8}{'colonnes':>10}{'coût seul ms':>14}{'importance':>12}{'±':>8}  composants spaCy")
+    for name, columns in FEATURE_GROUPS.items():
+        mean, std = importance[name]
+        print(f"{name:<8}{len(columns):>10}{costs[(name,)]:>14.3f}{mean:>+12.3f}{std:>8.3f}  "
+              f"{', '.join(GROUP_PIPES[name]) or 'tokenizer'}{' + index KG' if name == 'kg' else ''}")
+    print("(importance : baisse de précision test quand le groupe est permuté)")
+
+    print("\n" + "=" * 90)
+    print("COMBINAISONS : PRÉCISION / COÛT D'EXTRACTION".center(90))
+    print("=" * 90)
+    print(f"{'':2}{'groupes':<30}{'cols':>5}{'CV':>8}{'±':>7}{'test':>7}{'ms/req':>9}")
+    print("-" * 90)
+    for c in candidates:
+        print(f"{'*' if c['pareto'] else ' ':2}{subset_name(c['groups']):<30}{c['n_features']:>5}"
+              f"{c['cv_accuracy']:>8.3f}{c['cv_std']:>7.3f}{c['test_accuracy']:>7.3f}{c['extraction_ms']:>9.3f}")
+    print("\n* = front de Pareto précision CV / coût d'extraction")
+
+    if not args.no_save:
+        for c in candidates:
+            if c["pareto"]:
+                c["path"] = save_reduced(c)
+                print(f"Modèle réduit : {c['path']}")
+
+    report = {
+        "features": meta,
+        "cv": args.cv,
+        "groups": {name: {"columns": columns, "pipes": GROUP_PIPES[name],
+                          "cost_ms": costs[(name,)],
+                          "importance": importance[name][0], "importance_std": importance[name][1]}
+                   for name, columns in FEATURE_GROUPS.items()},
+        "candidates": [{k: v for k, v in c.items() if k != "model"} for c in candidates],
+    }
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
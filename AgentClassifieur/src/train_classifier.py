@@ -4,7 +4,9 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
-from extract_features import extract_features
+from parse_cache import features_from_docs, load_or_parse
+from fast_forest import CompiledForest
+from vectorizer import SPACY_SCHEMA
 
 # ================= CONFIGURATION =================
 DATA_PATH = "data/data_personn3.csv"  
@@ -29,7 +31,10 @@ print("Valeurs uniques dans 'complexity' après normalisation :", df["complexity
 
 # ================= EXTRACTION DES FEATURES =================
 print("\nExtraction des features en cours...")
-X = [extract_features(q) for q in df["query"]]
+# Parses spaCy relus depuis models/parse_cache/ s'ils existent (parse_cache.py) :
+# seul le calcul des features est refait
+queries, docs, _ = load_or_parse(DATA_PATH)
+X = features_from_docs(queries, docs)
 
 # ================= MAPPING DES CLASSES =================
 complexity_mapping = {"easy": 0, "medium": 1, "hard": 2}
@@ -57,6 +62,7 @@ model = RandomForestClassifier(
     class_weight="balanced"
 )
 model.fit(X_train, y_train)
+model.feature_schema_ = SPACY_SCHEMA.id  # vérifié au chargement (cf. vectorizer.py)
 
 # ================= ÉVALUATION =================
 preds = model.predict(X_test)
@@ -73,4 +79,9 @@ MODEL_PATH = os.path.join(MODEL_DIR, "complexity_classifier.pkl")
 joblib.dump(model, MODEL_PATH)
 print(f"\nModèle sauvegardé avec succès : {MODEL_PATH}")
 
+# ================= EXPORT DE LA FORÊT COMPILÉE =================
+FOREST_PATH = os.path.join(MODEL_DIR, "complexity_classifier_forest")
+CompiledForest.from_sklearn(model).save(FOREST_PATH)
+print(f"Forêt compilée exportée : {FOREST_PATH}")
+
 print("\nTout est prêt ! Tu peux maintenant utiliser le classifieur dans classifier.py")
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Recherche d'hyperparamètres du Random Forest sur une matrice de features en cache.
+
+1. Les features du CSV sont extraites une seule fois (feature_store.py) ;
+   les relances suivantes relisent les `.npy`.
+2. Recherche aléatoire (`--search random`) ou par divisions successives
+   (`--search halving`, la ressource est le nombre d'arbres) avec validation
+   croisée stratifiée, en parallèle sur tous les coeurs (`--n-jobs`).
+3. Chaque candidat est réentraîné sur le jeu d'entraînement, compilé
+   (fast_forest.py) et mesuré : précision CV, précision sur le jeu de test
+   (même découpage que train_classifier.py), latence d'une prédiction,
+   nombre de noeuds. Les candidats sur le front de Pareto précision /
+   latence sont marqués d'une étoile.
+
+Usage (depuis AgentClassifieur/) :
+    python src/tune_classifier.py [--search halving] [--n-iter 30] [--save-best]
+"""
+
+import argparse
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (HalvingRandomSearchCV, RandomizedSearchCV,
+                                     StratifiedKFold, train_test_split)
+
+from fast_forest import CompiledForest
+from feature_store import FEATURE_STORE_DIR, load_or_extract
+from vectorizer import SPACY_SCHEMA
+
+# ================= CONFIGURATION =================
+DATA_PATH = "data/data_personn3.csv"
+REPORT_PATH = "models/tuning_report.json"
+MODEL_DIR = "models"
+
+PARAM_DISTRIBUTIONS = {
+    "n_estimators": [50, 100, 200, 300, 500],
+    "max_depth": [None, 6, 10, 16, 24],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", "log2", 0.5],
+    "class_weight": ["balanced", None],
+}
+
+
+def build_search(search: str, n_iter: int, cv: int, n_jobs: int, seed: int):
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=seed)
+    base = RandomForestClassifier(random_state=seed)
+    if search == "halving":
+        # Les candidats commencent avec peu d'arbres ; seuls les meilleurs en reçoivent plus
+        distributions = {k: v for k, v in PARAM_DISTRIBUTIONS.items() if k != "n_estimators"}
+        return HalvingRandomSearchCV(
+            base, distributions, n_candidates=n_iter, resource="n_estimators",
+            min_resources=25, max_resources=max(PARAM_DISTRIBUTIONS["n_estimators"]),
+            factor=2, cv=folds, n_jobs=n_jobs, random_state=seed,
+        )
+    return RandomizedSearchCV(
+        base, PARAM_DISTRIBUTIONS, n_iter=n_iter, cv=folds, n_jobs=n_jobs, random_state=seed,
+    )
+
+
+def candidates_from_search(search) -> list:
+    """Un dict par candidat : paramètres complets + précision CV (dernier tour pour halving)."""
+    results = search.cv_results_
+    # Avec halving, n_estimators (la ressource) grandit d'un tour à l'autre : un
+    # même candidat revient à chaque tour. En recherche aléatoire c'est un
+    # paramètre cherché comme les autres, il fait partie du candidat.
+    resource = search.resource if isinstance(search, HalvingRandomSearchCV) else None
+    last = {}
+    for i, params in enumerate(results["params"]):
+        key = json.dumps({k: v for k, v in params.items() if k != resource},
+                         sort_keys=True, default=str)
+        last[key] = {
+            "params": params,
+            "cv_accuracy": float(results["mean_test_score"][i]),
+            "cv_std": float(results["std_test_score"][i]),
+        }
+    return list(last.values())
+
+
+def _fit(params: dict, X, y, seed: int):
+    return RandomForestClassifier(random_state=seed, **params).fit(X, y)
+
+
+def measure_latency(forest: CompiledForest, X, repeats: int = 200) -> dict:
+    """Latence d'une prédiction (une ligne) et débit par lot du moteur compilé."""
+    rows = [X[i % len(X)].reshape(1, -1) for i in range(repeats)]
+    forest.predict_proba(rows[0])
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        forest.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    batch = np.repeat(X, max(1, 256 // len(X) + 1), axis=0)[:256]
+    start = time.perf_counter()
+    forest.predict_proba(batch)
+    elapsed = time.perf_counter() - start
+    return {
+        "latency_p50_ms": float(np.percentile(timings, 50) * 1000),
+        "latency_p95_ms": float(np.percentile(timings, 95) * 1000),
+        "batch_rows_per_s": float(len(batch) / elapsed),
+    }
+
+
+def mark_pareto(candidates: list):
+    """Front de Pareto : aucun autre candidat n'est à la fois plus précis et plus rapide."""
+    for c in candidates:
+        c["pareto"] = not any(
+            o["cv_accuracy"] >= c["cv_accuracy"] and o["latency_p50_ms"] <= c["latency_p50_ms"]
+            and (o["cv_accuracy"] > c["cv_accuracy"] or o["latency_p50_ms"] < c["latency_p50_ms"])
+            for o in candidates
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres du classifieur")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    parser.add_argument("--search", choices=["random", "halving"], default="random")
+    parser.add_argument("--n-iter", type=int, default=20, help="nombre de candidats")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--save-best", action="store_true",
+                        help="sauvegarde le meilleur candidat (précision CV) comme modèle servi")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    # ================= FEATURES (UNE SEULE EXTRACTION) =================
+    X, y, meta = load_or_extract(args.data, args.store)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # ================= RECHERCHE =================
+    search = build_search(args.search, args.n_iter, args.cv, args.n_jobs, args.seed)
+    print(f"Recherche {args.search} : {args.n_iter} candidats, CV {args.cv} plis, n_jobs={args.n_jobs}")
+    start = time.perf_counter()
+    search.fit(X_train, y_train)
+    search_seconds = time.perf_counter() - start
+    print(f"Recherche terminée en {search_seconds:.1f} s\n")
+
+    # ================= RÉENTRAÎNEMENT + MESURES =================
+    candidates = candidates_from_search(search)
+    models = Parallel(n_jobs=args.n_jobs)(
+        delayed(_fit)(c["params"], X_train, y_train, args.seed) for c in candidates
+    )
+    # Latences mesurées une par une, sans concurrence
+    for c, model in zip(candidates, models):
+        forest = CompiledForest.from_sklearn(model)
+        c["test_accuracy"] = float((forest.predict(X_test) == y_test).mean())
+        c["nodes"] = int(len(forest.feature))
+        c.update(measure_latency(forest, X_test))
+    mark_pareto(candidates)
+    order = sorted(range(len(candidates)), key=lambda i: -candidates[i]["cv_accuracy"])
+
+    # ================= RAPPORT =================
+    print("=" * 100)
+    print("PRÉCISION / LATENCE PAR CANDIDAT".center(100))
+    print("=" * 100)
+    print(f"{'':2}{'CV':>7}{'±':>6}{'test':>7}{'p50 ms':>9}{'lignes/s':>11}{'noeuds':>9}  paramètres")
+    print("-" * 100)
+    for i in order:
+        c = candidates[i]
+        p = c["params"]
+        params = (f"n={p['n_estimators']} depth={p['max_depth']} leaf={p['min_samples_leaf']} "
+                  f"feat={p['max_features']} cw={p['class_weight']}")
+        print(f"{'*' if c['pareto'] else ' ':2}{c['cv_accuracy']:>7.3f}{c['cv_std']:>6.3f}"
+              f"{c['test_accuracy']:>7.3f}{c['latency_p50_ms']:>9.3f}{c['batch_rows_per_s']:>11.0f}"
+              f"{c['nodes']:>9}  {params}")
+    print("\n* = front de Pareto précision CV / latence")
+
+    report = {
+        "features": meta,
+        "search": args.search,
+        "cv": args.cv,
+        "search_seconds": round(search_seconds, 2),
+        "candidates": [candidates[i] for i in order],
+    }
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Rapport : {args.report}")
+
+    if args.save_best:
+        import joblib
+        best = models[order[0]]
+        best.feature_schema_ = SPACY_SCHEMA.id
+        joblib.dump(best, os.path.join(MODEL_DIR, "complexity_classifier.pkl"))
+        CompiledForest.from_sklearn(best).save(os.path.join(MODEL_DIR, "complexity_classifier_forest"))
+        print(f"Meilleur modèle sauvegardé : {candidates[order[0]]['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# ================================
+# Ressources lourdes chargées à la demande
+# ================================
+class LazyResource:
+    """
+    Charge une ressource (modèle, pipeline spaCy, driver Neo4j) au premier
+    accès plutôt qu'à l'import. Thread-safe : la factory n'est appelée
+    qu'une seule fois même si plusieurs threads demandent la ressource.
+    """
+
+    def __init__(self, factory, name: str = "ressource"):
+        self._factory = factory
+        self._name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self._factory()
+                    self._loaded = True
+        return self._value
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def set(self, value):
+        """Remplace la ressource (échange atomique) et retourne l'ancienne."""
+        with self._lock:
+            old, self._value, self._loaded = self._value, value, True
+        return old
+
+    def reset(self):
+        """Oublie la ressource ; le prochain `get()` la recharge."""
+        with self._lock:
+            value, self._value, self._loaded = self._value, None, False
+        return value
+
+    def __repr__(self):
+        state = "chargée" if self._loaded else "non chargée"
+        return f"<LazyResource {self._name} ({state})>"
+
+
+# ================================
+# Cache LRU borné (taille + TTL)
+# ================================
+class LRUCache:
+    """
+    Cache LRU thread-safe avec taille maximale et durée de vie des entrées
+    (`ttl` en secondes, None = pas d'expiration). Compte les hits / misses /
+    évictions pour suivre le taux de réussite.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = None, clock=time.monotonic):
+        self.max_size = max(0, int(max_size))
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, stored_at = entry
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
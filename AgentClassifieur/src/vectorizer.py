@@ -0,0 +1,312 @@
+"""
+Vectoriseur de requêtes commun à tous les classifieurs : schéma de features
+déclaré et versionné, motifs (mots-clés, regex) compilés une fois à l'import.
+
+Deux schémas, mêmes 30 colonnes (`FEATURE_NAMES`) calculées différemment :
+- `spacy/v1` : tokens, POS et entités spaCy, features KG sur les termes
+  filtrés par POS (extract_features.py, router.py, classifier.py,
+  train_classifier.py et les outils d'entraînement) ;
+- `lite/v1`  : mots séparés par des espaces, mots-clés d'options nmap, sans
+  spaCy (mcp_server/tools/classify_tool.py) ; POS approchés par des listes
+  de mots, pas d'entités.
+
+Donner à un modèle des vecteurs de l'autre schéma ne lève aucune erreur mais
+fausse les prédictions. Chaque modèle enregistre donc le schéma de son
+entraînement (`info["feature_schema"]` d'une forêt compilée, attribut
+`feature_schema_` d'un modèle sklearn, clé `feature_schema` d'un artefact
+joblib) et `check_feature_schema` refuse une paire incompatible. Un modèle
+antérieur à ce module (sans schéma) est refusé, sauf surcharge explicite
+par le service qui le charge (`assume=`, le schéma de ses artefacts
+historiques) : jamais de valeur globale partagée entre services.
+
+Le schéma de référence est `spacy/v1` : tous les modèles entraînés dans ce
+dépôt l'utilisent. `lite/v1` n'existe que pour servir sans spaCy les
+artefacts joblib qui le déclarent ; `vectorizer_for(modèle)` choisit le
+vectoriseur d'après le schéma enregistré, un service ne choisit donc pas
+le calcul lui-même.
+
+Chaque vectoriseur offre un chemin rapide pour une requête (`vectorize`) et
+un chemin par lot (`vectorize_batch`). hybrid_classifier.py vectorise des
+commandes nmap, pas des requêtes : schéma à part, `nmap-command/v1`.
+"""
+
+import re
+from abc import ABC, abstractmethod
+
+# ================= SCHÉMAS =================
+FEATURE_NAMES = [
+    # Statistiques
+    "num_tokens", "num_verbs", "num_nouns", "num_adjectives", "query_length",
+    # IP
+    "has_ip", "has_range", "num_ips",
+    # Mots-clés
+    "nb_easy_keywords", "nb_medium_keywords", "nb_hard_keywords", "ratio_hard",
+    # Options
+    "has_timing", "has_script", "has_udp", "has_os", "has_version", "has_evasion", "num_options",
+    # Avancé
+    "num_entities", "has_proxy", "has_decoy", "script_weight", "complexity_score",
+    # KG (kg_index.KGFeatureIndex.compute)
+    "kg_options", "kg_relations", "kg_freq", "kg_scan_score", "kg_ports_count", "kg_scripts_score",
+]
+KG_DEFAULT = [0, 0, 0.0, 0, 0, 0]
+
+
+class FeatureSchema:
+    """Nom + version d'un calcul de features ; l'identifiant est enregistré avec les modèles."""
+
+    def __init__(self, name: str, version: int, feature_names=FEATURE_NAMES):
+        self.name = name
+        self.version = version
+        self.feature_names = list(feature_names)
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}/v{self.version}"
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+    def __repr__(self):
+        return f"FeatureSchema({self.id}, {self.n_features} features)"
+
+
+# Version à incrémenter à chaque changement du calcul correspondant
+SPACY_SCHEMA = FeatureSchema("spacy", 1)
+LITE_SCHEMA = FeatureSchema("lite", 1)
+SCHEMAS = {schema.id: schema for schema in (SPACY_SCHEMA, LITE_SCHEMA)}
+
+
+def model_schema(model, default: str = None):
+    """Identifiant de schéma enregistré avec un modèle (forêt compilée, sklearn ou artefact dict)."""
+    if isinstance(model, dict):
+        return model.get("feature_schema", default)
+    info = getattr(model, "info", None)
+    if isinstance(info, dict) and "feature_schema" in info:
+        return info["feature_schema"]
+    return getattr(model, "feature_schema_", default)
+
+
+def check_feature_schema(model, schema: FeatureSchema, assume: str = None) -> str:
+    """
+    Lève ValueError si le modèle a été entraîné sur un autre schéma que celui
+    que le service calcule, ou s'il n'en déclare aucun. `assume` : schéma
+    des modèles sans identifiant de ce service (surcharge explicite).
+    """
+    declared = model_schema(model, assume)
+    if declared is None:
+        raise ValueError(
+            f"Le modèle ne déclare aucun schéma de features ; réentraîner, ou "
+            f"assume={schema.id!r} si ses vecteurs viennent bien de ce schéma"
+        )
+    if declared != schema.id:
+        raise ValueError(
+            f"Schéma de features du modèle {declared or 'non déclaré'} incompatible "
+            f"avec le vectoriseur du service ({schema.id})"
+        )
+    return declared
+
+
+# ================= MOTIFS COMPILÉS =================
+IP_PATTERN = re.compile(r"\d+\.\d+\.\d+\.\d+")
+TIMING_PATTERN = re.compile(r"t[0-5]|timing")
+SINGLE_PORT_PATTERN = re.compile(r"-p\s*\d+(?!\s*-|\s*/)")
+
+# --- spacy/v1 (listes d'origine : leur ordre et leurs doublons comptent pour num_options)
+EASY_KEYWORDS = ["simple", "basique", "rapide", "défaut", "ouvert", "ping", "liste", "localhost", "local", "default", "quick"]
+MEDIUM_KEYWORDS = ["version", "service", "os", "détection", "udp", "détecte", "syn", "agressif", "aggressive", "timing", "t2", "t3", "t4", "t5", "script", "vuln", "insane"]
+HARD_KEYWORDS = ["furtif", "stealth", "idle", "zombie", "decoy", "spoof", "fragment", "proxy", "bounce", "badsum", "null", "fin", "xmas", "t0", "t1", "parano", "paranoid", "evasion", "ids", "firewall", "mtu", "évite", "évasion"]
+_EASY = frozenset(EASY_KEYWORDS)
+_MEDIUM = frozenset(MEDIUM_KEYWORDS)
+_HARD = frozenset(HARD_KEYWORDS)
+NMAP_KEYWORDS = _EASY | _MEDIUM | _HARD
+
+# --- lite/v1 (mots entiers, sauf les sous-chaînes d'options)
+LITE_VERBS = frozenset(["scan", "check", "test", "probe"])
+LITE_NOUNS = frozenset(["port", "host", "network", "service"])
+LITE_ADJECTIVES = frozenset(["quick", "fast", "slow", "aggressive"])
+LITE_EASY = frozenset(["sn", "ping", "simple", "basic", "quick", "fast"])
+LITE_MEDIUM = frozenset(["sv", "version", "os", "script", "sc", "t4", "udp"])
+LITE_HARD = frozenset(["ss", "sf", "sx", "sn", "sm", "sa", "sw", "f", "fragment",
+                       "spoof", "decoy", "evasion", "t0", "t1", "t2"])
+LITE_TIMINGS = ("t0", "t1", "t2", "t3", "t4", "t5")
+
+
+def single_port_reduction(query: str) -> int:
+    q = query.lower()
+    if "un port" in q or "seulement un port" in q or "port unique" in q or SINGLE_PORT_PATTERN.search(q):
+        return -1
+    return 0
+
+
+# ================= CALCUL spacy/v1 =================
+def doc_vector(query: str, doc, kg_features=None) -> list:
+    """
+    Vecteur `spacy/v1` à partir d'un parse spaCy de `query.lower()` (les
+    composants absents du pipeline donnent des POS / entités vides).
+    `kg_features` : les 6 features KG déjà calculées (0 par défaut).
+    """
+    query_lower = query.lower()
+
+    # Un seul passage sur les tokens
+    n_verbs = n_nouns = n_adjectives = nb_easy = nb_medium = nb_hard = 0
+    for token in doc:
+        pos = token.pos_
+        if pos == "VERB":
+            n_verbs += 1
+        elif pos == "NOUN":
+            n_nouns += 1
+        elif pos == "ADJ":
+            n_adjectives += 1
+        text = token.text
+        if text in NMAP_KEYWORDS:
+            nb_easy += text in _EASY
+            nb_medium += text in _MEDIUM
+            nb_hard += text in _HARD
+
+    # Sous-chaînes de mots-clés, chacune testée une fois
+    hard_present = sum(1 for kw in HARD_KEYWORDS if kw in query_lower)
+    medium_present = sum(1 for kw in MEDIUM_KEYWORDS if kw in query_lower)
+    num_ips = len(IP_PATTERN.findall(query_lower))
+    has_script = "script" in query_lower
+    n_tokens = len(doc)
+
+    return [
+        n_tokens, n_verbs, n_nouns, n_adjectives, len(query),
+        1 if num_ips else 0,
+        1 if "/" in query_lower or "-" in query_lower else 0,
+        num_ips,
+        nb_easy, nb_medium, nb_hard, nb_hard / (n_tokens + 1),
+        1 if TIMING_PATTERN.search(query_lower) else 0,
+        1 if has_script else 0,
+        1 if "udp" in query_lower else 0,
+        1 if "os" in query_lower else 0,
+        1 if "version" in query_lower else 0,
+        1 if hard_present else 0,
+        hard_present + medium_present,
+        len(doc.ents),
+        1 if "proxy" in query_lower else 0,
+        1 if "decoy" in query_lower else 0,
+        10 if has_script else 0,
+        nb_hard * 5 + nb_medium * 2 + nb_easy + single_port_reduction(query),
+        *(KG_DEFAULT if kg_features is None else kg_features),
+    ]
+
+
+# ================= CALCUL lite/v1 =================
+def lite_vector(query: str, kg_index=None) -> list:
+    """Vecteur `lite/v1` sans spaCy ; features KG depuis un `KGFeatureIndex` s'il est fourni."""
+    query_lower = query.lower()
+    words = query_lower.split()
+
+    n_verbs = n_nouns = n_adjectives = nb_easy = nb_medium = nb_hard = 0
+    for word in words:
+        n_verbs += word in LITE_VERBS
+        n_nouns += word in LITE_NOUNS
+        n_adjectives += word in LITE_ADJECTIVES
+        nb_easy += word in LITE_EASY
+        nb_medium += word in LITE_MEDIUM
+        nb_hard += word in LITE_HARD
+
+    hard_present = sum(1 for kw in LITE_HARD if kw in query_lower)
+    medium_present = sum(1 for kw in LITE_MEDIUM if kw in query_lower)
+    num_ips = len(IP_PATTERN.findall(query))
+    has_script = "script" in query_lower
+
+    return [
+        len(words), n_verbs, n_nouns, n_adjectives, len(query),
+        1 if num_ips else 0,
+        1 if "/" in query or "-" in query else 0,
+        num_ips,
+        nb_easy, nb_medium, nb_hard, nb_hard / (len(words) + 1),
+        1 if any(t in query_lower for t in LITE_TIMINGS) else 0,
+        1 if has_script else 0,
+        1 if "udp" in query_lower or "-su" in query_lower else 0,
+        1 if " -o" in query_lower or "os " in query_lower else 0,
+        1 if "-sv" in query_lower or "version" in query_lower else 0,
+        1 if hard_present else 0,
+        hard_present + medium_present,
+        0,  # pas d'entités sans spaCy
+        1 if "proxy" in query_lower else 0,
+        1 if "decoy" in query_lower else 0,
+        10 if has_script else 0,
+        nb_hard * 5 + nb_medium * 2 + nb_easy,
+        *(kg_index.compute(words) if kg_index is not None else KG_DEFAULT),
+    ]
+
+
+# ================= VECTORISEURS =================
+class QueryVectorizer(ABC):
+    """`vectorize(query)` : une requête ; `vectorize_batch(queries)` : un lot, même résultat ligne à ligne."""
+
+    schema = None
+
+    @abstractmethod
+    def vectorize(self, query: str) -> list:
+        """Vecteur de `self.schema.n_features` valeurs pour une requête."""
+
+    def vectorize_batch(self, queries: list) -> list:
+        return [self.vectorize(q) for q in queries]
+
+    def check(self, model, assume: str = None) -> str:
+        """`check_feature_schema` pour le schéma de ce vectoriseur."""
+        return check_feature_schema(model, self.schema, assume)
+
+
+class SpacyVectorizer(QueryVectorizer):
+    """`spacy/v1` via le cache de extract_features.py (un `nlp.pipe` par lot)."""
+
+    schema = SPACY_SCHEMA
+
+    def vectorize(self, query: str) -> list:
+        from extract_features import get_features
+        return get_features(query)
+
+    def vectorize_batch(self, queries: list) -> list:
+        from extract_features import get_features_batch
+        return get_features_batch(queries)
+
+
+class LiteVectorizer(QueryVectorizer):
+    """`lite/v1` : ni spaCy ni Neo4j ; les requêtes identiques d'un lot sont calculées une fois."""
+
+    schema = LITE_SCHEMA
+
+    def __init__(self, kg_index=None):
+        self.kg_index = kg_index
+
+    def vectorize(self, query: str) -> list:
+        return lite_vector(query or "", self.kg_index)
+
+    def vectorize_batch(self, queries: list) -> list:
+        unique = {}
+        for q in queries:
+            q = q or ""
+            if q not in unique:
+                unique[q] = lite_vector(q, self.kg_index)
+        return [list(unique[q or ""]) for q in queries]
+
+
+VECTORIZERS = {SPACY_SCHEMA.id: SpacyVectorizer, LITE_SCHEMA.id: LiteVectorizer}
+
+
+def get_vectorizer(schema_id: str, **kwargs) -> QueryVectorizer:
+    """Vectoriseur d'un schéma enregistré (ValueError si inconnu)."""
+    if schema_id not in VECTORIZERS:
+        raise ValueError(f"Schéma de features inconnu : {schema_id} ({', '.join(VECTORIZERS)})")
+    return VECTORIZERS[schema_id](**kwargs)
+
+
+def vectorizer_for(model, assume: str = None, **kwargs) -> QueryVectorizer:
+    """Vectoriseur du schéma enregistré avec `model` (mêmes refus que `check_feature_schema`)."""
+    schema_id = model_schema(model, assume)
+    if schema_id is None:
+        raise ValueError(
+            f"Le modèle ne déclare aucun schéma de features ; réentraîner, ou "
+            f"assume=<schéma> ({', '.join(SCHEMAS)})"
+        )
+    if schema_id not in SCHEMAS:
+        raise ValueError(f"Schéma de features {schema_id or 'non déclaré'} sans vectoriseur ({', '.join(SCHEMAS)})")
+    vectorizer = get_vectorizer(schema_id, **kwargs)
+    vectorizer.check(model, assume)
+    return vectorizer
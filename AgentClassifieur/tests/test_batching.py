@@ -0,0 +1,101 @@
+"""
+MicroBatcher : regroupement des requêtes concurrentes et redistribution des résultats
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from batching import MicroBatcher
+
+
+def test_results_fan_out_in_order():
+    seen = []
+
+    def process(items):
+        seen.append(list(items))
+        return [x * 2 for x in items]
+
+    async def scenario():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(scenario())
+    assert results == [i * 2 for i in range(20)]
+    assert all(len(b) <= 8 for b in seen)
+    assert batcher.batches == len(seen) < 20
+    assert batcher.items == 20
+
+
+def test_single_request_waits_at_most_max_wait():
+    async def scenario():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_wait_ms=10)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await batcher.submit("q")
+        elapsed = loop.time() - start
+        await batcher.stop()
+        return result, elapsed
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == "q"
+    assert elapsed < 0.5
+
+
+def test_batch_error_is_raised_to_every_caller():
+    def process(items):
+        raise ValueError("boom")
+
+    async def scenario():
+        batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        # le worker survit à l'erreur
+        batcher.process_batch = lambda items: items
+        ok = await batcher.submit("ok")
+        await batcher.stop()
+        return results, ok
+
+    results, ok = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert ok == "ok"
+
+
+def test_stop_fails_pending_callers():
+    import time
+
+    def process(items):
+        time.sleep(0.1)
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=1)
+        tasks = [asyncio.ensure_future(batcher.submit(i)) for i in range(10)]
+        await asyncio.sleep(0.05)  # premier lot en cours, le reste en file
+        await batcher.stop()
+        results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 1.0)
+        try:
+            await batcher.submit("late")
+            late = None
+        except RuntimeError as e:
+            late = e
+        return results, late
+
+    results, late = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert late is not None
+
+
+def test_stop_during_collection_fails_collected_callers():
+    async def scenario():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_ms=2000)
+        task = asyncio.ensure_future(batcher.submit("q"))
+        await asyncio.sleep(0.05)  # "q" retiré de la file, lot en attente de max_wait
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 1.0)
+
+    (result,) = asyncio.run(scenario())
+    assert isinstance(result, RuntimeError)
@@ -0,0 +1,71 @@
+"""
+Lecture incrémentale des uploads de /predict_batch (tableau JSON et NDJSON)
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from bulk_io import BulkFormatError, chunked, iter_file, iter_json_array, iter_ndjson
+
+
+def _read(reader_factory, payload: bytes, chunk_size: int):
+    async def scenario():
+        source = iter_file(io.BytesIO(payload), chunk_size)
+        return [item async for item in reader_factory(source)]
+    return asyncio.run(scenario())
+
+
+QUERIES = ["Scan furtif sur 10.0.0.1", {"query": "Détection d'OS évasion"}, "ping 192.168.1.0/24"]
+EXPECTED = [("Scan furtif sur 10.0.0.1", None), ("Détection d'OS évasion", None), ("ping 192.168.1.0/24", None)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 4096])
+def test_json_array_any_chunking(chunk_size):
+    payload = json.dumps(QUERIES, ensure_ascii=False).encode("utf-8")
+    assert _read(iter_json_array, payload, chunk_size) == EXPECTED
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_ndjson_any_chunking(chunk_size):
+    payload = "\n".join(json.dumps(q, ensure_ascii=False) for q in QUERIES).encode("utf-8") + b"\n\n"
+    assert _read(iter_ndjson, payload, chunk_size) == EXPECTED
+
+
+def test_invalid_items_are_reported_not_fatal():
+    items = _read(iter_json_array, b'["a", 42, {"q": 1}, "b"]', 3)
+    assert [q for q, _ in items] == ["a", None, None, "b"]
+    assert items[1][1] and items[2][1]
+
+    items = _read(iter_ndjson, b'"a"\nnot json\n"b"', 4)
+    assert [q for q, _ in items] == ["a", None, "b"]
+
+
+@pytest.mark.parametrize("payload", [b'{"query": "a"}', b'["a" "b"]', b'["a", "b"', b'[, "a"]',
+                                     b'["a",]', b'["a"] x', b'[]]', b'["a"]\n"b"'])
+def test_malformed_array_raises(payload):
+    with pytest.raises(BulkFormatError):
+        _read(iter_json_array, payload, 2)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_empty_array_and_trailing_whitespace(chunk_size):
+    assert _read(iter_json_array, b'[]', chunk_size) == []
+    assert _read(iter_json_array, b' [ "a" ] \n', chunk_size) == [("a", None)]
+
+
+def test_chunked_fixed_size():
+    async def numbers():
+        for i in range(7):
+            yield i
+
+    async def scenario():
+        return [batch async for batch in chunked(numbers(), 3)]
+
+    assert asyncio.run(scenario()) == [[0, 1, 2], [3, 4, 5], [6]]
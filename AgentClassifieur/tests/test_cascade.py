@@ -0,0 +1,76 @@
+"""
+Cascade règles → modèle : calibration, seuil et comptage des sorties.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from cascade import CascadeClassifier, KeywordTier
+
+
+class FakeModel:
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, queries):
+        self.seen.append(list(queries))
+        return [{"label": "MEDIUM", "tier": "model"} for _ in queries]
+
+
+def test_first_matching_rule_wins():
+    tier = KeywordTier()
+    assert tier.match("Fragment packets when scanning 10.0.0.1") == ("hard_evasion", "HARD")
+    assert tier.match("nmap -sV --script vuln 10.0.0.1") == ("medium_scripts", "MEDIUM")
+    assert tier.match("nmap -sn 192.168.1.0/24") == ("easy_ping", "EASY")
+    # Options Nmap sensibles à la casse : -sN (null scan) ≠ -sn (ping)
+    assert tier.match("nmap -sN 192.168.1.1") == ("hard_scan_type", "HARD")
+    assert tier.match("Scan all ports on 192.168.1.1") == (None, None)
+
+
+def test_calibration_is_laplace_smoothed_precision():
+    tier = KeywordTier()
+    tier.calibrate(
+        ["decoy scan", "stealth scan", "version scan", "version scan"],
+        ["hard", "HARD", "MEDIUM", "easy"],
+    )
+    assert tier.calibration["hard_evasion"] == {"total": 2, "correct": 2}
+    assert tier.confidence("hard_evasion") == pytest.approx(3 / 4)
+    assert tier.confidence("medium_detection") == pytest.approx(2 / 4)
+    assert tier.confidence("easy_simple") == pytest.approx(1 / 2)
+
+
+def test_uncalibrated_tier_never_exits():
+    model = FakeModel()
+    cascade = CascadeClassifier(KeywordTier(), model, threshold=0.5)
+    assert cascade.predict("decoy scan")["tier"] == "model"
+    assert cascade.stats()["exits"] == {"keywords": 0, "model": 1}
+
+
+def test_threshold_and_batch_order():
+    tier = KeywordTier(calibration={"hard_evasion": {"total": 98, "correct": 98},
+                                    "easy_ping": {"total": 10, "correct": 6}})
+    model = FakeModel()
+    cascade = CascadeClassifier(tier, model, threshold=0.9)
+
+    results = cascade.predict_batch(["ping 10.0.0.1", "decoy scan 10.0.0.1", "scan all ports"])
+    assert [r["tier"] for r in results] == ["model", "keywords", "model"]
+    assert results[1]["label"] == "HARD" and results[1]["rule"] == "hard_evasion"
+    # Le modèle reçoit un seul lot avec les requêtes non résolues
+    assert model.seen == [["ping 10.0.0.1", "scan all ports"]]
+    assert cascade.stats()["exit_rate"] == {"keywords": pytest.approx(1 / 3, abs=1e-4),
+                                            "model": pytest.approx(2 / 3, abs=1e-4)}
+
+
+def test_save_load_roundtrip(tmp_path):
+    tier = KeywordTier()
+    tier.calibrate(["decoy scan"], ["HARD"])
+    path = str(tmp_path / "rules.json")
+    tier.save(path)
+
+    loaded = KeywordTier.load(path)
+    assert loaded.match("decoy scan") == tier.match("decoy scan")
+    assert loaded.confidence("hard_evasion") == tier.confidence("hard_evasion")
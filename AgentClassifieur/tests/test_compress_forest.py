@@ -0,0 +1,96 @@
+"""
+Compression de CompiledForest : sous-ensembles d'arbres, profondeur limitée, types réduits.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from compress_forest import order_trees, out_of_bag_mask, tree_probas
+from fast_forest import CompiledForest
+
+
+def _data(n=400, n_features=30):
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 20, size=(n, n_features)).astype(float)
+    X[:, 2] = rng.rand(n)  # une feature continue
+    y = (X[:, 0] + X[:, 1] * 2 + rng.randint(0, 3, n)) % 3
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    X, y = _data()
+    model = RandomForestClassifier(n_estimators=40, random_state=42).fit(X, y)
+    return model, CompiledForest.from_sklearn(model), X, y
+
+
+def test_float32_thresholds_keep_every_decision(fitted):
+    model, forest, X, _ = fitted
+    compact = forest.quantize("float32")
+    unseen = np.random.RandomState(1).uniform(-50, 50, size=(300, 30))
+    assert compact.threshold.dtype == np.float32 and compact.left.dtype == np.int16
+    assert compact.nbytes < forest.nbytes / 2
+    for data in (X, unseen):
+        np.testing.assert_array_equal(compact.apply(data), forest.apply(data))
+        np.testing.assert_allclose(compact.predict_proba(data), model.predict_proba(data), atol=1e-6)
+
+
+def test_int16_is_exact_on_integer_features(fitted):
+    _, forest, X, _ = fitted
+    compact = forest.quantize("int16", X)
+    assert compact.scale[0] == 1 and compact.scale[2] > 1
+    integer = X.copy()
+    integer[:, 2] = 0.5  # feature continue fixée : seules les features entières décident
+    np.testing.assert_array_equal(compact.apply(integer), forest.apply(integer))
+    assert (compact.predict(X) == forest.predict(X)).mean() > 0.98
+
+
+def test_select_trees_matches_sklearn_subset(fitted):
+    model, forest, X, _ = fitted
+    trees = [3, 7, 21]
+    expected = np.mean([model.estimators_[t].predict_proba(X) for t in trees], axis=0)
+    np.testing.assert_allclose(forest.select_trees(trees).predict_proba(X), expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_truncate_matches_depth_limited_tree(depth):
+    X, y = _data()
+    full = DecisionTreeClassifier(random_state=0).fit(X, y)
+    short = DecisionTreeClassifier(random_state=0, max_depth=depth).fit(X, y)
+    truncated = CompiledForest.from_sklearn(full).truncate(depth)
+    assert truncated.max_depth == depth and len(truncated.feature) == short.tree_.node_count
+    np.testing.assert_allclose(truncated.predict_proba(X), short.predict_proba(X), atol=1e-12)
+
+
+@pytest.mark.parametrize("name", ["forest", "forest.npz"])
+def test_quantized_roundtrip_and_append(tmp_path, fitted, name):
+    _, forest, X, y = fitted
+    compact = forest.truncate(6).quantize("int16", X)
+    compact.save(str(tmp_path / name))
+    loaded = CompiledForest.load(str(tmp_path / name))
+    np.testing.assert_array_equal(loaded.scale, compact.scale)
+    np.testing.assert_array_equal(loaded.predict_proba(X), compact.predict_proba(X))
+
+    extra = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y))
+    merged = loaded.append(extra)
+    assert len(merged.roots) == len(compact.roots) + 5 and merged.threshold.dtype == np.int16
+
+
+def test_tree_order_puts_useful_trees_first(fitted):
+    model, forest, X, y = fitted
+    noisy = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=10, random_state=0)
+                                        .fit(X, np.random.RandomState(3).randint(0, 3, len(y))))
+    mixed = noisy.append(forest)  # 10 arbres entraînés sur des étiquettes aléatoires, puis 40 bons
+    order = order_trees(tree_probas(mixed, X), y, mixed.classes_)
+    assert sorted(order) == list(range(50))
+    assert min(order[:5]) >= 10
+
+    mask = out_of_bag_mask(model, len(X))
+    assert mask.shape == (40, len(X)) and 0.2 < mask.mean() < 0.5
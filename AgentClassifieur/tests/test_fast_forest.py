@@ -0,0 +1,97 @@
+"""
+Équivalence entre CompiledForest et sklearn RandomForestClassifier.predict_proba
+"""
+
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from sklearn.ensemble import RandomForestClassifier
+from fast_forest import CompiledForest
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "complexity_classifier.pkl")
+
+
+def _random_forest(n_features=30, n_classes=3, **kwargs):
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 20, size=(400, n_features)).astype(float)
+    X[:, 2] = rng.rand(400)  # une feature continue
+    y = (X[:, 0] + X[:, 1] * 2 + rng.randint(0, 3, 400)) % n_classes
+    model = RandomForestClassifier(n_estimators=50, random_state=42, **kwargs).fit(X, y)
+    return model, X
+
+
+def test_proba_equivalence_synthetic():
+    model, X = _random_forest()
+    forest = CompiledForest.from_sklearn(model)
+
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+
+def test_single_row_and_unseen_values():
+    model, _ = _random_forest()
+    forest = CompiledForest.from_sklearn(model)
+
+    rng = np.random.RandomState(1)
+    X = rng.uniform(-50, 50, size=(200, 30))
+    for row in X[:20]:
+        np.testing.assert_allclose(forest.predict_proba([row]), model.predict_proba([row]), atol=1e-12)
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+
+def test_class_weight_and_string_labels():
+    rng = np.random.RandomState(2)
+    X = rng.rand(300, 8)
+    y = np.where(X[:, 0] > 0.6, "HARD", np.where(X[:, 1] > 0.5, "MEDIUM", "EASY"))
+    model = RandomForestClassifier(n_estimators=30, class_weight="balanced", random_state=0).fit(X, y)
+    forest = CompiledForest.from_sklearn(model)
+
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("name", ["forest", "forest.npz"])
+def test_save_load_roundtrip(tmp_path, name):
+    model, X = _random_forest(max_depth=6)
+    path = str(tmp_path / name)
+    CompiledForest.from_sklearn(model).save(path)
+    forest = CompiledForest.load(path)
+
+    assert forest.n_features_in_ == model.n_features_in_
+    assert forest.max_depth <= 6
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+
+def test_directory_export_is_memory_mapped(tmp_path):
+    model, X = _random_forest()
+    path = str(tmp_path / "forest")
+    CompiledForest.from_sklearn(model).save(path)
+    forest = CompiledForest.load(path)
+
+    for name in ["feature", "threshold", "left", "right", "value"]:
+        array = getattr(forest, name)
+        assert isinstance(array, np.memmap) or isinstance(array.base, np.memmap)
+        assert not array.flags.writeable
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+
+def test_shipped_model_equivalence():
+    import joblib
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = joblib.load(MODEL_PATH)
+    forest = CompiledForest.from_sklearn(model)
+    assert len(forest.roots) == model.n_estimators
+
+    rng = np.random.RandomState(3)
+    X = rng.randint(0, 15, size=(500, model.n_features_in_)).astype(float)
+    X[:, 11] = rng.rand(500)   # ratio mots-clés HARD
+    X[:, 26] = rng.rand(500)   # fréquence KG
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
@@ -0,0 +1,77 @@
+"""
+Cache LRU des vecteurs de features
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from utils import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_order():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1      # "a" redevient le plus récent
+    cache.put("c", 3)               # évince "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiration_and_hit_rate():
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl=60, clock=clock)
+    cache.put("q", [1, 2])
+    assert cache.get("q") == [1, 2]
+    clock.now = 61
+    assert cache.get("q") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["expirations"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert len(cache) == 0
+
+
+def test_zero_size_disables_cache():
+    cache = LRUCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def features_module():
+    spacy = pytest.importorskip("spacy")
+    try:
+        spacy.load("fr_core_news_sm")
+    except OSError:
+        pytest.skip("fr_core_news_sm non installé")
+    import extract_features
+    extract_features.FEATURE_CACHE.clear()
+    return extract_features
+
+
+def test_cached_features_match_uncached(features_module):
+    ef = features_module
+    queries = ["Scan furtif avec decoys sur 10.0.0.1", "SCAN FURTIF avec decoys sur 10.0.0.1", "", "ping -p 80 10.0.0.1"]
+
+    assert [ef.get_features(q) for q in queries] == [ef.extract_features(q) for q in queries]
+    assert [ef.get_features_dict(q) for q in queries] == [ef.extract_features_dict(q) for q in queries]
+    assert ef.get_features_batch(queries * 2) == [ef.extract_features(q) for q in queries * 2]
+    assert ef.FEATURE_CACHE.stats()["hits"] > 0
+
+    # Une copie est retournée : modifier le résultat ne touche pas le cache
+    vector = ef.get_features(queries[0])
+    vector[0] = -1
+    assert ef.get_features(queries[0]) == ef.extract_features(queries[0])
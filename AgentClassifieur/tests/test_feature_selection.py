@@ -0,0 +1,63 @@
+"""
+Groupes de features, importance par permutation et front de Pareto coût / précision.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from extract_features import FEATURE_GROUPS, N_FEATURES, disabled_pipes, group_columns
+from select_features import cost_key, group_importance, mark_pareto, subsets
+
+PIPE_NAMES = ["tok2vec", "morphologizer", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+
+class FirstColumnModel:
+    """Prédit la classe 1 si la colonne 0 est positive : seul le groupe "a" compte."""
+
+    def predict(self, X):
+        return (X[:, 0] > 0).astype(int)
+
+
+def test_groups_partition_the_feature_vector():
+    columns = [c for cols in FEATURE_GROUPS.values() for c in cols]
+    assert sorted(columns) == list(range(N_FEATURES)) == list(range(30))
+    assert group_columns(["kg", "pos"]) == [1, 2, 3, 24, 25, 26, 27, 28, 29]
+    with pytest.raises(ValueError):
+        group_columns(["inconnu"])
+
+
+def test_cheap_groups_disable_the_whole_spacy_pipeline():
+    assert disabled_pipes(["text", "tokens"], PIPE_NAMES) == PIPE_NAMES
+    assert disabled_pipes(["pos"], PIPE_NAMES) == ["parser", "lemmatizer", "ner"]
+    assert disabled_pipes(["ner"], PIPE_NAMES) == ["morphologizer", "attribute_ruler", "lemmatizer"]
+
+
+def test_cost_key_groups_equivalent_extractions():
+    assert len(subsets()) == 2 ** len(FEATURE_GROUPS) - 1
+    assert cost_key(("text",)) == cost_key(("text", "tokens"))
+    assert cost_key(("pos",)) != cost_key(("pos", "kg"))  # même pipeline, plus l'index KG
+
+
+def test_group_importance_only_for_used_columns():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    importance = group_importance(FirstColumnModel(), X, y, {"a": [0], "b": [1, 2]}, n_repeats=5)
+    assert importance["a"][0] > 0.3
+    assert importance["b"] == (0.0, 0.0)
+
+
+def test_pareto_front_on_accuracy_and_cost():
+    candidates = [
+        {"cv_accuracy": 0.80, "extraction_ms": 0.1},
+        {"cv_accuracy": 0.85, "extraction_ms": 1.0},
+        {"cv_accuracy": 0.80, "extraction_ms": 0.5},  # aussi précis que le premier, plus cher
+        {"cv_accuracy": 0.70, "extraction_ms": 0.1},
+    ]
+    mark_pareto(candidates)
+    assert [c["pareto"] for c in candidates] == [True, True, False, False]
@@ -0,0 +1,74 @@
+"""
+Matrice de features en cache disque : une seule extraction par empreinte.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from feature_store import fingerprint, load_or_extract
+
+
+class CountingExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, queries):
+        self.calls += 1
+        return [[len(q), q.count(" "), 1.0] for q in queries]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text('query,complexity\n"scan simple",easy\n"scan furtif -f",HARD\n"scan -sV", Medium\n',
+                    encoding="utf-8")
+    return str(path)
+
+
+def test_extracts_once_then_reads_store(tmp_path, csv_path):
+    extract = CountingExtractor()
+    store = str(tmp_path / "store")
+
+    X, y, meta = load_or_extract(csv_path, store, extract=extract, verbose=False)
+    assert extract.calls == 1
+    assert X.shape == (3, 3) and y.tolist() == [0, 2, 1]
+    assert meta["rows"] == 3
+
+    X2, y2, meta2 = load_or_extract(csv_path, store, extract=extract, verbose=False)
+    assert extract.calls == 1
+    np.testing.assert_array_equal(X, X2)
+    np.testing.assert_array_equal(y, y2)
+    assert meta2["key"] == meta["key"]
+
+
+def test_dataset_change_invalidates(tmp_path, csv_path):
+    extract = CountingExtractor()
+    store = str(tmp_path / "store")
+    load_or_extract(csv_path, store, extract=extract, verbose=False)
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write('"ping 10.0.0.1",easy\n')
+    X, _, _ = load_or_extract(csv_path, store, extract=extract, verbose=False)
+    assert extract.calls == 2 and len(X) == 4
+
+
+def test_fingerprint_depends_on_version_and_kg(tmp_path, csv_path):
+    kg = tmp_path / "kg_index.json"
+    base = fingerprint(csv_path, kg_index_path=str(kg), version=1)
+    assert base["kg_index_sha256"] is None
+    assert fingerprint(csv_path, kg_index_path=str(kg), version=2)["key"] != base["key"]
+
+    kg.write_text("{}", encoding="utf-8")
+    assert fingerprint(csv_path, kg_index_path=str(kg), version=1)["key"] != base["key"]
+
+
+def test_unknown_label(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("query,complexity\nscan,extreme\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_or_extract(str(path), str(tmp_path / "store"), extract=CountingExtractor(), verbose=False)
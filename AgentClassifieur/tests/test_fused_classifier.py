@@ -0,0 +1,76 @@
+"""
+Modèle fusionné 4 classes (IRRELEVANT compris) et référence en deux passes.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from fast_forest import CompiledForest
+from feature_store import LABEL_MAPPING
+from fused_classifier import FUSED_LABELS, IRRELEVANT, compile_fused, evaluate, train_forest, two_stage_predict
+
+
+def _data(n=200, n_features=30):
+    rng = np.random.RandomState(0)
+    X = rng.rand(n, n_features)
+    y = np.minimum((X[:, 0] * 4).astype(int), 3)  # 4 classes séparables sur la feature 0
+    return X, y
+
+
+def test_labels_match_feature_store_mapping():
+    assert [LABEL_MAPPING[label.lower()] for label in FUSED_LABELS] == list(range(4))
+    assert IRRELEVANT == LABEL_MAPPING["irrelevant"]
+
+
+def test_compiled_fused_forest_keeps_labels_and_schema(tmp_path):
+    X, y = _data()
+    forest = compile_fused(train_forest(X, y))
+    forest.save(str(tmp_path / "fused"))
+    loaded = CompiledForest.load(str(tmp_path / "fused"))
+    assert loaded.info["labels"] == FUSED_LABELS
+    assert loaded.info["feature_schema"] == "spacy/v1"
+    assert loaded.classes_.tolist() == [0, 1, 2, 3]
+    assert (loaded.predict(X) == y).mean() > 0.95
+
+
+def test_two_stage_rejected_queries_skip_the_model():
+    X = np.zeros((3, 30))
+
+    class Model:
+        calls = []
+
+        def predict(self, rows):
+            self.calls.append(len(rows))
+            return np.full(len(rows), 2)
+
+    model = Model()
+    preds = two_stage_predict(["nmap -sS", "recette", "scan"], X, lambda q: q != "recette", model)
+    assert preds.tolist() == [2, IRRELEVANT, 2]
+    assert model.calls == [2]
+
+    result = evaluate(np.array([2, IRRELEVANT, 1]), preds, seconds=0.003)
+    assert result["accuracy"] == 2 / 3
+    assert result["relevance_precision"] == 1.0 and result["relevance_recall"] == 1.0
+    assert result["per_class_recall"]["IRRELEVANT"] == 1.0 and result["per_class_recall"]["EASY"] is None
+
+
+def test_router_refuses_fused_forest_without_fused_stage():
+    import pytest
+    import router
+
+    X, y = _data()
+    fused = compile_fused(train_forest(X, y))
+    assert not router.FUSED_STAGE and len(router.LABELS) == 3
+    with pytest.raises(ValueError):
+        router._check_model(fused)
+
+    three_classes = CompiledForest.from_sklearn(train_forest(X[y < 3], y[y < 3]))
+    assert router._check_model(three_classes) is three_classes
+
+    # Forêt antérieure aux schémas (pickle suivi) : spacy/v1 pour le router
+    three_classes.info.pop("feature_schema")
+    assert router._check_model(three_classes) is three_classes
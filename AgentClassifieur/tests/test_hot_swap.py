@@ -0,0 +1,113 @@
+"""
+Remplacement à chaud : version de l'artefact, schéma, préchauffage et échange.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from hot_swap import HotSwapper, RecentQueries, artifact_version, check_schema
+
+LABELS = ["EASY", "MEDIUM", "HARD"]
+
+
+class FakeModel:
+    def __init__(self, name, classes=(0, 1, 2), n_features=30):
+        self.name = name
+        self.classes_ = list(classes)
+        self.n_features_in_ = n_features
+
+
+class Served:
+    """Modèle servi + journal des étapes, à la place du router."""
+
+    def __init__(self, path):
+        self.path = path
+        self.model = FakeModel("initial")
+        self.warmed = []
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            name, classes, n_features = f.read().split(";")
+        return FakeModel(name, [int(c) for c in classes.split(",")], int(n_features))
+
+    def warm(self, model, queries):
+        self.warmed.append((model.name, list(queries)))
+
+    def swap(self, model):
+        self.model = model
+
+
+def write(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def served(tmp_path):
+    path = str(tmp_path / "model.txt")
+    write(path, "initial;0,1,2;30")
+    served = Served(path)
+    recent = RecentQueries()
+    served.swapper = HotSwapper(
+        [path], served.load, lambda m: check_schema(m, 30, LABELS), served.warm, served.swap, recent,
+    )
+    served.recent = recent
+    return served
+
+
+def test_schema_check():
+    check_schema(FakeModel("ok"), 30, LABELS)
+    with pytest.raises(ValueError):
+        check_schema(FakeModel("classes", classes=(0, 1)), 30, LABELS)
+    with pytest.raises(ValueError):
+        check_schema(FakeModel("features", n_features=14), 30, LABELS)
+
+
+def test_version_follows_content(tmp_path):
+    path = str(tmp_path / "model.txt")
+    write(path, "a")
+    version = artifact_version([path])
+    write(path, "a")
+    assert artifact_version([path]) == version
+    write(path, "b")
+    assert artifact_version([path]) != version
+    assert artifact_version([str(tmp_path / "absent")]) == "absent"
+
+
+def test_recent_queries_sample_latest_unique():
+    recent = RecentQueries(max_size=4)
+    recent.extend(["a", "b", "a", "c", "d"])
+    assert recent.sample(3) == ["d", "c", "a"]
+
+
+def test_reload_warms_on_recent_queries_then_swaps(served):
+    assert served.swapper.reload()["reason"] == "artefact inchangé"
+    served.recent.extend(["scan 10.0.0.1", "ping 10.0.0.2"])
+    write(served.path, "v2;0,1,2;30")
+
+    report = served.swapper.reload()
+    assert report["swapped"] and report["previous_version"] != report["version"]
+    assert served.warmed == [("v2", ["ping 10.0.0.2", "scan 10.0.0.1"])]
+    assert served.model.name == "v2"
+    assert served.swapper.stats()["version"] == report["version"]
+
+
+def test_invalid_artifact_keeps_the_old_model(served):
+    write(served.path, "bad;0,1;30")
+    report = served.swapper.reload()
+    assert not report["swapped"] and "Classes" in report["error"]
+    assert served.model.name == "initial" and served.warmed == []
+    # Pas de nouvelle tentative tant que l'artefact ne change pas
+    assert served.swapper.check() is None
+
+
+def test_watch_waits_for_a_stable_signature(served):
+    write(served.path, "v3;0,1,2;30")
+    assert served.swapper.check() is None         # changement vu, pas encore stable
+    assert served.swapper.check()["swapped"]      # même signature au passage suivant
+    assert served.model.name == "v3"
@@ -0,0 +1,60 @@
+"""
+Extraction par colonnes de NmapFeatureExtractor : identique à la version ligne par ligne.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from hybrid_classifier import HybridNmapClassifier, NmapFeatureExtractor
+
+COMMANDS = [
+    "nmap -sn 192.168.1.0/24",
+    "nmap -sV -O -T4 192.168.1.1",
+    "nmap -sS -p 1-1000,500-1500,80 -sV --script vuln -T5 -T1 10.0.0.0/8",
+    "nmap -p 80,443 192.168.1.1",
+    "nmap -f --data decoy -oN out.txt -6 2001:db8::1",
+    "nmap -p 20-10,5 --traceroute 10.0.0.1",
+    "nmap -p * -sU 10.0.0.2",
+    "nmap -p 1-65535 -sT -sA -sM 10.0.0.3",
+    "nmap -sV -O -T4 192.168.1.1",
+]
+
+
+def reference_frame(commands):
+    return pd.DataFrame([NmapFeatureExtractor.extract_features(c) for c in commands])
+
+
+@pytest.mark.parametrize("commands", [COMMANDS, COMMANDS[::-1], COMMANDS[3:5], ["nmap -T2 a", "nmap -T0 b"]])
+def test_frame_matches_row_by_row(commands):
+    # Ordre et type de la colonne timing_value selon la première commande
+    pd.testing.assert_frame_equal(NmapFeatureExtractor.extract_features_frame(commands), reference_frame(commands))
+
+
+def test_port_counts_use_interval_union():
+    commands = pd.Series(COMMANDS)
+    counts = NmapFeatureExtractor.count_ports_column(commands)
+    assert counts.tolist() == [NmapFeatureExtractor.count_ports(c) for c in COMMANDS]
+    assert counts[2] == 1500 and counts[5] == 1 and counts[6] == 65535 and counts[7] == 65535
+
+
+def test_invalid_port_spec_raises_like_scalar():
+    with pytest.raises(ValueError):
+        NmapFeatureExtractor.count_ports("nmap -p 1-2-3 x")
+    with pytest.raises(ValueError):
+        NmapFeatureExtractor.count_ports_column(pd.Series(["nmap -p 80 x", "nmap -p 1-2-3 x"]))
+
+
+def test_batch_predict_matches_predict(tmp_path):
+    labels = ["EASY", "MEDIUM", "HARD", "EASY", "HARD", "MEDIUM", "MEDIUM", "HARD", "MEDIUM"]
+    path = tmp_path / "commands.csv"
+    pd.DataFrame({"command": COMMANDS * 2, "complexity": labels * 2}).to_csv(path, index=False)
+
+    classifier = HybridNmapClassifier()
+    classifier.train(str(path))
+    expected = pd.DataFrame([classifier.predict(c) for c in COMMANDS])
+    pd.testing.assert_frame_equal(classifier.batch_predict(COMMANDS), expected, check_dtype=False)
@@ -0,0 +1,92 @@
+"""
+Index mémoire du KG : mêmes 6 features que les requêtes Cypher UNWIND $terms
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from kg_index import KGFeatureIndex, OPTIONS_QUERY, SCAN_TYPES_QUERY, PORTS_QUERY, SCRIPTS_QUERY
+
+
+# Faux driver Neo4j : une liste d'enregistrements par requête de chargement
+RECORDS = {
+    OPTIONS_QUERY: [
+        {"name": "version", "freq": 0.8, "relations": 3},
+        {"name": "script", "freq": 0.4, "relations": 2},
+        {"name": "script", "freq": 0.2, "relations": 0},  # deux noeuds de même nom
+    ],
+    SCAN_TYPES_QUERY: [{"name": "syn"}, {"name": "udp"}, {"name": "idle"}],
+    PORTS_QUERY: [{"number": "80"}, {"number": "443"}],
+    SCRIPTS_QUERY: [
+        {"name": "vuln", "category": "vuln"},
+        {"name": "http-title", "category": "safe"},
+        {"name": "brute", "category": None},
+    ],
+}
+
+
+class FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        return RECORDS[query]
+
+
+class FakeDriver:
+    def session(self):
+        return FakeSession()
+
+
+def test_compute_matches_cypher_semantics():
+    index = KGFeatureIndex.from_neo4j(FakeDriver())
+
+    features = index.compute(["scan", "syn", "version", "script", "script", "80", "80", "vuln"])
+    # options : 3 noeuds distincts ; relations : 3 + 2*(2 + 0) ; fréquence : moyenne par ligne
+    assert features[0] == 3
+    assert features[1] == 7
+    assert abs(features[2] - (0.8 + 0.4 + 0.2 + 0.4 + 0.2) / 5) < 1e-12
+    assert features[3] == 2
+    assert features[4] == 1
+    assert features[5] == 3
+
+
+def test_unknown_terms_give_zeros():
+    index = KGFeatureIndex.from_neo4j(FakeDriver())
+    assert index.compute(["météo", "pizza"]) == [0, 0, 0.0, 0, 0, 0]
+    assert KGFeatureIndex().compute(["syn"]) == [0, 0, 0.0, 0, 0, 0]
+
+
+def test_save_load_roundtrip(tmp_path):
+    index = KGFeatureIndex.from_neo4j(FakeDriver())
+    path = str(tmp_path / "kg_index.json")
+    index.save(path)
+    loaded = KGFeatureIndex.load(path)
+
+    terms = ["udp", "idle", "script", "443", "http-title", "brute"]
+    assert loaded.compute(terms) == index.compute(terms)
+    assert len(loaded) == len(index)
+
+
+def test_background_refresh_logs_failures(caplog):
+    index = KGFeatureIndex.from_neo4j(FakeDriver())
+    before = index.compute(["syn", "version"])
+
+    def broken_driver():
+        raise ConnectionError("neo4j down")
+
+    stop = threading.Event()
+    with caplog.at_level("WARNING", logger="kg_index"):
+        thread = index.start_background_refresh(broken_driver, interval=0.01, stop_event=stop)
+        thread.join(0.1)
+        stop.set()
+        thread.join()
+
+    assert "neo4j down" in caplog.text
+    assert index.compute(["syn", "version"]) == before
@@ -0,0 +1,52 @@
+"""
+Moteur n-grammes hachés : hachage, entraînement et sauvegarde.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ngram_engine import NgramEngine
+
+QUERIES = [
+    "ping 192.168.1.1", "simple ping scan of 10.0.0.1", "ping sweep 192.168.1.0/24",
+    "version detection on 10.0.0.5", "run vuln scripts on 192.168.1.10", "detect os and services",
+    "fragment packets with decoys", "stealth scan with spoofed mac", "idle scan through zombie host",
+]
+LABELS = [0, 0, 0, 1, 1, 1, 2, 2, 2]
+
+
+def test_ngrams_cover_words_and_characters():
+    grams = NgramEngine(word_ngrams=(1, 2), char_ngrams=(2, 2)).ngrams("Ping host")
+    assert {"w:ping", "w:host", "w:ping host"} <= set(grams)
+    assert {"c: p", "c:pi", "c:g "} <= set(grams)
+
+
+def test_hashed_vector_is_l2_normalised():
+    indices, values = NgramEngine(n_features=64).hashed("nmap -sS 10.0.0.1")
+    assert indices.max() < 64
+    assert len(np.unique(indices)) == len(indices)
+    assert np.sum(values ** 2) == pytest.approx(1.0)
+    assert len(NgramEngine().hashed("   ")[0]) == 0
+
+
+def test_fit_predict_and_probabilities():
+    engine = NgramEngine(n_features=2 ** 12).fit(QUERIES, LABELS)
+    assert list(engine.predict(QUERIES)) == LABELS
+    proba = engine.predict_proba(["ping 10.0.0.2", "decoy scan"])
+    assert proba.shape == (2, 3)
+    assert proba.sum(axis=1) == pytest.approx([1.0, 1.0])
+
+
+def test_save_load_roundtrip(tmp_path):
+    engine = NgramEngine(n_features=2 ** 12, char_ngrams=(3, 3)).fit(QUERIES, LABELS)
+    path = str(tmp_path / "ngram.npz")
+    engine.save(path)
+
+    loaded = NgramEngine.load(path)
+    assert loaded.n_features == engine.n_features and loaded.char_ngrams == (3, 3)
+    np.testing.assert_allclose(loaded.predict_proba(QUERIES), engine.predict_proba(QUERIES))
@@ -0,0 +1,136 @@
+"""
+Feedback en ajout seul + mise à jour incrémentale de la forêt compilée.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from sklearn.ensemble import RandomForestClassifier
+from fast_forest import CompiledForest
+from feedback_store import FeedbackStore, label_to_class
+from online_trainer import OnlineTrainer
+from vectorizer import SPACY_SCHEMA
+
+
+def _forest(n_estimators=30, seed=0, classes=3):
+    rng = np.random.RandomState(seed)
+    X = rng.randint(0, 10, size=(200, 30)).astype(float)
+    y = (X[:, 0] + X[:, 1]) % classes
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+    model.feature_schema_ = SPACY_SCHEMA.id
+    return model, X
+
+
+def _fill(store, n, label="HARD", version=1, seed=0):
+    rng = np.random.RandomState(seed)
+    for i in range(n):
+        store.append(f"requête {i}", label, rng.randint(0, 10, 30), version)
+
+
+def test_label_to_class():
+    assert label_to_class("easy") == 0
+    assert label_to_class(" HARD ") == 2
+    assert label_to_class(1) == 1
+    with pytest.raises(ValueError):
+        label_to_class("IRRELEVANT")
+
+
+def test_store_append_and_resume(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.jsonl"))
+    _fill(store, 3, "MEDIUM")
+    _fill(store, 2, "EASY", version=0)  # ancienne version de l'extracteur
+
+    X, y, end = store.load(0, version=1)
+    assert X.shape == (3, 30)
+    assert y.tolist() == [1, 1, 1]
+    assert end == 5
+
+    _fill(store, 1, "HARD")
+    X, y, end = store.load(end, version=1)
+    assert y.tolist() == [2]
+    assert end == 6
+
+
+def test_store_skips_bad_and_truncated_lines(tmp_path):
+    path = tmp_path / "feedback.jsonl"
+    store = FeedbackStore(str(path))
+    _fill(store, 2)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("pas du json\n")
+        f.write('{"query": "coupé", "lab')  # écriture interrompue
+
+    X, y, end = store.load()
+    assert len(y) == 2
+    assert end == 3  # la ligne tronquée sera relue une fois complète
+    assert len(store) == 2
+
+
+def test_empty_store(tmp_path):
+    X, y, end = FeedbackStore(str(tmp_path / "absent.jsonl")).load()
+    assert len(X) == 0
+    assert len(y) == 0 and end == 0
+
+
+def test_append_matches_combined_vote():
+    model_a, X = _forest(30, seed=0)
+    model_b, _ = _forest(10, seed=1)
+    a, b = CompiledForest.from_sklearn(model_a), CompiledForest.from_sklearn(model_b)
+
+    merged = a.append(b)
+    expected = (model_a.predict_proba(X) * 30 + model_b.predict_proba(X) * 10) / 40
+    assert len(merged.roots) == 40
+    np.testing.assert_allclose(merged.predict_proba(X), expected, atol=1e-12)
+
+
+def test_append_pads_missing_classes():
+    base = CompiledForest.from_sklearn(_forest(10)[0])
+    X = np.random.RandomState(3).randint(0, 10, size=(20, 30)).astype(float)
+    only_hard = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, np.full(20, 2))
+
+    merged = base.append(CompiledForest.from_sklearn(only_hard))
+    proba = merged.predict_proba(X)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    assert (proba[:, 2] >= 5 / 15).all()
+
+    unknown = RandomForestClassifier(n_estimators=2).fit(X, np.full(20, 7))
+    with pytest.raises(ValueError):
+        base.append(CompiledForest.from_sklearn(unknown))
+
+
+def test_trainer_update_saves_offset(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.jsonl"))
+    forest_path = str(tmp_path / "forest")
+    trainer = OnlineTrainer(store, forest_path, n_trees=5, min_samples=3, version=1)
+    base = CompiledForest.from_sklearn(_forest(20)[0])
+
+    _fill(store, 2)
+    updated, report = trainer.update(base)
+    assert updated is None and not report["updated"]
+
+    _fill(store, 2, seed=1)
+    updated, report = trainer.update(base)
+    assert report["updated"] and report["new_samples"] == 4
+    assert len(updated.roots) == 25 and len(base.roots) == 20
+    assert updated.info["feedback_offset"] == 4
+    assert updated.info["base_trees"] == 20
+
+    # Rechargé depuis le disque : rien à réapprendre
+    reloaded = CompiledForest.load(forest_path)
+    assert reloaded.info["feedback_offset"] == 4
+    assert trainer.pending(reloaded) == 0
+    assert trainer.update(reloaded)[0] is None
+
+    _fill(store, 3, seed=2)
+    again, _ = trainer.update(reloaded)
+    assert len(again.roots) == 30 and again.info["online_updates"] == 2
+
+
+def test_trainer_requires_compiled_forest(tmp_path):
+    trainer = OnlineTrainer(FeedbackStore(str(tmp_path / "f.jsonl")), None)
+    with pytest.raises(TypeError):
+        trainer.update(_forest(5)[0])
@@ -0,0 +1,60 @@
+"""
+Cache DocBin des parses spaCy : relu sans repasser par le pipeline, invalidé si le CSV change.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import spacy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from parse_cache import features_from_docs, load_or_parse
+
+QUERIES = ["nmap -sV 192.168.1.1", "Scan furtif decoy sur 10.0.0.0/24", "ping localhost"]
+
+
+class CountingNLP:
+    """Pipeline vierge + règle d'entités, qui compte ses passages."""
+
+    def __init__(self):
+        self.nlp = spacy.blank("fr")
+        ruler = self.nlp.add_pipe("entity_ruler")
+        ruler.add_patterns([{"label": "IP", "pattern": [{"TEXT": {"REGEX": r"^\d+\.\d+\.\d+\.\d+"}}]}])
+        self.meta = self.nlp.meta
+        self.calls = 0
+
+    def pipe(self, texts, batch_size=64):
+        self.calls += 1
+        return self.nlp.pipe(texts, batch_size=batch_size)
+
+
+def write_csv(path, queries):
+    pd.DataFrame({"query": queries, "complexity": ["easy"] * len(queries)}).to_csv(path, index=False)
+
+
+def test_second_load_reads_docbin(tmp_path):
+    data = str(tmp_path / "data.csv")
+    write_csv(data, QUERIES)
+    nlp = CountingNLP()
+
+    queries, docs, meta = load_or_parse(data, cache_dir=str(tmp_path / "cache"), nlp=nlp, verbose=False)
+    again, cached, stored = load_or_parse(data, cache_dir=str(tmp_path / "cache"), nlp=nlp, verbose=False)
+
+    assert nlp.calls == 1 and stored["key"] == meta["key"] and again == queries == QUERIES
+    assert [d.text for d in cached] == [q.lower() for q in QUERIES]
+    assert [[e.text for e in d.ents] for d in cached] == [["192.168.1.1"], ["10.0.0.0/24"], []]
+    assert features_from_docs(queries, cached, kg=False) == features_from_docs(queries, docs, kg=False)
+
+
+def test_dataset_change_reparses(tmp_path):
+    data = str(tmp_path / "data.csv")
+    nlp = CountingNLP()
+    write_csv(data, QUERIES)
+    _, _, first = load_or_parse(data, cache_dir=str(tmp_path / "cache"), nlp=nlp, verbose=False)
+    write_csv(data, QUERIES + ["nmap -O 10.0.0.1"])
+    _, docs, second = load_or_parse(data, cache_dir=str(tmp_path / "cache"), nlp=nlp, verbose=False)
+
+    assert nlp.calls == 2 and len(docs) == 4 and first["key"] != second["key"]
+    assert first["spacy_model"] == "fr_pipeline" and first["spacy_version"] == spacy.__version__
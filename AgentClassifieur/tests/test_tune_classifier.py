@@ -0,0 +1,38 @@
+"""
+Recherche d'hyperparamètres : un candidat par jeu de paramètres (n_estimators n'est fusionné que pour halving)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from tune_classifier import build_search, candidates_from_search
+
+
+def _data(n=120):
+    rng = np.random.RandomState(0)
+    X = rng.rand(n, 30)
+    return X, (X[:, 0] * 3).astype(int)
+
+
+def test_random_search_keeps_candidates_differing_by_trees():
+    X, y = _data()
+    search = build_search("random", n_iter=2, cv=2, n_jobs=1, seed=0)
+    search.set_params(param_distributions={"n_estimators": [5, 10], "max_depth": [3]}).fit(X, y)
+    candidates = candidates_from_search(search)
+    assert sorted(c["params"]["n_estimators"] for c in candidates) == [5, 10]
+
+
+def test_halving_keeps_last_round_per_candidate():
+    X, y = _data()
+    search = build_search("halving", n_iter=8, cv=2, n_jobs=1, seed=0)
+    search.set_params(min_resources=5, max_resources=40).fit(X, y)
+    candidates = candidates_from_search(search)
+    rounds = search.cv_results_["iter"]
+    assert len(candidates) == int((rounds == 0).sum())
+    # Chaque candidat promu garde son score du dernier tour (le plus d'arbres)
+    best = max(candidates, key=lambda c: c["params"]["n_estimators"])
+    assert best["params"]["n_estimators"] == max(p["n_estimators"] for p in search.cv_results_["params"])
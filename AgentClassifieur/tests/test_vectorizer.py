@@ -0,0 +1,113 @@
+"""
+Vectoriseur partagé : schémas déclarés, chemins unitaire / lot, refus des paires modèle-schéma incompatibles.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from sklearn.ensemble import RandomForestClassifier
+from fast_forest import CompiledForest
+from kg_index import KGFeatureIndex
+from vectorizer import (FEATURE_NAMES, LITE_SCHEMA, SPACY_SCHEMA, LiteVectorizer, QueryVectorizer,
+                        SpacyVectorizer, check_feature_schema, doc_vector, get_vectorizer, model_schema,
+                        vectorizer_for)
+
+QUERIES = [
+    "nmap -sV -O -T4 192.168.1.1",
+    "scan furtif decoy avec fragment sur 10.0.0.0/24",
+    "SCAN quick port host -sU --script vuln 10.0.0.1-5",
+    "",
+    "nmap -sV -O -T4 192.168.1.1",
+]
+
+
+class FakeDoc(list):
+    """Tokens sans POS ni entités, comme un pipeline spaCy réduit au tokenizer."""
+    ents = ()
+
+
+class FakeToken:
+    def __init__(self, text, pos=""):
+        self.text = text
+        self.pos_ = pos
+
+
+def test_schemas_declare_the_same_columns():
+    assert SPACY_SCHEMA.id == "spacy/v1" and LITE_SCHEMA.id == "lite/v1"
+    assert SPACY_SCHEMA.n_features == LITE_SCHEMA.n_features == len(FEATURE_NAMES) == 30
+    with pytest.raises(ValueError):
+        get_vectorizer("spacy/v0")
+
+
+def test_lite_batch_matches_single_query_path():
+    index = KGFeatureIndex(options=[("-sv", 3, 2)], scan_types=["syn"], ports=["80"], scripts=[("vuln", "vuln")])
+    vectorizer = get_vectorizer(LITE_SCHEMA.id, kg_index=index)
+    batch = vectorizer.vectorize_batch(QUERIES)
+    assert batch == [vectorizer.vectorize(q) for q in QUERIES]
+    assert all(len(row) == 30 for row in batch)
+    assert batch[0][24] == 1 and batch[1][17] == 1 and batch[2][14] == 1  # option KG, évasion, UDP
+
+
+def test_doc_vector_values():
+    query = "scan furtif un port -p 22 T1 sur 10.0.0.1"
+    doc = FakeDoc([FakeToken(t, "VERB" if t == "scan" else "") for t in query.lower().split()])
+    row = doc_vector(query, doc)
+    features = dict(zip(FEATURE_NAMES, row))
+    assert len(row) == 30 and row[24:] == [0, 0, 0.0, 0, 0, 0]
+    assert features["num_verbs"] == 1 and features["nb_hard_keywords"] == 2 and features["num_ips"] == 1
+    assert features["has_timing"] == 1 and features["num_entities"] == 0
+    assert features["complexity_score"] == 2 * 5 - 1  # furtif + t1, un seul port
+
+
+def test_schema_is_read_from_every_artifact_kind():
+    rng = np.random.RandomState(0)
+    model = RandomForestClassifier(n_estimators=3, random_state=0).fit(rng.rand(40, 30), rng.randint(0, 3, 40))
+    assert model_schema(model) is None and model_schema(CompiledForest.from_sklearn(model)) is None
+
+    model.feature_schema_ = LITE_SCHEMA.id
+    forest = CompiledForest.from_sklearn(model)
+    assert model_schema(model) == model_schema(forest) == LITE_SCHEMA.id
+    assert model_schema({"model": model, "feature_schema": SPACY_SCHEMA.id}) == SPACY_SCHEMA.id
+
+
+def test_mismatched_pairs_are_refused(tmp_path):
+    rng = np.random.RandomState(0)
+    model = RandomForestClassifier(n_estimators=3, random_state=0).fit(rng.rand(40, 30), rng.randint(0, 3, 40))
+    model.feature_schema_ = SPACY_SCHEMA.id
+    forest = CompiledForest.from_sklearn(model)
+    forest.save(str(tmp_path / "forest"))
+    loaded = CompiledForest.load(str(tmp_path / "forest"))
+
+    assert check_feature_schema(loaded, SPACY_SCHEMA) == SPACY_SCHEMA.id
+    with pytest.raises(ValueError):
+        LiteVectorizer().check(loaded)
+    with pytest.raises(ValueError):
+        check_feature_schema({"model": model, "feature_schema": "nmap-command/v1"}, LITE_SCHEMA)
+
+    # Modèle antérieur sans schéma : accepté seulement avec une surcharge explicite
+    with pytest.raises(ValueError):
+        check_feature_schema({"model": model}, LITE_SCHEMA)
+    assert check_feature_schema({"model": model}, LITE_SCHEMA, assume=LITE_SCHEMA.id) == LITE_SCHEMA.id
+
+
+def test_vectorizer_follows_model_schema():
+    with pytest.raises(TypeError):
+        QueryVectorizer()
+
+    assert isinstance(vectorizer_for({"feature_schema": LITE_SCHEMA.id}), LiteVectorizer)
+    assert isinstance(vectorizer_for({"feature_schema": SPACY_SCHEMA.id}), SpacyVectorizer)
+    with pytest.raises(ValueError):
+        vectorizer_for({"feature_schema": "nmap-command/v1"})
+    with pytest.raises(ValueError):
+        vectorizer_for({})
+
+    # Surcharge explicite, propre à chaque service, pour les artefacts antérieurs
+    assert isinstance(vectorizer_for({}, assume=LITE_SCHEMA.id), LiteVectorizer)
+    assert isinstance(vectorizer_for({}, assume=SPACY_SCHEMA.id), SpacyVectorizer)
+    with pytest.raises(ValueError):
+        check_feature_schema({}, SPACY_SCHEMA, assume=LITE_SCHEMA.id)
@@ -0,0 +1,169 @@
+"""
+Moteurs d'inférence interchangeables pour les agents T5 (MEDIUM / HARD).
+
+Un moteur expose `generate(**inputs, **generate_kwargs)` (mêmes arguments
+et même sortie que `model.generate` de transformers) et `device` :
+les agents et agents/batch_generation.py l'utilisent à la place du modèle.
+
+- eager : `model.generate` PyTorch tel quel (comportement historique)
+- compile : encodeur et décodeur passés par `torch.compile` (formes
+  dynamiques), la boucle de génération reste celle de transformers
+- onnx : checkpoint fusionné (agents/merged_checkpoint.py) exporté en
+  ONNX (encodeur, décodeur, décodeur avec past-key-values) puis décodé
+  avec ONNX Runtime sur CPU via optimum (`ORTModelForSeq2SeqLM`) ;
+  l'export est gardé dans `models/onnx/<adaptateur>-<hash>/`
+
+Sélection : INFERENCE_BACKEND=eager|compile|onnx ou `backend=` des agents.
+Le modèle PyTorch de l'agent n'est chargé que pour eager / compile : avec
+onnx il n'est chargé qu'en cas de repli, jamais en plus de la session ORT.
+Les modes de précision (agents/precision.py) ne s'appliquent qu'aux moteurs
+PyTorch ; l'export ONNX est en float32 (avertissement si un autre mode est
+demandé). Un moteur indisponible (optimum absent, adaptateur manquant,
+échec de l'export, de la compilation...) retombe sur eager avec un
+avertissement.
+Comparaison : benchmarks/bench_backends.py.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+import torch
+
+from agents.merged_checkpoint import adapter_key, build_merged, find_merged
+from agents.precision import resolve_precision
+
+logger = logging.getLogger(__name__)
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+ONNX_DIR = os.path.join(PROJECT_ROOT, "models", "onnx")
+
+BACKENDS = ["eager", "compile", "onnx"]
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager")
+
+
+class EagerBackend:
+    """`model.generate` PyTorch."""
+
+    name = "eager"
+
+    def __init__(self, model):
+        self.model = model
+
+    @property
+    def device(self):
+        return self.model.device
+
+    def generate(self, **kwargs):
+        return self.model.generate(**kwargs)
+
+
+class CompiledBackend(EagerBackend):
+    """
+    Encodeur et pas du décodeur compilés par `torch.compile`.
+
+    La compilation est paresseuse : elle a lieu au premier `generate`. Si elle
+    échoue (compilateur C absent, opérateur non supporté...), les modules non
+    compilés sont remis en place et la génération repasse en eager.
+    """
+
+    name = "compile"
+
+    def __init__(self, model, mode: str = None):
+        if hasattr(model, "merge_and_unload"):
+            model = model.merge_and_unload()  # pas de couches LoRA dans le graphe compilé
+        self._eager_modules = (model.encoder, model.decoder)
+        # Longueurs d'entrée et de cache variables : formes dynamiques, pas une recompilation par longueur
+        model.encoder = torch.compile(model.encoder, dynamic=True, mode=mode)
+        model.decoder = torch.compile(model.decoder, dynamic=True, mode=mode)
+        super().__init__(model)
+
+    def generate(self, **kwargs):
+        if self._eager_modules is None:
+            return self.model.generate(**kwargs)
+        try:
+            return self.model.generate(**kwargs)
+        except Exception as e:  # erreurs dynamo / inductor, levées à l'appel
+            logger.warning("Compilation impossible (%s: %s), repli sur eager", type(e).__name__, e)
+            self.model.encoder, self.model.decoder = self._eager_modules
+            self._eager_modules = None
+            self.name = "eager"
+            return self.model.generate(**kwargs)
+
+
+class OnnxBackend:
+    """Encodeur + décodeur (avec past-key-values) exportés en ONNX, ONNX Runtime CPU."""
+
+    name = "onnx"
+
+    def __init__(self, base_model: str, adapter_path: str, onnx_dir: str = ONNX_DIR):
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        path = export_onnx(base_model, adapter_path, onnx_dir)
+        self.model = ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True, provider="CPUExecutionProvider")
+
+    @property
+    def device(self):
+        return torch.device("cpu")
+
+    def generate(self, **kwargs):
+        return self.model.generate(**kwargs)
+
+
+def export_onnx(base_model: str, adapter_path: str, onnx_dir: str = ONNX_DIR) -> str:
+    """Dossier de l'export ONNX du checkpoint fusionné courant (exporté s'il manque)."""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    import optimum
+
+    meta = adapter_key(base_model, adapter_path)
+    meta["optimum_version"] = getattr(optimum, "__version__", None)
+    meta["key"] = hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+    path = os.path.join(onnx_dir, f"{meta['adapter']}-{meta['key'][:16]}")
+
+    info = os.path.join(path, "export_info.json")
+    if os.path.exists(info):
+        with open(info, encoding="utf-8") as f:
+            if json.load(f).get("key") == meta["key"]:
+                return path
+
+    merged = find_merged(base_model, adapter_path) or build_merged(base_model, adapter_path)
+    print(f"[INFO] Export ONNX de {merged}...")
+    start = time.perf_counter()
+    ORTModelForSeq2SeqLM.from_pretrained(merged, export=True, use_cache=True).save_pretrained(path)
+    meta.update(merged_checkpoint=merged, export_seconds=round(time.perf_counter() - start, 3), created_at=time.time())
+    # export_info.json en dernier : sa présence marque un export complet
+    with open(info, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_backend(name: str, load_model, base_model: str, adapter_path: str, precision: str = None):
+    """
+    Moteur `name` (défaut : INFERENCE_BACKEND). `load_model()` charge le
+    modèle PyTorch de l'agent, précision appliquée ; appelé pour eager /
+    compile, ou pour le repli si le moteur onnx ne peut pas être construit.
+    """
+    name = (name or INFERENCE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur inconnu : {name} (attendu : {', '.join(BACKENDS)})")
+
+    if name == "onnx":
+        requested = resolve_precision(precision)
+        if requested != "fp32":
+            logger.warning("Précision %s ignorée par le moteur onnx (export float32)", requested)
+        try:
+            return OnnxBackend(base_model, adapter_path)
+        except Exception as e:  # export optimum : ImportError, ValueError, OSError...
+            logger.warning("Moteur onnx indisponible (%s: %s), repli sur eager", type(e).__name__, e)
+        return EagerBackend(load_model())
+
+    model = load_model()
+    if name == "compile":
+        try:
+            return CompiledBackend(model)
+        except Exception as e:
+            logger.warning("Moteur compile indisponible (%s: %s), repli sur eager", type(e).__name__, e)
+    return EagerBackend(model)
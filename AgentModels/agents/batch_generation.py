@@ -0,0 +1,56 @@
+"""
+Génération par lots pour les agents T5 (MEDIUM / HARD).
+
+Les instructions sont tokenisées une fois pour connaître leur longueur,
+triées par longueur puis découpées en lots : chaque lot est paddé à la
+longueur de sa plus longue instruction (peu de padding perdu), passe dans
+un seul `model.generate`, et les sorties sont décodées en une fois puis
+remises dans l'ordre d'origine.
+"""
+
+import torch
+
+
+def length_buckets(lengths: list, batch_size: int) -> list:
+    """Indices triés par longueur de tokens, découpés en lots de `batch_size`."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_ratio(lengths: list, buckets: list) -> float:
+    """Part des tokens d'entrée qui sont du padding avec ce découpage."""
+    padded = sum(max(lengths[i] for i in bucket) * len(bucket) for bucket in buckets)
+    return 1.0 - sum(lengths) / padded if padded else 0.0
+
+
+def generate_in_buckets(model, tokenizer, texts: list, batch_size: int = 16,
+                        max_input_length: int = 256, device=None, **generate_kwargs) -> list:
+    """
+    Texte décodé (skip_special_tokens) pour chaque entrée de `texts`, dans
+    le même ordre, avec un `model.generate(**generate_kwargs)` par lot.
+    """
+    if not texts:
+        return []
+
+    device = device or model.device
+    lengths = [
+        len(ids) for ids in tokenizer(texts, truncation=True, max_length=max_input_length)["input_ids"]
+    ]
+
+    decoded = [None] * len(texts)
+    for bucket in length_buckets(lengths, batch_size):
+        inputs = tokenizer(
+            [texts[i] for i in bucket],
+            return_tensors="pt",
+            max_length=max_input_length,
+            truncation=True,
+            padding=True
+        ).to(device)
+
+        with torch.no_grad():
+            outputs = model.generate(**inputs, **generate_kwargs)
+
+        for i, text in zip(bucket, tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+            decoded[i] = text
+
+    return decoded
@@ -6,6 +6,10 @@ import torch
 from transformers import T5Tokenizer, T5ForConditionalGeneration
 from peft import PeftModel
 from agents.hard_command_processor import HardNmapCommandProcessor
+from agents.batch_generation import generate_in_buckets
+from agents.merged_checkpoint import find_merged
+from agents.precision import apply_precision
+from agents.backends import load_backend
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 DTYPE = torch.float16 if DEVICE == "cuda" else torch.float32
@@ -27,34 +31,59 @@ BASE_MODEL = "t5-base"
 class HardGeneratorAgent:
     """Agent pour scans HARD avec évasion IDS/Firewall"""
     
-    def __init__(self):
+    def __init__(self, precision: str = None, backend: str = None):
+        """
+        `precision` : mode CPU fp32 / bf16 / int8 (défaut : CPU_PRECISION, cf. agents/precision.py)
+        `backend` : moteur eager / compile / onnx (défaut : INFERENCE_BACKEND, cf. agents/backends.py)
+        """
         print("[INFO] Chargement HardGeneratorAgent...")
         print(f"[INFO] Device = {DEVICE}")
         print(f"[INFO] Dtype = {DTYPE}")
 
-        base_model = T5ForConditionalGeneration.from_pretrained(
-            BASE_MODEL,
-            torch_dtype=DTYPE,
-            low_cpu_mem_usage=True
-        )
+        # Moteur d'inférence (generate) ; le modèle PyTorch n'est chargé que s'il sert
+        self.backend = load_backend(backend, lambda: self._load_model(precision), BASE_MODEL, ADAPTER_PATH, precision)
+        self.model = self.backend.model
 
-        base_model = base_model.to(DEVICE)
+        self.tokenizer = T5Tokenizer.from_pretrained(BASE_MODEL)
+        self.processor = HardNmapCommandProcessor()
+    
+    def _load_model(self, precision: str = None):
+        """Modèle PyTorch : checkpoint fusionné s'il existe, sinon base + LoRA ; précision appliquée."""
+        # Checkpoint fusionné (agents/merged_checkpoint.py) : pas de matmuls LoRA
+        merged = find_merged(BASE_MODEL, ADAPTER_PATH)
+        if merged:
+            print(f"[INFO] Checkpoint fusionné : {merged}")
+            model = T5ForConditionalGeneration.from_pretrained(
+                merged,
+                torch_dtype=DTYPE,
+                low_cpu_mem_usage=True
+            )
+        else:
+            base_model = T5ForConditionalGeneration.from_pretrained(
+                BASE_MODEL,
+                torch_dtype=DTYPE,
+                low_cpu_mem_usage=True
+            )
 
-        self.model = PeftModel.from_pretrained(
-            base_model,
-            ADAPTER_PATH,
-            torch_dtype=DTYPE
-        )
+            base_model = base_model.to(DEVICE)
+
+            model = PeftModel.from_pretrained(
+                base_model,
+                ADAPTER_PATH,
+                torch_dtype=DTYPE
+            )
 
-        self.model.to(DEVICE)
-        self.model.eval()
+        model.to(DEVICE)
+        model.eval()
+
+        # Précision réduite sur CPU (bf16 / int8 dynamique)
+        model = apply_precision(model, precision, DEVICE)
 
         # IMPORTANT pour VRAM
-        self.model.config.use_cache = False
+        model.config.use_cache = False
+
+        return model
 
-        self.tokenizer = T5Tokenizer.from_pretrained(BASE_MODEL)
-        self.processor = HardNmapCommandProcessor()
-    
     def generate(self, instruction: str) -> str:
         inputs = self.tokenizer(
             instruction,
@@ -63,10 +92,10 @@ class HardGeneratorAgent:
             max_length=128
         )
 
-        inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
+        inputs = {k: v.to(self.backend.device) for k, v in inputs.items()}
 
         with torch.no_grad():
-            outputs = self.model.generate(
+            outputs = self.backend.generate(
                 **inputs,
                 max_new_tokens=64,
                 do_sample=False,
@@ -77,6 +106,29 @@ class HardGeneratorAgent:
 
         return self.processor.process(raw_command, instruction)
 
+    def generate_batch(self, instructions: list, batch_size: int = 16) -> list:
+        """
+        Même génération que generate() pour une liste d'instructions : lots
+        de longueurs voisines, un `model.generate` par lot
+        (cf. agents/batch_generation.py).
+        """
+        raw_commands = generate_in_buckets(
+            self.backend,
+            self.tokenizer,
+            instructions,
+            batch_size=batch_size,
+            max_input_length=128,
+            device=self.backend.device,
+            max_new_tokens=64,
+            do_sample=False,
+            num_beams=1
+        )
+
+        return [
+            self.processor.process(raw, instr)
+            for raw, instr in zip(raw_commands, instructions)
+        ]
+
 
     
     def _generate_once(self, input_text: str, max_length: int) -> str:
@@ -88,10 +140,10 @@ class HardGeneratorAgent:
             max_length=256,
             truncation=True,
             padding=True
-        ).to(self.model.device)
+        ).to(self.backend.device)
         
         with torch.no_grad():
-            outputs = self.model.generate(
+            outputs = self.backend.generate(
                 **inputs,
                 max_length=max_length,
                 num_beams=7,
@@ -16,6 +16,10 @@ from peft import PeftModel
 # === Import processor intelligent ===
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from agents.command_processor import NmapCommandProcessor
+from agents.batch_generation import generate_in_buckets
+from agents.merged_checkpoint import find_merged
+from agents.precision import apply_precision
+from agents.backends import load_backend
 
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,33 +27,83 @@ PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
 ADAPTER_PATH = os.path.join(PROJECT_ROOT, "models", "medium_models")
 BASE_MODEL = "t5-small"
 
+# Paramètres de génération (communs à generate et generate_batch)
+GENERATION_KWARGS = dict(
+    num_beams=5,
+    early_stopping=True,
+    no_repeat_ngram_size=2,
+    temperature=0.7,
+    do_sample=True,
+    top_p=0.9,
+    repetition_penalty=1.2
+)
+# Décodage déterministe : sorties comparables entre generate et generate_batch
+GREEDY_KWARGS = dict(do_sample=False, num_beams=1)
+
+
+def generation_kwargs(**overrides) -> dict:
+    """GENERATION_KWARGS + `overrides` ; sans échantillonnage, temperature / top_p sont retirés."""
+    kwargs = {**GENERATION_KWARGS, **overrides}
+    if not kwargs.get("do_sample"):
+        kwargs.pop("temperature", None)
+        kwargs.pop("top_p", None)
+    if kwargs.get("num_beams", 1) == 1:
+        kwargs.pop("early_stopping", None)
+    return kwargs
+
 
 class MediumGeneratorAgent:
-    def __init__(self):
+    def __init__(self, precision: str = None, backend: str = None):
+        """
+        `precision` : mode CPU fp32 / bf16 / int8 (défaut : CPU_PRECISION, cf. agents/precision.py)
+        `backend` : moteur eager / compile / onnx (défaut : INFERENCE_BACKEND, cf. agents/backends.py)
+        """
         print("[INFO] Chargement MediumGeneratorAgent...")
 
         # Tokenizer
         self.tokenizer = T5Tokenizer.from_pretrained(BASE_MODEL, legacy=False)
 
-        # Modèle base
-        base_model = T5ForConditionalGeneration.from_pretrained(
-            BASE_MODEL,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto"
-        )
-
-        # Charger les poids LoRA
-        self.model = PeftModel.from_pretrained(base_model, ADAPTER_PATH)
-        self.model.eval()
+        # Moteur d'inférence (generate) ; le modèle PyTorch n'est chargé que s'il sert
+        self.backend = load_backend(backend, lambda: self._load_model(precision), BASE_MODEL, ADAPTER_PATH, precision)
+        self.model = self.backend.model
 
         # === NOUVEAU : ajouter le processeur intelligent ===
         self.processor = NmapCommandProcessor()
 
         print("[OK] MediumGeneratorAgent prêt !")
 
-    def generate(self, instruction: str, max_length: int = 128) -> str:
+    def _load_model(self, precision: str = None):
+        """Modèle PyTorch : checkpoint fusionné s'il existe, sinon base + LoRA ; précision appliquée."""
+        dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+
+        # Checkpoint fusionné (agents/merged_checkpoint.py) : pas de matmuls LoRA
+        merged = find_merged(BASE_MODEL, ADAPTER_PATH)
+        if merged:
+            print(f"[INFO] Checkpoint fusionné : {merged}")
+            model = T5ForConditionalGeneration.from_pretrained(
+                merged,
+                torch_dtype=dtype,
+                device_map="auto"
+            )
+        else:
+            # Modèle base
+            base_model = T5ForConditionalGeneration.from_pretrained(
+                BASE_MODEL,
+                torch_dtype=dtype,
+                device_map="auto"
+            )
+
+            # Charger les poids LoRA
+            model = PeftModel.from_pretrained(base_model, ADAPTER_PATH)
+        model.eval()
+
+        # Précision réduite sur CPU (bf16 / int8 dynamique)
+        return apply_precision(model, precision, "cuda" if torch.cuda.is_available() else "cpu")
+
+    def generate(self, instruction: str, max_length: int = 128, **overrides) -> str:
         """
         Générer commande Nmap à partir d'une instruction NLP.
+        `overrides` : remplace des GENERATION_KWARGS (ex. GREEDY_KWARGS).
         """
 
         # Format demandé lors du training
@@ -62,20 +116,14 @@ class MediumGeneratorAgent:
             max_length=256,
             truncation=True,
             padding=True
-        ).to(self.model.device)
+        ).to(self.backend.device)
 
         # Génération
         with torch.no_grad():
-            outputs = self.model.generate(
+            outputs = self.backend.generate(
                 **inputs,
                 max_length=max_length,
-                num_beams=5,
-                early_stopping=True,
-                no_repeat_ngram_size=2,
-                temperature=0.7,
-                do_sample=True,
-                top_p=0.9,
-                repetition_penalty=1.2
+                **generation_kwargs(**overrides)
             )
 
         # Décodage brut
@@ -116,9 +164,29 @@ class MediumGeneratorAgent:
 
         return command.strip()
 
-    def generate_batch(self, instructions: list) -> list:
-        """Générer plusieurs commandes."""
-        return [self.generate(instr) for instr in instructions]
+    def generate_batch(self, instructions: list, max_length: int = 128, batch_size: int = 16,
+                       **overrides) -> list:
+        """
+        Générer plusieurs commandes : lots de longueurs voisines, un
+        `model.generate` par lot (cf. agents/batch_generation.py), puis les
+        mêmes post-processings que generate(). Avec l'échantillonnage par
+        défaut les sorties diffèrent d'un appel à l'autre ; avec
+        GREEDY_KWARGS elles se comparent à generate(instr, **GREEDY_KWARGS).
+        """
+        raw_commands = generate_in_buckets(
+            self.backend,
+            self.tokenizer,
+            [f"translate to nmap: {instr}" for instr in instructions],
+            batch_size=batch_size,
+            max_input_length=256,
+            max_length=max_length,
+            **generation_kwargs(**overrides)
+        )
+
+        return [
+            self.processor.process(self._post_process(raw, instr), instr)
+            for raw, instr in zip(raw_commands, instructions)
+        ]
 
 
 # ====================================================================
@@ -0,0 +1,214 @@
+"""
+Serveur d'inférence en processus avec batching dynamique pour les agents T5.
+
+Les appelants (threads ou coroutines) déposent leur instruction dans une
+file ; un thread de travail regroupe les requêtes jusqu'à `max_batch_size`
+ou pendant au plus `max_wait_ms` après la première, lance un seul
+`generate_batch` (un `model.generate` par lot de longueurs voisines, cf.
+agents/batch_generation.py) et résout le future de chaque appelant.
+
+Un seul thread appelle le modèle : les lots s'enchaînent au lieu de se
+disputer les coeurs CPU, et les matmuls tournent à la taille du lot.
+
+Métriques (`stats()`) : histogrammes de l'attente en file et des tailles
+de lot, débit (séquences/s), temps de génération par lot.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# Bornes (ms) de l'histogramme d'attente en file ; la dernière case est "> 5000"
+WAIT_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# Configuration par défaut (variables d'environnement)
+GENERATION_MAX_BATCH = int(os.getenv("GENERATION_MAX_BATCH", "16"))
+GENERATION_MAX_WAIT_MS = float(os.getenv("GENERATION_MAX_WAIT_MS", "10"))
+
+_STOP = object()
+
+
+class GenerationServer:
+    """
+    `generate_batch(instructions) -> commandes` est la méthode de l'agent
+    (ex. `MediumGeneratorAgent.generate_batch`) : un résultat par
+    instruction, dans le même ordre.
+    """
+
+    def __init__(self, generate_batch, max_batch_size: int = GENERATION_MAX_BATCH,
+                 max_wait_ms: float = GENERATION_MAX_WAIT_MS, name: str = "generator",
+                 window: int = 1024):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._worker = None
+        self._stopping = False
+        self._lock = threading.Lock()
+
+        # Métriques
+        self.started_at = None
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.batch_sizes = Counter()
+        self.wait_histogram = Counter()
+        self._waits_ms = deque(maxlen=window)
+        self._generate_ms = deque(maxlen=window)
+
+    # ================= CYCLE DE VIE =================
+    def start(self):
+        with self._lock:
+            self._stopping = False
+            self._start_worker()
+        return self
+
+    def _start_worker(self):
+        # Appelé sous self._lock
+        if self._worker is None:
+            # File propre à chaque thread : un ancien thread arrêté par timeout ne vide pas la nouvelle
+            self._queue = queue.Queue()
+            self.started_at = time.monotonic()
+            self._worker = threading.Thread(target=self._run, args=(self._queue,),
+                                            name=f"{self.name}-batcher", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Termine les lots déjà en file puis arrête le thread de travail. Les
+        soumissions suivantes sont refusées (RuntimeError) jusqu'au prochain
+        `start()` ; ce qui reste en file après l'arrêt (ou au-delà de
+        `timeout`) échoue avec RuntimeError au lieu de rester en attente.
+        """
+        with self._lock:
+            self._stopping = True
+            worker, self._worker = self._worker, None
+            pending = self._queue
+            if worker is not None:
+                pending.put(_STOP)
+        if worker is not None:
+            worker.join(timeout)
+
+        error = RuntimeError(f"Serveur {self.name} arrêté")
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(error)
+        if worker is not None and worker.is_alive():
+            pending.put(_STOP)  # le thread sort après son lot en cours
+
+    # ================= SOUMISSION =================
+    def submit(self, instruction: str) -> Future:
+        """Ajoute l'instruction au prochain lot ; le future reçoit la commande générée."""
+        future = Future()
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError(f"Serveur {self.name} arrêté")
+            self._start_worker()
+            self._queue.put((instruction, future, time.monotonic()))
+        return future
+
+    def generate(self, instruction: str, timeout: float = None) -> str:
+        """Appel bloquant (threads)."""
+        return self.submit(instruction).result(timeout)
+
+    async def generate_async(self, instruction: str) -> str:
+        """Appel sans bloquer la boucle asyncio."""
+        return await asyncio.wrap_future(self.submit(instruction))
+
+    # ================= THREAD DE TRAVAIL =================
+    def _collect(self, pending: queue.Queue):
+        """Bloque jusqu'à la première requête, puis attend au plus max_wait."""
+        first = pending.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                pending.put(_STOP)  # arrêt après ce lot
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            batch = self._collect(pending)
+            if batch is None:
+                return
+
+            # Les futures annulés par leur appelant ne partent pas en génération
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            waits_ms = [(started - submitted) * 1000 for _, _, submitted in batch]
+            try:
+                results = self.generate_batch([instruction for instruction, _, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"{len(results)} résultats pour un lot de {len(batch)}")
+            except Exception as e:
+                self.errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                elapsed = time.monotonic() - started
+
+            self._record(len(batch), waits_ms, elapsed)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    # ================= MÉTRIQUES =================
+    def _record(self, size: int, waits_ms: list, elapsed: float):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.busy_seconds += elapsed
+            self.batch_sizes[size] += 1
+            for wait in waits_ms:
+                bucket = next((b for b in WAIT_BUCKETS_MS if wait <= b), None)
+                self.wait_histogram[f"<={bucket}" if bucket is not None else f">{WAIT_BUCKETS_MS[-1]}"] += 1
+            self._waits_ms.extend(waits_ms)
+            self._generate_ms.append(elapsed * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = np.asarray(self._waits_ms) if self._waits_ms else np.zeros(1)
+            generate = np.asarray(self._generate_ms) if self._generate_ms else np.zeros(1)
+            uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+            labels = [f"<={b}" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}"]
+            return {
+                "name": self.name,
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "queue_depth": self._queue.qsize(),
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": {str(size): self.batch_sizes[size] for size in sorted(self.batch_sizes)},
+                "queue_wait_ms_histogram": {label: self.wait_histogram[label] for label in labels},
+                "queue_wait_ms_p50": round(float(np.percentile(waits, 50)), 2),
+                "queue_wait_ms_p95": round(float(np.percentile(waits, 95)), 2),
+                "generate_ms_p50": round(float(np.percentile(generate, 50)), 2),
+                "throughput_seq_per_s": round(self.items / uptime, 3) if uptime else 0.0,
+                "busy_throughput_seq_per_s": round(self.items / self.busy_seconds, 3) if self.busy_seconds else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
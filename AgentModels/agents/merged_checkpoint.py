@@ -0,0 +1,128 @@
+"""
+Adaptateurs LoRA fusionnés dans les poids de base, gardés sur disque.
+
+Avec `PeftModel`, chaque passe avant ajoute les matmuls LoRA (q/v pour
+MEDIUM, q/k/v/o pour HARD) et chaque démarrage réapplique l'adaptateur.
+`build_merged` fusionne une fois (`merge_and_unload`, W + B·A·alpha/r) et
+sauvegarde un checkpoint T5 autonome en safetensors dans
+`models/merged/<adaptateur>-<hash>/`, le hash couvrant :
+- nom du modèle de base
+- adapter_config.json et poids de l'adaptateur (sha256)
+
+Les agents chargent ce checkpoint directement s'il existe pour le hash
+courant (`find_merged`) ; un adaptateur réentraîné change le hash et ils
+reviennent à PeftModel jusqu'au prochain build. USE_MERGED_CHECKPOINT=0
+force le chemin PeftModel.
+
+Usage (depuis AgentModels/) :
+    python agents/merged_checkpoint.py [--agent medium|hard|both]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+MERGED_DIR = os.path.join(PROJECT_ROOT, "models", "merged")
+USE_MERGED_CHECKPOINT = os.getenv("USE_MERGED_CHECKPOINT", "1") == "1"
+
+ADAPTER_WEIGHTS = ["adapter_model.safetensors", "adapter_model.bin"]
+
+# (modèle de base, adaptateur) de chaque agent
+AGENTS = {
+    "medium": ("t5-small", os.path.join(PROJECT_ROOT, "models", "medium_models")),
+    "hard": ("t5-base", os.path.join(PROJECT_ROOT, "models", "hard_models")),
+}
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def adapter_weights(adapter_path: str) -> str:
+    for name in ADAPTER_WEIGHTS:
+        path = os.path.join(adapter_path, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Poids de l'adaptateur absents de {adapter_path} ({' / '.join(ADAPTER_WEIGHTS)})")
+
+
+def adapter_key(base_model: str, adapter_path: str) -> dict:
+    """Entrées dont dépend le checkpoint fusionné, et leur hash combiné (`key`)."""
+    meta = {
+        "base_model": base_model,
+        "adapter": os.path.basename(os.path.normpath(adapter_path)),
+        "adapter_config_sha256": _sha256(os.path.join(adapter_path, "adapter_config.json")),
+        "adapter_weights_sha256": _sha256(adapter_weights(adapter_path)),
+    }
+    meta["key"] = hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+    return meta
+
+
+def merged_path(meta: dict, merged_dir: str = MERGED_DIR) -> str:
+    return os.path.join(merged_dir, f"{meta['adapter']}-{meta['key'][:16]}")
+
+
+def find_merged(base_model: str, adapter_path: str, merged_dir: str = MERGED_DIR):
+    """Dossier du checkpoint fusionné pour l'adaptateur courant, sinon None."""
+    if not USE_MERGED_CHECKPOINT:
+        return None
+    try:
+        meta = adapter_key(base_model, adapter_path)
+    except FileNotFoundError:
+        return None
+    path = merged_path(meta, merged_dir)
+    info = os.path.join(path, "merge_info.json")
+    if not os.path.exists(info):
+        return None
+    with open(info, encoding="utf-8") as f:
+        return path if json.load(f).get("key") == meta["key"] else None
+
+
+def build_merged(base_model: str, adapter_path: str, merged_dir: str = MERGED_DIR) -> str:
+    """Fusionne l'adaptateur en float32 et sauvegarde le checkpoint (safetensors)."""
+    import torch
+    from transformers import T5ForConditionalGeneration
+    from peft import PeftModel
+
+    meta = adapter_key(base_model, adapter_path)
+    path = merged_path(meta, merged_dir)
+
+    start = time.perf_counter()
+    base = T5ForConditionalGeneration.from_pretrained(base_model, torch_dtype=torch.float32)
+    model = PeftModel.from_pretrained(base, adapter_path).merge_and_unload()
+    model.eval()
+
+    os.makedirs(path, exist_ok=True)
+    model.save_pretrained(path, safe_serialization=True)
+    meta.update(merge_seconds=round(time.perf_counter() - start, 3), created_at=time.time())
+    # merge_info.json en dernier : sa présence marque un checkpoint complet
+    with open(os.path.join(path, "merge_info.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+# ================= BUILD EN LIGNE DE COMMANDE =================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fusion des adaptateurs LoRA dans les poids de base")
+    parser.add_argument("--agent", choices=["medium", "hard", "both"], default="both")
+    args = parser.parse_args()
+
+    for name in (["medium", "hard"] if args.agent == "both" else [args.agent]):
+        base_model, adapter_path = AGENTS[name]
+        try:
+            existing = find_merged(base_model, adapter_path)
+            if existing:
+                print(f"[OK] {name} : déjà fusionné ({existing})")
+                continue
+            print(f"[INFO] Fusion {name} ({base_model} + {adapter_path})...")
+            print(f"[OK] {name} : {build_merged(base_model, adapter_path)}")
+        except FileNotFoundError as e:
+            print(f"[ERREUR] {name} : {e}")
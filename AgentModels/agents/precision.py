@@ -0,0 +1,69 @@
+"""
+Modes de précision pour l'inférence CPU des agents T5.
+
+- fp32 : poids float32 (comportement historique)
+- bf16 : poids et activations bfloat16, si le CPU a des instructions bf16
+  (AVX512-BF16 / AMX) ; sinon repli fp32 avec un avertissement
+- int8 : quantification dynamique des couches Linear
+  (`torch.quantization.quantize_dynamic`, poids int8, activations
+  quantifiées à la volée), embeddings et LayerNorm restent en float32
+
+Un PeftModel est d'abord fusionné (`merge_and_unload`) : la quantification
+porte alors sur les poids finaux et non sur la base et l'adaptateur séparés.
+Sur GPU les modes sont ignorés (fp16 reste géré par les agents).
+
+Sélection : CPU_PRECISION=fp32|bf16|int8 ou `precision=` des agents.
+La qualité de chaque mode est contrôlée par benchmarks/precision_regression.py.
+"""
+
+import logging
+import os
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ["fp32", "bf16", "int8"]
+CPU_PRECISION = os.getenv("CPU_PRECISION", "fp32")
+
+
+def bf16_supported() -> bool:
+    """Le CPU exécute-t-il le bf16 nativement (sinon émulé, plus lent que fp32) ?"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        pass
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            flags = f.read()
+        return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        return False
+
+
+def resolve_precision(precision: str = None) -> str:
+    """Mode effectivement utilisé : `precision` (ou CPU_PRECISION), bf16 → fp32 s'il n'est pas supporté."""
+    precision = (precision or CPU_PRECISION).lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Précision inconnue : {precision} (attendu : {', '.join(PRECISIONS)})")
+    if precision == "bf16" and not bf16_supported():
+        logger.warning("bf16 non supporté par ce CPU, repli en fp32")
+        return "fp32"
+    return precision
+
+
+def apply_precision(model, precision: str = None, device: str = "cpu"):
+    """Retourne le modèle dans le mode demandé (inchangé en fp32 ou hors CPU)."""
+    precision = resolve_precision(precision)
+    if precision == "fp32" or str(device) != "cpu":
+        return model
+
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+
+    if precision == "bf16":
+        model = model.to(torch.bfloat16)
+    else:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    return model
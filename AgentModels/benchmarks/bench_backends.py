@@ -0,0 +1,140 @@
+"""
+Benchmark des moteurs d'inférence des agents (eager, compile, onnx ; CPU).
+
+Pour chaque agent et chaque moteur (agents/backends.py) :
+- égalité des sorties : génération greedy brute (sans post-processing) sur
+  le jeu de test, comparée token à token à eager
+- latence d'une génération greedy p50 / p95
+- débit de `generate_batch` (paramètres de l'agent) sur le jeu de test
+- temps de chargement (export ONNX / compilation comprise au premier lancement)
+
+Jeux de test : data/t5_balanced_test.json (MEDIUM), data/diffusion_hard_test.json (HARD).
+
+Usage (depuis AgentModels/) :
+    python benchmarks/bench_backends.py [--agent medium|hard|both] [--backends eager,compile,onnx] [--n 64]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Mesure sur CPU, même si une carte est disponible
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import torch
+
+from agents.backends import BACKENDS
+
+DATASETS = {
+    "medium": ("data/t5_balanced_test.json", "translate to nmap: "),
+    "hard": ("data/diffusion_hard_test.json", "generate advanced nmap command: "),
+}
+GREEDY = dict(max_new_tokens=64, do_sample=False, num_beams=1)
+REPORT_PATH = "benchmarks/results/backends_report.json"
+
+
+def load_instructions(agent: str, n: int) -> list:
+    path, prefix = DATASETS[agent]
+    with open(path, encoding="utf-8") as f:
+        return [ex["input_text"].replace(prefix, "", 1) for ex in json.load(f)][:n]
+
+
+def load_agent(agent: str, backend: str):
+    if agent == "medium":
+        from agents.generator_medium_agent import MediumGeneratorAgent
+        return MediumGeneratorAgent(backend=backend)
+    from agents.generator_hard_agent import HardGeneratorAgent
+    return HardGeneratorAgent(backend=backend)
+
+
+def greedy_outputs(agent, texts: list) -> list:
+    """Ids générés (greedy) pour chaque texte, une génération par texte."""
+    outputs = []
+    with torch.no_grad():
+        for text in texts:
+            inputs = agent.tokenizer(text, return_tensors="pt").to(agent.backend.device)
+            outputs.append(agent.backend.generate(**inputs, **GREEDY)[0].tolist())
+    return outputs
+
+
+def bench_backend(name: str, backend: str, instructions: list, prompt: str, latency_n: int) -> dict:
+    start = time.perf_counter()
+    agent = load_agent(name, backend)
+    load_seconds = time.perf_counter() - start
+    texts = [prompt + instr for instr in instructions]
+
+    greedy_outputs(agent, texts[:2])  # préchauffage (compilation, sessions ORT)
+    timings = []
+    for text in texts[:latency_n]:
+        start = time.perf_counter()
+        greedy_outputs(agent, [text])
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    agent.generate_batch(instructions)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "backend": agent.backend.name,
+        "load_seconds": load_seconds,
+        "latency_p50_ms": timings[len(timings) // 2] * 1000,
+        "latency_p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "batch_seq_per_s": len(instructions) / batch_seconds,
+        "outputs": greedy_outputs(agent, texts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs d'inférence (eager / compile / onnx)")
+    parser.add_argument("--agent", choices=["medium", "hard", "both"], default="both")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--n", type=int, default=64, help="nombre d'instructions du jeu de test")
+    parser.add_argument("--latency-n", type=int, default=20)
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    if "eager" not in backends:
+        backends.insert(0, "eager")  # référence de l'égalité des sorties
+
+    report = {}
+    for name in (["medium", "hard"] if args.agent == "both" else [args.agent]):
+        instructions = load_instructions(name, args.n)
+        prompt = "translate to nmap: " if name == "medium" else ""  # préfixe ajouté par l'agent
+        results = {}
+        for backend in backends:
+            print(f"[INFO] {name} / {backend}...")
+            results[backend] = bench_backend(name, backend, instructions, prompt, args.latency_n)
+
+        reference = results["eager"]["outputs"]
+        for r in results.values():
+            outputs = r.pop("outputs")
+            r["identical_outputs"] = sum(a == b for a, b in zip(outputs, reference)) / len(reference)
+        report[name] = results
+
+        print("\n" + "=" * 84)
+        print(f"MOTEURS D'INFÉRENCE - {name.upper()} ({len(instructions)} instructions, CPU)".center(84))
+        print("=" * 84)
+        print(f"{'moteur':<10}{'effectif':<10}{'charg. s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'lot séq/s':>11}{'sorties = eager':>17}")
+        print("-" * 84)
+        for backend, r in results.items():
+            print(f"{backend:<10}{r['backend']:<10}{r['load_seconds']:>10.1f}{r['latency_p50_ms']:>9.1f}"
+                  f"{r['latency_p95_ms']:>9.1f}{r['batch_seq_per_s']:>11.2f}{r['identical_outputs']:>17.1%}")
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
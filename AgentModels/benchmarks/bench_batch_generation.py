@@ -0,0 +1,173 @@
+"""
+Benchmark de la génération par lots des agents MEDIUM et HARD (CPU).
+
+Pour chaque taille de lot (1 à 64) : séquences/s de `generate_batch`, et
+part de padding dans les entrées avec tri par longueur vs ordre d'arrivée.
+Référence : la boucle `generate()` une instruction à la fois.
+
+Égalité des sorties : en décodage greedy (GREEDY_KWARGS pour MEDIUM, dont
+la génération par défaut échantillonne ; HARD est déjà greedy), part des
+commandes de `generate_batch` identiques à celles de `generate()` pour
+chaque taille de lot (le padding d'un lot peut décaler quelques logits).
+Rapport JSON : benchmarks/results/batch_generation_report.json.
+
+`--concurrency N` : N appelants concurrents, chacun appelant `generate()`
+directement, puis via le serveur à batching dynamique
+(agents/inference_server.py) ; débit et statistiques du serveur.
+
+Instructions : data/t5_balanced_test.json (MEDIUM) et
+data/diffusion_hard_test.json (HARD), préfixes d'entraînement retirés.
+
+Usage (depuis AgentModels/) :
+    python benchmarks/bench_batch_generation.py [--agent medium|hard|both] [--n 64] [--concurrency 16]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Mesure sur CPU, même si une carte est disponible
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import torch
+
+from agents.batch_generation import length_buckets, padding_ratio
+from agents.inference_server import GenerationServer
+
+DATASETS = {
+    "medium": ("data/t5_balanced_test.json", "translate to nmap: "),
+    "hard": ("data/diffusion_hard_test.json", "generate advanced nmap command: "),
+}
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+REPORT_PATH = "benchmarks/results/batch_generation_report.json"
+
+
+def load_instructions(agent: str, n: int) -> list:
+    path, prefix = DATASETS[agent]
+    with open(path, encoding="utf-8") as f:
+        examples = json.load(f)
+    instructions = [ex["input_text"].replace(prefix, "", 1) for ex in examples]
+    return (instructions * (n // len(instructions) + 1))[:n]
+
+
+def load_agent(agent: str):
+    if agent == "medium":
+        from agents.generator_medium_agent import MediumGeneratorAgent
+        return MediumGeneratorAgent()
+    from agents.generator_hard_agent import HardGeneratorAgent
+    return HardGeneratorAgent()
+
+
+def greedy_kwargs(agent: str) -> dict:
+    """Arguments de décodage déterministe passés à generate / generate_batch."""
+    if agent == "medium":
+        from agents.generator_medium_agent import GREEDY_KWARGS
+        return GREEDY_KWARGS
+    return {}  # HARD : generate et generate_batch sont déjà greedy
+
+
+def bench_concurrent(name: str, agent, instructions: list, concurrency: int, max_batch_size: int, max_wait_ms: float):
+    """N appelants : generate() direct vs serveur à batching dynamique."""
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(agent.generate, instructions))
+        direct = len(instructions) / (time.perf_counter() - start)
+
+    server = GenerationServer(agent.generate_batch, max_batch_size, max_wait_ms, name=name).start()
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(server.generate, instructions))
+        batched = len(instructions) / (time.perf_counter() - start)
+    stats = server.stats()
+    server.stop()
+
+    print(f"\n{concurrency} appelants concurrents : generate() direct {direct:.2f} séq/s, "
+          f"serveur {batched:.2f} séq/s ({batched / direct:.1f}x)")
+    print(f"Lots : {stats['batch_size_histogram']} (moyenne {stats['avg_batch_size']})")
+    print(f"Attente en file : p50 {stats['queue_wait_ms_p50']} ms, p95 {stats['queue_wait_ms_p95']} ms")
+    return {"concurrency": concurrency, "direct_seq_per_s": direct, "server_seq_per_s": batched, "server": stats}
+
+
+def bench_agent(name: str, n: int, batch_sizes: list, concurrency: int = 0,
+                max_wait_ms: float = 10.0) -> dict:
+    instructions = load_instructions(name, n)
+    agent = load_agent(name)
+    lengths = [len(ids) for ids in agent.tokenizer(instructions)["input_ids"]]
+
+    agent.generate_batch(instructions[:2], batch_size=2)  # préchauffage
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    for instr in instructions:
+        agent.generate(instr)
+    sequential = len(instructions) / (time.perf_counter() - start)
+
+    greedy = greedy_kwargs(name)
+    reference = [agent.generate(instr, **greedy) for instr in instructions]
+
+    rows = []
+    for batch_size in batch_sizes:
+        arrival = [list(range(i, min(i + batch_size, n))) for i in range(0, n, batch_size)]
+        torch.manual_seed(0)
+        start = time.perf_counter()
+        agent.generate_batch(instructions, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        batched = agent.generate_batch(instructions, batch_size=batch_size, **greedy)
+        rows.append({
+            "batch_size": batch_size,
+            "seq_per_s": n / elapsed,
+            "speedup": n / elapsed / sequential,
+            "padding_sorted": padding_ratio(lengths, length_buckets(lengths, batch_size)),
+            "padding_arrival": padding_ratio(lengths, arrival),
+            "identical_greedy": sum(a == b for a, b in zip(batched, reference)) / n,
+        })
+
+    print("\n" + "=" * 70)
+    print(f"GÉNÉRATION PAR LOTS - {name.upper()} ({n} instructions, CPU)".center(70))
+    print("=" * 70)
+    print(f"Boucle generate() : {sequential:.2f} séq/s")
+    print(f"{'lot':>5}{'séq/s':>10}{'gain':>8}{'padding trié':>15}{'padding arrivée':>18}{'= greedy':>11}")
+    print("-" * 70)
+    for r in rows:
+        print(f"{r['batch_size']:>5}{r['seq_per_s']:>10.2f}{r['speedup']:>7.1f}x"
+              f"{r['padding_sorted']:>15.1%}{r['padding_arrival']:>18.1%}{r['identical_greedy']:>11.1%}")
+
+    result = {"n": n, "sequential_seq_per_s": sequential, "batch_sizes": rows}
+    if concurrency:
+        result["concurrent"] = bench_concurrent(name, agent, instructions, concurrency, max(batch_sizes), max_wait_ms)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de generate_batch (MEDIUM / HARD)")
+    parser.add_argument("--agent", choices=["medium", "hard", "both"], default="both")
+    parser.add_argument("--n", type=int, default=64, help="nombre d'instructions")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    parser.add_argument("--concurrency", type=int, default=0, help="appelants concurrents (0 = pas de test serveur)")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="attente max du serveur avant un lot")
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    report = {}
+    for name in (["medium", "hard"] if args.agent == "both" else [args.agent]):
+        report[name] = bench_agent(name, args.n, batch_sizes, args.concurrency, args.max_wait_ms)
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
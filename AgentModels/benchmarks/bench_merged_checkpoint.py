@@ -0,0 +1,122 @@
+"""
+Latence avant / après fusion des adaptateurs LoRA (CPU).
+
+Pour chaque agent : temps de chargement, latence d'une génération
+(une instruction, greedy) p50 / p95 et débit d'un lot de 16, avec
+PeftModel (base + adaptateur) puis avec le checkpoint fusionné
+(agents/merged_checkpoint.py, construit s'il manque).
+Rapport JSON : benchmarks/results/merged_checkpoint_report.json.
+
+Usage (depuis AgentModels/) :
+    python benchmarks/bench_merged_checkpoint.py [--agent medium|hard|both] [--repeats 50]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Mesure sur CPU, même si une carte est disponible
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import torch
+from transformers import T5Tokenizer, T5ForConditionalGeneration
+from peft import PeftModel
+
+from agents.merged_checkpoint import AGENTS, build_merged, find_merged
+
+DATASETS = {
+    "medium": "data/t5_balanced_test.json",
+    "hard": "data/diffusion_hard_test.json",
+}
+GREEDY = dict(max_new_tokens=64, do_sample=False, num_beams=1)
+REPORT_PATH = "benchmarks/results/merged_checkpoint_report.json"
+
+
+def load_adapter(base_model, adapter_path):
+    base = T5ForConditionalGeneration.from_pretrained(base_model, torch_dtype=torch.float32)
+    return PeftModel.from_pretrained(base, adapter_path).eval()
+
+
+def load_merged(path):
+    return T5ForConditionalGeneration.from_pretrained(path, torch_dtype=torch.float32).eval()
+
+
+def measure(model, tokenizer, texts: list, repeats: int) -> dict:
+    single = [tokenizer(texts[i % len(texts)], return_tensors="pt") for i in range(repeats)]
+    batch = tokenizer(texts[:16], return_tensors="pt", padding=True)
+    with torch.no_grad():
+        model.generate(**single[0], **GREEDY)
+        timings = []
+        for inputs in single:
+            start = time.perf_counter()
+            model.generate(**inputs, **GREEDY)
+            timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        model.generate(**batch, **GREEDY)
+        batch_seconds = time.perf_counter() - start
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "batch16_seq_per_s": len(texts[:16]) / batch_seconds,
+    }
+
+
+def bench(name: str, repeats: int):
+    base_model, adapter_path = AGENTS[name]
+    merged = find_merged(base_model, adapter_path) or build_merged(base_model, adapter_path)
+    tokenizer = T5Tokenizer.from_pretrained(base_model)
+    with open(DATASETS[name], encoding="utf-8") as f:
+        texts = [ex["input_text"] for ex in json.load(f)]
+
+    rows = {}
+    for label, load in [("PeftModel", lambda: load_adapter(base_model, adapter_path)),
+                        ("fusionné", lambda: load_merged(merged))]:
+        start = time.perf_counter()
+        model = load()
+        load_ms = (time.perf_counter() - start) * 1000
+        rows[label] = dict(load_ms=load_ms, **measure(model, tokenizer, texts, repeats))
+        del model
+
+    print("\n" + "=" * 70)
+    print(f"FUSION LoRA - {name.upper()} ({base_model}, CPU)".center(70))
+    print("=" * 70)
+    print(f"{'':<12}{'charg. ms':>12}{'p50 ms':>10}{'p95 ms':>10}{'lot 16 séq/s':>15}")
+    print("-" * 70)
+    for label, r in rows.items():
+        print(f"{label:<12}{r['load_ms']:>12.0f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['batch16_seq_per_s']:>15.2f}")
+    before, after = rows["PeftModel"], rows["fusionné"]
+    print(f"Gain p50 : x{before['p50_ms'] / after['p50_ms']:.2f}, chargement : x{before['load_ms'] / after['load_ms']:.2f}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence PeftModel vs checkpoint fusionné")
+    parser.add_argument("--agent", choices=["medium", "hard", "both"], default="both")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    report = {}
+    for name in (["medium", "hard"] if args.agent == "both" else [args.agent]):
+        try:
+            report[name] = bench(name, args.repeats)
+        except FileNotFoundError as e:
+            print(f"[ERREUR] {name} : {e}")
+            report[name] = {"error": str(e)}
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Régression qualité / latence / mémoire des modes de précision CPU.
+
+Pour chaque agent (MEDIUM sur data/t5_balanced_test.json, HARD sur
+data/diffusion_hard_test.json) et chaque mode (fp32, bf16, int8, cf.
+agents/precision.py), moteur eager (la précision ne s'applique pas à onnx),
+dans un sous-processus (mémoire mesurée à part), en décodage glouton pour que
+seul le mode de précision varie (l'échantillonnage de MEDIUM est coupé par
+GREEDY_KWARGS, HARD est déjà glouton) :
+- exact-match : commande générée == cible (espaces normalisés)
+- flag-F1 : F1 moyen entre les options (`-sV`, `-p`, `--script`...) de la
+  commande générée et celles de la cible
+- latence d'une génération p50 / p95, débit de generate_batch
+- mémoire : pic RSS du processus, taille du state_dict
+
+Porte qualité : un mode est rejeté si son exact-match ou son flag-F1 perd
+plus que `--max-em-drop` / `--max-f1-drop` (points absolus) par rapport à
+fp32. `--require MODE` : code de sortie 1 si ce mode est rejeté (CI, avant
+de changer CPU_PRECISION).
+
+Usage (depuis AgentModels/) :
+    python benchmarks/precision_regression.py [--agent medium|hard|both] [--modes fp32,bf16,int8]
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Mesure sur CPU, même si une carte est disponible
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+DATASETS = {
+    "medium": ("data/t5_balanced_test.json", "translate to nmap: "),
+    "hard": ("data/diffusion_hard_test.json", "generate advanced nmap command: "),
+}
+MODES = ["fp32", "bf16", "int8"]
+REPORT_PATH = "benchmarks/results/precision_report.json"
+
+
+# ================= MÉTRIQUES =================
+def normalize(command: str) -> str:
+    return " ".join(command.split())
+
+
+def flags(command: str) -> set:
+    return {token for token in command.split() if token.startswith("-")}
+
+
+def flag_f1(predicted: str, target: str) -> float:
+    pred, gold = flags(predicted), flags(target)
+    if not pred and not gold:
+        return 1.0
+    return 2 * len(pred & gold) / (len(pred) + len(gold))
+
+
+def score(predictions: list, targets: list) -> dict:
+    n = max(len(targets), 1)
+    return {
+        "exact_match": sum(normalize(p) == normalize(t) for p, t in zip(predictions, targets)) / n,
+        "flag_f1": sum(flag_f1(p, t) for p, t in zip(predictions, targets)) / n,
+    }
+
+
+def load_examples(agent: str, n: int = None):
+    path, prefix = DATASETS[agent]
+    with open(path, encoding="utf-8") as f:
+        examples = json.load(f)[:n]
+    return [ex["input_text"].replace(prefix, "", 1) for ex in examples], [ex["target_text"] for ex in examples]
+
+
+# ================= SOUS-PROCESSUS : UN AGENT, UN MODE =================
+def run_worker(agent_name: str, mode: str, n: int, latency_n: int) -> dict:
+    import torch
+    from agents.precision import resolve_precision
+
+    instructions, _ = load_examples(agent_name, n)
+    effective = resolve_precision(mode)
+
+    start = time.perf_counter()
+    if agent_name == "medium":
+        from agents.generator_medium_agent import GREEDY_KWARGS, MediumGeneratorAgent
+        agent = MediumGeneratorAgent(precision=mode, backend="eager")
+        decoding = GREEDY_KWARGS
+    else:
+        from agents.generator_hard_agent import HardGeneratorAgent
+        agent = HardGeneratorAgent(precision=mode, backend="eager")
+        decoding = {}
+    load_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    torch.save(agent.model.state_dict(), buffer)
+
+    agent.generate(instructions[0], **decoding)  # préchauffage
+    timings = []
+    for instr in instructions[:latency_n]:
+        start = time.perf_counter()
+        agent.generate(instr, **decoding)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    start = time.perf_counter()
+    predictions = agent.generate_batch(instructions, **decoding)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "effective_mode": effective,
+        "predictions": predictions,
+        "load_seconds": load_seconds,
+        "latency_p50_ms": timings[len(timings) // 2] * 1000,
+        "latency_p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "batch_seq_per_s": len(instructions) / batch_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "state_dict_mb": buffer.getbuffer().nbytes / 2**20,
+    }
+
+
+def run_mode(agent: str, mode: str, n: int, latency_n: int) -> dict:
+    """Lance le worker dans un processus neuf ; dernière ligne de sortie = JSON."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", agent, mode,
+           "--n", str(n), "--latency-n", str(latency_n)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"mode": mode, "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "échec"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ================= PORTE QUALITÉ =================
+def gate(results: dict, max_em_drop: float, max_f1_drop: float):
+    """Marque chaque mode accepted / rejected par rapport à fp32."""
+    baseline = results.get("fp32")
+    for mode, r in results.items():
+        if "error" in r:
+            r["status"] = "error"
+        elif r["effective_mode"] != mode:
+            r["status"] = f"unsupported ({r['effective_mode']})"
+        elif baseline is None or "error" in baseline or mode == "fp32":
+            r["status"] = "baseline" if mode == "fp32" else "no baseline"
+        else:
+            em_drop = baseline["exact_match"] - r["exact_match"]
+            f1_drop = baseline["flag_f1"] - r["flag_f1"]
+            r["status"] = "accepted" if em_drop <= max_em_drop and f1_drop <= max_f1_drop else "rejected"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Régression des modes de précision CPU (fp32 / bf16 / int8)")
+    parser.add_argument("--agent", choices=["medium", "hard", "both"], default="both")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--n", type=int, default=None, help="nombre d'exemples (défaut : tout le jeu de test)")
+    parser.add_argument("--latency-n", type=int, default=20, help="générations chronométrées une à une")
+    parser.add_argument("--max-em-drop", type=float, default=0.02)
+    parser.add_argument("--max-f1-drop", type=float, default=0.02)
+    parser.add_argument("--require", default=None, help="code de sortie 1 si ce mode est rejeté")
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--worker", nargs=2, metavar=("AGENT", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker, args.n, args.latency_n)))
+        return 0
+
+    modes = args.modes.split(",")
+    if "fp32" not in modes:
+        modes.insert(0, "fp32")  # référence de la porte qualité
+
+    report, failed = {}, False
+    for name in (["medium", "hard"] if args.agent == "both" else [args.agent]):
+        _, targets = load_examples(name, args.n)
+        results = {}
+        for mode in modes:
+            print(f"[INFO] {name} / {mode}...")
+            r = run_mode(name, mode, args.n if args.n else len(targets), args.latency_n)
+            if "predictions" in r:
+                r.update(score(r.pop("predictions"), targets))
+            results[mode] = r
+        gate(results, args.max_em_drop, args.max_f1_drop)
+        report[name] = results
+
+        print("\n" + "=" * 96)
+        print(f"MODES DE PRÉCISION - {name.upper()} ({len(targets)} exemples, CPU)".center(96))
+        print("=" * 96)
+        print(f"{'mode':<6}{'exact':>8}{'flag-F1':>9}{'p50 ms':>9}{'p95 ms':>9}{'lot séq/s':>11}"
+              f"{'RSS Mo':>9}{'poids Mo':>10}  statut")
+        print("-" * 96)
+        for mode, r in results.items():
+            if "error" in r:
+                print(f"{mode:<6}  erreur : {r['error']}")
+                continue
+            print(f"{mode:<6}{r['exact_match']:>8.3f}{r['flag_f1']:>9.3f}{r['latency_p50_ms']:>9.1f}"
+                  f"{r['latency_p95_ms']:>9.1f}{r['batch_seq_per_s']:>11.2f}{r['peak_rss_mb']:>9.0f}"
+                  f"{r['state_dict_mb']:>10.1f}  {r['status']}")
+        if args.require and results.get(args.require, {}).get("status") != "accepted" and args.require != "fp32":
+            failed = True
+
+    print(f"\nPorte : perte max {args.max_em_drop:.0%} d'exact-match, {args.max_f1_drop:.0%} de flag-F1 vs fp32")
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"max_em_drop": args.max_em_drop, "max_f1_drop": args.max_f1_drop, "agents": report}, f, indent=2)
+    print(f"Rapport : {args.report}")
+    if failed:
+        print(f"❌ Mode {args.require} rejeté par la porte qualité")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
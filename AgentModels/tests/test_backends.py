@@ -0,0 +1,94 @@
+"""
+Choix du moteur d'inférence : modèle PyTorch chargé seulement s'il sert, repli eager sur toute erreur
+"""
+
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("torch")
+
+from agents import backends
+
+
+class FakeModel:
+    device = "cpu"
+
+    def generate(self, **kwargs):
+        return "eager"
+
+
+def _loader(calls):
+    def load_model():
+        calls.append(1)
+        return FakeModel()
+    return load_model
+
+
+def test_onnx_does_not_load_the_torch_model(monkeypatch):
+    class FakeOnnx:
+        name = "onnx"
+        model = "ort"
+
+        def __init__(self, base_model, adapter_path):
+            pass
+
+    monkeypatch.setattr(backends, "OnnxBackend", FakeOnnx)
+    calls = []
+    backend = backends.load_backend("onnx", _loader(calls), "t5-small", "adapter", precision="fp32")
+    assert backend.name == "onnx" and calls == []
+
+
+@pytest.mark.parametrize("error", [ValueError("export"), OSError("adaptateur manquant"), ImportError("optimum")])
+def test_onnx_failure_falls_back_to_eager(monkeypatch, caplog, error):
+    def broken(base_model, adapter_path):
+        raise error
+
+    monkeypatch.setattr(backends, "OnnxBackend", broken)
+    calls = []
+    with caplog.at_level(logging.WARNING, logger="agents.backends"):
+        backend = backends.load_backend("onnx", _loader(calls), "t5-small", "adapter", precision="int8")
+    assert backend.name == "eager" and calls == [1]
+    assert "int8 ignorée" in caplog.text and "repli sur eager" in caplog.text
+
+
+def test_unknown_backend_is_refused():
+    with pytest.raises(ValueError):
+        backends.load_backend("tensorrt", _loader([]), "t5-small", "adapter")
+
+
+class FakeSeq2Seq(FakeModel):
+    """Modèle dont la génération échoue tant que l'encodeur est compilé."""
+
+    def __init__(self):
+        self.encoder, self.decoder = "encoder", "decoder"
+
+    def generate(self, **kwargs):
+        if isinstance(self.encoder, tuple):
+            raise RuntimeError("inductor: compilateur C introuvable")
+        return "eager"
+
+
+def test_compile_failure_on_first_call_falls_back_to_eager(monkeypatch, caplog):
+    monkeypatch.setattr(backends.torch, "compile", lambda module, **kwargs: ("compiled", module))
+    backend = backends.load_backend("compile", FakeSeq2Seq, "t5-small", "adapter")
+    assert backend.name == "compile" and backend.model.encoder == ("compiled", "encoder")
+
+    with caplog.at_level(logging.WARNING, logger="agents.backends"):
+        assert backend.generate(input_ids=[[0]]) == "eager"
+    assert backend.name == "eager" and "repli sur eager" in caplog.text
+    assert (backend.model.encoder, backend.model.decoder) == ("encoder", "decoder")
+    assert backend.generate(input_ids=[[0]]) == "eager"
+
+
+def test_compile_construction_failure_falls_back_to_eager(monkeypatch):
+    def broken(module, **kwargs):
+        raise RuntimeError("torch.compile indisponible")
+
+    monkeypatch.setattr(backends.torch, "compile", broken)
+    backend = backends.load_backend("compile", FakeSeq2Seq, "t5-small", "adapter")
+    assert backend.name == "eager" and backend.generate(input_ids=[[0]]) == "eager"
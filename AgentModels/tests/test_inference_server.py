@@ -0,0 +1,64 @@
+"""
+GenerationServer : regroupement des appels concurrents et arrêt sans appelant bloqué
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.inference_server import GenerationServer
+
+
+def test_concurrent_calls_are_batched():
+    seen = []
+
+    def generate_batch(instructions):
+        seen.append(len(instructions))
+        time.sleep(0.01)
+        return [f"nmap {i}" for i in instructions]
+
+    server = GenerationServer(generate_batch, max_batch_size=8, max_wait_ms=20).start()
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(server.generate, map(str, range(40))))
+    server.stop()
+
+    assert results == [f"nmap {i}" for i in range(40)]
+    assert max(seen) <= 8 and len(seen) < 40
+    assert server.stats()["items"] == 40
+
+
+def test_stop_fails_queued_futures_and_refuses_new_work():
+    release = threading.Event()
+
+    def generate_batch(instructions):
+        release.wait(1.0)
+        return list(instructions)
+
+    server = GenerationServer(generate_batch, max_batch_size=1, max_wait_ms=0).start()
+    futures = [server.submit(str(i)) for i in range(5)]
+    time.sleep(0.05)  # le premier lot est en génération, le reste en file
+
+    stopper = threading.Thread(target=server.stop, kwargs={"timeout": 0.05})
+    stopper.start()
+    time.sleep(0.02)
+    with pytest.raises(RuntimeError):
+        server.submit("pendant l'arrêt")
+    stopper.join()
+    release.set()
+
+    assert futures[0].result(1.0) == "0"
+    for future in futures[1:]:
+        with pytest.raises(RuntimeError):
+            future.result(1.0)
+    with pytest.raises(RuntimeError):
+        server.submit("après l'arrêt")
+
+    # Redémarrage explicite
+    assert server.start().generate("ok", timeout=1.0) == "ok"
+    server.stop()
@@ -0,0 +1,85 @@
+"""
+Équivalence checkpoint fusionné / PeftModel (base + adaptateur LoRA)
+
+Pour chaque agent dont l'adaptateur est présent :
+- logits (teacher forcing sur les cibles) : écart max < TOLERANCE
+- génération greedy : mêmes commandes
+Le checkpoint fusionné est construit s'il n'existe pas encore.
+"""
+
+import json
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sans torch / transformers / peft : test ignoré, la collecte des autres tests continue
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("peft")
+
+from transformers import T5Tokenizer, T5ForConditionalGeneration
+from peft import PeftModel
+
+from agents.merged_checkpoint import AGENTS, adapter_weights, build_merged, find_merged
+
+TOLERANCE = 1e-3
+N_EXAMPLES = 32
+DATASETS = {
+    "medium": "data/t5_balanced_test.json",
+    "hard": "data/diffusion_hard_test.json",
+}
+
+
+def load_pair(name):
+    base_model, adapter_path = AGENTS[name]
+    merged = find_merged(base_model, adapter_path) or build_merged(base_model, adapter_path)
+
+    base = T5ForConditionalGeneration.from_pretrained(base_model, torch_dtype=torch.float32)
+    adapter_model = PeftModel.from_pretrained(base, adapter_path).eval()
+    merged_model = T5ForConditionalGeneration.from_pretrained(merged, torch_dtype=torch.float32).eval()
+    return T5Tokenizer.from_pretrained(base_model), adapter_model, merged_model
+
+
+def check_equivalence(name):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, DATASETS[name]), encoding="utf-8") as f:
+        examples = json.load(f)[:N_EXAMPLES]
+
+    tokenizer, adapter_model, merged_model = load_pair(name)
+    inputs = tokenizer([ex["input_text"] for ex in examples], return_tensors="pt", padding=True, truncation=True)
+    labels = tokenizer([ex["target_text"] for ex in examples], return_tensors="pt", padding=True).input_ids
+
+    with torch.no_grad():
+        logits_adapter = adapter_model(**inputs, labels=labels).logits
+        logits_merged = merged_model(**inputs, labels=labels).logits
+        greedy = dict(max_new_tokens=64, do_sample=False, num_beams=1)
+        out_adapter = tokenizer.batch_decode(adapter_model.generate(**inputs, **greedy), skip_special_tokens=True)
+        out_merged = tokenizer.batch_decode(merged_model.generate(**inputs, **greedy), skip_special_tokens=True)
+
+    max_diff = float((logits_adapter - logits_merged).abs().max())
+    same = sum(a == b for a, b in zip(out_adapter, out_merged))
+    print(f"{name} : écart max des logits {max_diff:.2e}, {same}/{len(examples)} générations identiques")
+    return max_diff, same == len(examples)
+
+
+def test_merged_matches_adapter():
+    for name, (_, adapter_path) in AGENTS.items():
+        try:
+            adapter_weights(adapter_path)
+        except FileNotFoundError as e:
+            print(f"⚠️  {name} ignoré : {e}")
+            continue
+        max_diff, same_outputs = check_equivalence(name)
+        assert max_diff < TOLERANCE, f"{name} : logits différents ({max_diff:.2e})"
+        assert same_outputs, f"{name} : générations greedy différentes"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST : CHECKPOINT FUSIONNÉ vs PEFT")
+    print("=" * 60)
+    test_merged_matches_adapter()
+    print("✅ Checkpoints fusionnés équivalents")
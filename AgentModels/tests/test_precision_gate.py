@@ -0,0 +1,40 @@
+"""
+Porte qualité des modes de précision (benchmarks/precision_regression.py) : métriques et décisions
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from precision_regression import flag_f1, gate, score
+
+
+def test_metrics():
+    assert flag_f1("nmap -sV -p 80 10.0.0.1", "nmap -p 80 -sV 10.0.0.1") == 1.0
+    assert flag_f1("nmap 10.0.0.1", "nmap 10.0.0.1") == 1.0
+    assert flag_f1("nmap -sV", "nmap -O") == 0.0
+    result = score(["nmap  -sV   x", "nmap -O x"], ["nmap -sV x", "nmap -O -sV x"])
+    assert result["exact_match"] == 0.5
+    assert abs(result["flag_f1"] - (1.0 + 2 / 3) / 2) < 1e-12
+
+
+def test_gate_against_fp32():
+    results = {
+        "fp32": {"effective_mode": "fp32", "exact_match": 0.80, "flag_f1": 0.90},
+        "bf16": {"effective_mode": "fp32", "exact_match": 0.80, "flag_f1": 0.90},  # repli fp32
+        "int8": {"effective_mode": "int8", "exact_match": 0.79, "flag_f1": 0.85},
+    }
+    gate(results, max_em_drop=0.02, max_f1_drop=0.02)
+    assert results["fp32"]["status"] == "baseline"
+    assert results["bf16"]["status"] == "unsupported (fp32)"
+    assert results["int8"]["status"] == "rejected"  # flag-F1 : -5 points
+
+    results["int8"]["flag_f1"] = 0.89
+    gate(results, max_em_drop=0.02, max_f1_drop=0.02)
+    assert results["int8"]["status"] == "accepted"
+
+    results["fp32"] = {"mode": "fp32", "error": "échec"}
+    gate(results, max_em_drop=0.02, max_f1_drop=0.02)
+    assert results["int8"]["status"] == "no baseline"
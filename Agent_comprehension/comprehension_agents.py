@@ -9,6 +9,37 @@ from dataclasses import dataclass
 from typing import Tuple
 import re
 
+import numpy as np
+
+class KeywordMatcher:
+    """
+    Tous les mots-clés d'un ensemble en une seule regex, pour un lot de requêtes.
+
+    Même résultat que `keyword in text` pour chaque mot-clé, chevauchements
+    compris : la regex (lookahead, mots-clés du plus long au plus court)
+    donne à chaque position le plus long mot-clé qui y commence ; ceux qui
+    en sont des préfixes y commencent aussi.
+    """
+    
+    def __init__(self, keywords):
+        # Même ordre que l'itération sur l'ensemble (ordre de `keywords_found`)
+        self.keywords = list(keywords)
+        index = {kw: i for i, kw in enumerate(self.keywords)}
+        by_length = sorted(self.keywords, key=len, reverse=True)
+        self.regex = re.compile("(?=(" + "|".join(re.escape(kw) for kw in by_length) + "))")
+        self.prefixes = {
+            kw: [index[other] for other in self.keywords if kw.startswith(other)]
+            for kw in self.keywords
+        }
+    
+    def hits(self, texts: list) -> np.ndarray:
+        """Matrice booléenne (n_textes, n_mots_clés) : mot-clé présent dans le texte."""
+        hits = np.zeros((len(texts), len(self.keywords)), dtype=bool)
+        for row, text in enumerate(texts):
+            for longest in {m.group(1) for m in self.regex.finditer(text)}:
+                hits[row, self.prefixes[longest]] = True
+        return hits
+
 @dataclass
 class ComprehensionResult:
     is_relevant: bool
@@ -72,8 +103,18 @@ class ComprehensionAgent:
         'hello', 'bonjour', 'comment allez-vous'
     }
     
+    # Patterns typiques NMAP (un seul suffit)
+    NMAP_PATTERNS = [
+        r'\b(nmap|scan)\b',
+        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}',  # IP
+        r'-[a-zA-Z]+\s',  # Options style NMAP
+        r'(port|service|host|target)',
+        r'(tcp|udp|icmp|syn|stealth)',
+    ]
+    
     def __init__(self):
         self.name = "Comprehension Agent"
+        self._matchers = None  # compilés au premier understand_batch
     
     def understand(self, query: str) -> ComprehensionResult:
         """Analyse une requête pour vérifier sa pertinence NMAP"""
@@ -113,6 +154,44 @@ class ComprehensionAgent:
             keywords_found=nmap_keywords_found
         )
     
+    def understand_batch(self, queries: list) -> list:
+        """
+        Même résultat que `[self.understand(q) for q in queries]` pour un lot
+        (ex. préfiltrage d'une journée de requêtes) : chaque ensemble de
+        mots-clés et les patterns sont compilés en une regex, les occurrences
+        sont comptées en tableaux NumPy et le score est calculé sur tout le lot.
+        """
+        if self._matchers is None:
+            self._matchers = (
+                KeywordMatcher(self.NMAP_KEYWORDS),
+                KeywordMatcher(self.NON_NMAP_KEYWORDS),
+                re.compile("|".join(f"(?:{p})" for p in self.NMAP_PATTERNS), re.IGNORECASE),
+            )
+        nmap_matcher, non_nmap_matcher, pattern = self._matchers
+        
+        lowered = [q.lower() for q in queries]
+        nmap_hits = nmap_matcher.hits(lowered)
+        non_nmap_hits = non_nmap_matcher.hits(lowered)
+        has_pattern = np.array([pattern.search(q) is not None for q in lowered], dtype=bool)
+        lengths = np.array([len(q) for q in queries], dtype=np.int64)
+        
+        scores = self._calculate_relevance_scores(
+            nmap_hits.sum(axis=1), non_nmap_hits.sum(axis=1), has_pattern, lengths
+        )
+        
+        results = []
+        for i, score in enumerate(scores.tolist()):
+            nmap_found = [nmap_matcher.keywords[j] for j in np.flatnonzero(nmap_hits[i])]
+            non_nmap_found = [non_nmap_matcher.keywords[j] for j in np.flatnonzero(non_nmap_hits[i])]
+            is_relevant = score >= 0.5
+            results.append(ComprehensionResult(
+                is_relevant=is_relevant,
+                reason=self._generate_reason(is_relevant, nmap_found, non_nmap_found, score),
+                confidence=score,
+                keywords_found=nmap_found
+            ))
+        return results
+    
     def _find_keywords(self, text: str, keywords: set) -> list:
         """Cherche les mots-clés dans le texte"""
         found = []
@@ -129,15 +208,7 @@ class ComprehensionAgent:
     
     def _check_nmap_patterns(self, query: str) -> bool:
         """Vérifie les patterns typiques NMAP"""
-        patterns = [
-            r'\b(nmap|scan)\b',
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}',  # IP
-            r'-[a-zA-Z]+\s',  # Options style NMAP
-            r'(port|service|host|target)',
-            r'(tcp|udp|icmp|syn|stealth)',
-        ]
-        
-        for pattern in patterns:
+        for pattern in self.NMAP_PATTERNS:
             if re.search(pattern, query, re.IGNORECASE):
                 return True
         
@@ -168,6 +239,17 @@ class ComprehensionAgent:
         
         return score
     
+    def _calculate_relevance_scores(self, nmap_counts, non_nmap_counts,
+                                    has_pattern, query_lengths) -> np.ndarray:
+        """`_calculate_relevance_score` sur des tableaux (mêmes opérations, même ordre)"""
+        
+        score = 0.0 + np.minimum(nmap_counts * 0.15, 0.6)
+        score = score + np.where(has_pattern, 0.2, 0.0)
+        score = score - non_nmap_counts * 0.2
+        score = score + np.where((query_lengths >= 10) & (query_lengths <= 200), 0.1, 0.0)
+        
+        return np.maximum(0.0, np.minimum(1.0, score))
+    
     def _generate_reason(self, is_relevant: bool, nmap_keywords: list, 
                          non_nmap_keywords: list, score: float) -> str:
         """Génère une raison explicative"""
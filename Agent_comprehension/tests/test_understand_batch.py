@@ -0,0 +1,69 @@
+"""
+understand_batch : mêmes résultats que understand() requête par requête
+"""
+
+import csv
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..")))
+
+from comprehension_agents import ComprehensionAgent
+
+# Mots-clés qui se chevauchent (scan / scanner / scanning, port / ports),
+# majuscules, ponctuation collée, requêtes non ASCII et hors sujet
+QUERIES = [
+    "nmap -sV -O 192.168.1.1",
+    "scan scanner scanning scans",
+    "SCANNING the network, then Scanner-ports!",
+    "port ports portscan port-scan",
+    "scan des ports ouverts sur 10.0.0.0/24",
+    "analyse réseau : détection de version et d'OS",
+    "énumération des services avec --script vuln",
+    "スキャン nmap 192.168.0.1",
+    "сканировать порты nmap -p 22",
+    "recette de la tarte aux pommes",
+    "météo à Marseille demain",
+    "le port de Marseille est-il ouvert ?",
+    "scanner une photo en pdf",
+    "firewall evasion with decoys -D RND:10",
+    "udp udpscan -sU -sS -sT",
+    "",
+    "   ",
+    "nmap",
+]
+
+
+def _corpus():
+    """QUERIES + les requêtes Nmap et hors sujet du classifieur, si présentes."""
+    queries = list(QUERIES)
+    data_dir = os.path.join(HERE, "..", "..", "AgentClassifieur", "data")
+    for name in ("data_personn3.csv", "irrelevant_queries.csv"):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                queries += [row["query"] for row in csv.DictReader(f)]
+    return queries
+
+
+def test_batch_matches_scalar_path():
+    agent = ComprehensionAgent()
+    queries = _corpus()
+
+    batch = agent.understand_batch(queries)
+    scalar = [agent.understand(q) for q in queries]
+
+    assert len(batch) == len(scalar)
+    for query, b, s in zip(queries, batch, scalar):
+        assert b.keywords_found == s.keywords_found, query
+        assert b.confidence == s.confidence, query
+        assert b.reason == s.reason, query
+        assert b.is_relevant == s.is_relevant, query
+
+
+def test_overlapping_keywords_are_all_found():
+    agent = ComprehensionAgent()
+    result = agent.understand_batch(["scan scanner scanning"])[0]
+    assert {"scan", "scanner", "scanning"} <= set(result.keywords_found)
+    assert result.keywords_found == agent.understand("scan scanner scanning").keywords_found
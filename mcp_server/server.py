@@ -5,6 +5,7 @@ Compatible MCP Inspector & mcp dev
 import sys
 from pathlib import Path
 import logging
+import json
 
 # Add project root
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -14,6 +15,7 @@ from mcp.server.fastmcp import FastMCP
 # Import tools
 from tools.classify_tool import classify_query
 from tools.generate_easy_tool import generate_nmap_easy
+from tools import generate_medium_tool, generate_hard_tool
 from tools.generate_medium_tool import generate_nmap_medium
 from tools.generate_hard_tool import generate_nmap_hard
 from tools.validate_tool import validate_command
@@ -60,6 +62,17 @@ async def gen_medium(query: str) -> str:
 async def gen_hard(query: str) -> str:
     return await generate_nmap_hard(query)
 
+@mcp.tool(
+    name="generation_stats",
+    description="Batching stats of the MEDIUM / HARD generators (queue wait, batch sizes, throughput)"
+)
+async def gen_stats() -> str:
+    stats = {}
+    for name, tool in [("medium", generate_medium_tool), ("hard", generate_hard_tool)]:
+        server = getattr(tool, "_server", None)
+        stats[name] = server.stats() if server is not None else "not started"
+    return json.dumps(stats, indent=2)
+
 @mcp.tool(
     name="validate_command",
     description="Validate Nmap command (syntax, security, best practices)"
@@ -6,39 +6,101 @@
 - Async compatible
 """
 
+import os
 import sys
 from pathlib import Path
 import joblib
-import re
 from typing import Dict, Any
 import json
 
+# Moteur compilé du classifieur (AgentClassifieur/src/fast_forest.py)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "AgentClassifieur" / "src"))
+try:
+    from fast_forest import compile_model
+except ImportError:
+    compile_model = None
+
+try:
+    from kg_index import KGFeatureIndex
+except ImportError:
+    KGFeatureIndex = None
+
+try:
+    from ngram_engine import NgramEngine
+except ImportError:
+    NgramEngine = None
+
+try:
+    from hot_swap import HotSwapper, RecentQueries, check_schema
+except ImportError:
+    HotSwapper = None
+
+# Shared query vectorizer (AgentClassifieur/src/vectorizer.py), chosen from the model's feature schema
+try:
+    from vectorizer import LITE_SCHEMA, LiteVectorizer, vectorizer_for
+    # Legacy joblib artifacts (before schema stamps) were trained on lite/v1 vectors
+    LEGACY_FEATURE_SCHEMA = LITE_SCHEMA.id
+except ImportError:
+    LiteVectorizer = vectorizer_for = None
+
+# Engine: "forest" (joblib model below) or "ngram" (hashed n-grams, AgentClassifieur/src/ngram_engine.py)
+CLASSIFIER_ENGINE = os.getenv("CLASSIFIER_ENGINE", "forest")
+NGRAM_LABELS = ["EASY", "MEDIUM", "HARD"]
+
 # ============================================================================
 # MODEL LOADING
 # ============================================================================
 
 classifier_model = None
 label_encoder = None
+kg_index = None
+ngram_engine = None
+query_vectorizer = None
+
+# (model, label encoder, vectorizer) swapped as one reference, so a request never mixes two versions
+_model_state = (None, None, None)
+model_swapper = None
+recent_queries = RecentQueries() if HotSwapper is not None else None
+
+# Try multiple paths
+MODEL_PATHS = [
+    Path(__file__).parent.parent / "models" / "hybrid_classifier_optimized.joblib",
+    Path(__file__).parent / "models" / "hybrid_classifier_optimized.joblib",
+    Path(__file__).parent / "hybrid_classifier_optimized.joblib",
+    Path.home() / ".nmap_ai" / "models" / "hybrid_classifier_optimized.joblib",
+]
+
+def read_model(model_path: Path):
+    """Read (model, label encoder, vectorizer) from a joblib artifact"""
+    if vectorizer_for is None:
+        raise ImportError("AgentClassifieur/src/vectorizer.py not importable")
+    model_data = joblib.load(str(model_path))
+    # Vectors computed with the schema the model was trained on; unstamped artifacts
+    # are this tool's legacy lite/v1 ones (explicit, never shared with the router)
+    vectorizer = vectorizer_for(model_data, assume=LEGACY_FEATURE_SCHEMA)
+    if hasattr(vectorizer, "kg_index"):
+        vectorizer.kg_index = kg_index
+    model = model_data.get('model')
+    if compile_model is not None:
+        model = compile_model(model)
+    return model, model_data.get('le_complexity'), vectorizer
+
+
+def set_model(state):
+    """Swap the served (model, label encoder, vectorizer); in-flight requests keep the old triple"""
+    global classifier_model, label_encoder, query_vectorizer, _model_state
+    _model_state = state
+    classifier_model, label_encoder, query_vectorizer = state
+
 
 def load_model():
     """Load classifier model once at startup"""
-    global classifier_model, label_encoder
-    
-    # Try multiple paths
-    paths_to_try = [
-        Path(__file__).parent.parent / "models" / "hybrid_classifier_optimized.joblib",
-        Path(__file__).parent / "models" / "hybrid_classifier_optimized.joblib",
-        Path(__file__).parent / "hybrid_classifier_optimized.joblib",
-        Path.home() / ".nmap_ai" / "models" / "hybrid_classifier_optimized.joblib",
-    ]
-    
-    for model_path in paths_to_try:
+    for model_path in MODEL_PATHS:
         if model_path.exists():
             try:
-                model_data = joblib.load(str(model_path))
-                classifier_model = model_data.get('model')
-                label_encoder = model_data.get('le_complexity')
+                set_model(read_model(model_path))
                 print(f"✅ Model loaded: {model_path}")
+                start_model_watch(model_path)
                 return True
             except Exception as e:
                 print(f"⚠️  Error loading {model_path}: {e}")
@@ -48,83 +110,99 @@ def load_model():
     return False
 
 
+def validate_model(state):
+    """Same output schema as the served model: 30 features, one class per label"""
+    model, encoder, vectorizer = state
+    if model is None or encoder is None:
+        raise ValueError("Artifact without 'model' or 'le_complexity'")
+    check_schema(model, vectorizer.schema.n_features, encoder.classes_.tolist())
+
+
+def warm_model(state, queries):
+    model, encoder, vectorizer = state
+    probabilities = model.predict_proba(vectorizer.vectorize_batch(queries))
+    if len(probabilities) != len(queries) or len(probabilities[0]) != len(encoder.classes_):
+        raise ValueError(f"Unexpected probability shape {getattr(probabilities, 'shape', None)}")
+
+
+def start_model_watch(model_path: Path):
+    """Reload the artifact without restarting the server (MODEL_WATCH_INTERVAL > 0)"""
+    global model_swapper
+    if HotSwapper is None:
+        return None
+    model_swapper = HotSwapper(
+        [str(model_path)], lambda: read_model(model_path), validate_model, warm_model, set_model,
+        recent_queries, default_queries=["nmap -sV 192.168.1.1"],
+    )
+    return model_swapper.start_watching()
+
+
+def reload_model(force: bool = False) -> Dict[str, Any]:
+    """Load, check, warm and swap in a new classifier artifact"""
+    if model_swapper is None:
+        return {"swapped": False, "error": "No model artifact loaded"}
+    return model_swapper.reload(force)
+
+
+def load_kg_index():
+    """Load the serialized KG feature index (no Neo4j needed)"""
+    global kg_index
+    
+    index_path = Path(__file__).parent.parent.parent / "AgentClassifieur" / "models" / "kg_index.json"
+    if KGFeatureIndex is None or not index_path.exists():
+        print("⚠️  No KG index found. KG features set to 0.")
+        return False
+    
+    try:
+        kg_index = KGFeatureIndex.load(str(index_path))
+        if hasattr(query_vectorizer, "kg_index"):
+            query_vectorizer.kg_index = kg_index
+        print(f"✅ KG index loaded: {index_path}")
+        return True
+    except Exception as e:
+        print(f"⚠️  Error loading {index_path}: {e}")
+        return False
+
+
+def load_ngram_engine():
+    """Load the hashed n-gram engine (no spaCy, no Neo4j)"""
+    global ngram_engine
+    
+    model_path = Path(__file__).parent.parent.parent / "AgentClassifieur" / "models" / "ngram_classifier.npz"
+    if NgramEngine is None or not model_path.exists():
+        print("⚠️  No n-gram model found. Falling back to the forest engine.")
+        return False
+    
+    try:
+        ngram_engine = NgramEngine.load(str(model_path))
+        print(f"✅ N-gram engine loaded: {model_path}")
+        return True
+    except Exception as e:
+        print(f"⚠️  Error loading {model_path}: {e}")
+        return False
+
+
 # Load model at import time
-load_model()
+if not (CLASSIFIER_ENGINE == "ngram" and load_ngram_engine()):
+    load_model()
+    load_kg_index()
 
 
 # ============================================================================
 # FEATURE EXTRACTION (30 features)
 # ============================================================================
 
-def extract_simple_features(query: str) -> list:
+def extract_simple_features(query: str, vectorizer=None) -> list:
     """
-    Extract exactly 30 features without spaCy
-    Compatible with joblib classifier model
+    Extract exactly 30 features with the served model's vectorizer
+    (lite/v1: no spaCy, KG features from the serialized KG index, no Neo4j)
     """
-    query_lower = query.lower()
-    words = query_lower.split()
-    
-    features = []
-    
-    # === STATISTICS (5 features) ===
-    features.append(len(words))  # 0: num_tokens
-    features.append(sum(1 for w in words if w in ['scan', 'check', 'test', 'probe']))  # 1: verbs
-    features.append(sum(1 for w in words if w in ['port', 'host', 'network', 'service']))  # 2: nouns
-    features.append(sum(1 for w in words if w in ['quick', 'fast', 'slow', 'aggressive']))  # 3: adjectives
-    features.append(len(query))  # 4: query_length
-    
-    # === IP & NETWORK (3 features) ===
-    has_ipv4 = 1 if re.search(r'\d+\.\d+\.\d+\.\d+', query) else 0
-    has_range = 1 if '/' in query or '-' in query else 0
-    num_ips = len(re.findall(r'\d+\.\d+\.\d+\.\d+', query))
-    features.extend([has_ipv4, has_range, num_ips])  # 5-7
-    
-    # === KEYWORDS (4 features) ===
-    EASY_KEYWORDS = {'sn', 'ping', 'simple', 'basic', 'quick', 'fast'}
-    MEDIUM_KEYWORDS = {'sv', 'version', 'os', 'script', 'sc', 't4', 'udp'}
-    HARD_KEYWORDS = {'ss', 'sf', 'sx', 'sn', 'sm', 'sa', 'sw', 'f', 'fragment', 
-                     'spoof', 'decoy', 'evasion', 't0', 't1', 't2'}
-    
-    nb_easy = sum(1 for w in words if w in EASY_KEYWORDS)
-    nb_medium = sum(1 for w in words if w in MEDIUM_KEYWORDS)
-    nb_hard = sum(1 for w in words if w in HARD_KEYWORDS)
-    ratio_hard = nb_hard / (len(words) + 1)
-    
-    features.extend([nb_easy, nb_medium, nb_hard, ratio_hard])  # 8-11
-    
-    # === OPTIONS (7 features) ===
-    has_timing = 1 if any(t in query_lower for t in ['t0', 't1', 't2', 't3', 't4', 't5']) else 0
-    has_script = 1 if 'script' in query_lower else 0
-    has_udp = 1 if 'udp' in query_lower or '-su' in query_lower else 0
-    has_os = 1 if ' -o' in query_lower or 'os ' in query_lower else 0
-    has_version = 1 if '-sv' in query_lower or 'version' in query_lower else 0
-    has_stealth = 1 if any(k in query_lower for k in HARD_KEYWORDS) else 0
-    num_options = sum(1 for kw in list(HARD_KEYWORDS) + list(MEDIUM_KEYWORDS) if kw in query_lower)
-    
-    features.extend([has_timing, has_script, has_udp, has_os, has_version, has_stealth, num_options])  # 12-18
-    
-    # === ADVANCED (3 features) ===
-    has_entities = 0  # No NER without spaCy
-    has_proxy = 1 if 'proxy' in query_lower else 0
-    has_decoy = 1 if 'decoy' in query_lower else 0
-    features.extend([has_entities, has_proxy, has_decoy])  # 19-21
-    
-    # === SCRIPTS (1 feature) ===
-    script_weight = 10 if 'script' in query_lower else 0
-    features.append(script_weight)  # 22
-    
-    # === COMPLEXITY SCORE (1 feature) ===
-    complexity_score = nb_hard * 5 + nb_medium * 2 + nb_easy
-    features.append(complexity_score)  # 23
-    
-    # === KG FEATURES (5 features) ===
-    features.extend([0, 0, 0.0, 0, 0])  # 24-28
-    
-    # === PADDING (1 feature) ===
-    features.append(0)  # 29
-    
-    # Ensure exactly 30 features
-    return features[:30]
+    vectorizer = vectorizer or query_vectorizer
+    if vectorizer is None:
+        if LiteVectorizer is None:
+            raise RuntimeError("AgentClassifieur/src/vectorizer.py not importable")
+        vectorizer = LiteVectorizer(kg_index)
+    return vectorizer.vectorize(query)
 
 
 # ============================================================================
@@ -183,16 +261,40 @@ async def classify_query(query: str) -> Dict[str, Any]:
             "success": False
         }
     
+    # N-gram engine (CLASSIFIER_ENGINE=ngram)
+    if ngram_engine is not None:
+        try:
+            probabilities = ngram_engine.predict_proba([query])[0]
+            complexity = NGRAM_LABELS[ngram_engine.classes_[probabilities.argmax()]]
+            confidence = float(max(probabilities))
+            
+            return {
+                "complexity": complexity,
+                "confidence": confidence,
+                "all_probabilities": {
+                    label: float(prob) for label, prob in zip(NGRAM_LABELS, probabilities)
+                },
+                "explanation": f"N-gram classification (confidence: {confidence:.1%})",
+                "success": True
+            }
+        
+        except Exception as e:
+            print(f"⚠️  N-gram classification error: {e}")
+            # Fall through to heuristic
+    
     # Try ML model first
-    if classifier_model is not None and label_encoder is not None:
+    model, encoder, vectorizer = _model_state
+    if model is not None and encoder is not None:
         try:
-            features = extract_simple_features(query)
+            features = extract_simple_features(query, vectorizer)
+            if recent_queries is not None:
+                recent_queries.add(query)
             
             # Predict
-            prediction = classifier_model.predict([features])[0]
-            probabilities = classifier_model.predict_proba([features])[0]
+            probabilities = model.predict_proba([features])[0]
+            prediction = model.classes_[probabilities.argmax()]
             
-            labels = label_encoder.classes_.tolist()  # ['EASY', 'MEDIUM', 'HARD']
+            labels = encoder.classes_.tolist()  # ['EASY', 'MEDIUM', 'HARD']
             complexity = labels[prediction]
             confidence = float(max(probabilities))
             
@@ -12,7 +12,9 @@ sys.path.insert(0, str(agents_path))
 # Import direct
 try:
     from generator_hard_agent import HardGeneratorAgent
+    from inference_server import GenerationServer
     _agent = None
+    _server = None
     
     def get_agent():
         global _agent
@@ -20,6 +22,13 @@ try:
             _agent = HardGeneratorAgent()
         return _agent
     
+    def get_server():
+        """Concurrent requests share one batched generate (GENERATION_MAX_BATCH / GENERATION_MAX_WAIT_MS)"""
+        global _server
+        if _server is None:
+            _server = GenerationServer(get_agent().generate_batch, name="hard").start()
+        return _server
+    
     AGENT_AVAILABLE = True
 except Exception as e:
     print(f"Warning: HardGeneratorAgent not available: {e}")
@@ -33,8 +42,7 @@ async def generate_nmap_hard(query: str) -> str:
         return "nmap -sS -T1 -f 192.168.1.1"
     
     try:
-        agent = get_agent()
-        result = agent.generate(query)
+        result = await get_server().generate_async(query)
         
         # Validation: S'assurer que c'est une string
         if result is None:
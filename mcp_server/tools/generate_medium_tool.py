@@ -12,7 +12,9 @@ sys.path.insert(0, str(agents_path))
 # Import direct
 try:
     from generator_medium_agent import MediumGeneratorAgent
+    from inference_server import GenerationServer
     _agent = None
+    _server = None
     
     def get_agent():
         global _agent
@@ -20,6 +22,13 @@ try:
             _agent = MediumGeneratorAgent()
         return _agent
     
+    def get_server():
+        """Concurrent requests share one batched generate (GENERATION_MAX_BATCH / GENERATION_MAX_WAIT_MS)"""
+        global _server
+        if _server is None:
+            _server = GenerationServer(get_agent().generate_batch, name="medium").start()
+        return _server
+    
     AGENT_AVAILABLE = True
 except Exception as e:
     print(f"⚠️ MediumGeneratorAgent not available: {e}")
@@ -32,8 +41,7 @@ async def generate_nmap_medium(query: str) -> str:
         return f"nmap -sV 192.168.1.1  # Error: Agent not available"
     
     try:
-        agent = get_agent()
-        command = agent.generate(query)
+        command = await get_server().generate_async(query)
         return command
     except Exception as e:
         import traceback